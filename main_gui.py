@@ -1,20 +1,841 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import customtkinter as ctk
-from stego_manager import embed_message, extract_message
 import os
 import mimetypes
-from PIL import Image, ExifTags, ImageFile
-import cv2
 import datetime
-from tkinter import filedialog
+from tkinter import filedialog, ttk
 import tkinter as tk
 import math
-
-Image.MAX_IMAGE_PIXELS = None  
-ImageFile.LOAD_TRUNCATED_IMAGES = True
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# How often the UI polls a running background job for progress (ms)
+JOB_POLL_MS = 100
+
+# Animation timing: frame interval while in use, when idle, and resize debounce (ms)
+ANIMATION_FRAME_MS = 50
+ANIMATION_IDLE_FRAME_MS = 250
+ANIMATION_IDLE_AFTER_S = 30
+RESIZE_DEBOUNCE_MS = 120
+
+# Extracted payloads longer than this open in the paged viewer instead of the textbox
+INLINE_PAYLOAD_CHARS = 100_000
+PAYLOAD_ROW_CHARS = 96
+HEX_ROW_BYTES = 16
+PAYLOAD_WRITE_CHUNK = 1 << 20
+
+# Bounding box of the file preview thumbnail
+PREVIEW_SIZE = (320, 200)
+
+# -------------------------
+# Deferred Imports
+# -------------------------
+# PIL, OpenCV and the backends are only imported on first use or by the
+# warm-up thread started once the window is visible, so they never delay
+# the first frame.
+
+def warm_up_imports():
+    """Import the heavy modules in the background; returns seconds spent"""
+    start = time.perf_counter()
+    import stego_manager  # noqa: F401 (loads every backend and the inspector)
+    try:
+        import cv2  # noqa: F401
+    except ImportError:
+        pass
+    return time.perf_counter() - start
+
+def embed_message(*args, **kwargs):
+    from stego_manager import embed_message
+    return embed_message(*args, **kwargs)
+
+def extract_message(*args, **kwargs):
+    from stego_manager import extract_message
+    return extract_message(*args, **kwargs)
+
+def build_preview(file_path):
+    """Thumbnail for the preview pane, or None for non-images and unreadable files"""
+    from stego_thumbnail import get_thumbnail
+    if os.path.splitext(file_path)[1].lower() not in (".png", ".bmp", ".jpg", ".jpeg", ".gif", ".tiff", ".webp"):
+        return None
+    try:
+        return get_thumbnail(file_path, PREVIEW_SIZE)
+    except Exception:
+        return None
+
+def build_metadata_report(file_path):
+    """Build the metadata panel text and quick stats for a file (runs off the UI thread)"""
+    from stego_inspect import inspect_file
+    
+    if not os.path.exists(file_path):
+        return "❌ File not found.\n", ("--", "--", "--")
+        
+    try:
+        # Header-only record, shared with the backends through the inspector cache
+        info = inspect_file(file_path)
+        
+        # Format file size
+        file_size_kb = info.size / 1024
+        file_size_mb = file_size_kb / 1024
+        if file_size_mb >= 1:
+            size_str = f"{file_size_mb:.2f} MB"
+        else:
+            size_str = f"{file_size_kb:.2f} KB"
+            
+        metadata = f"""📁 FILE INFORMATION
+{'='*40}
+Name: {os.path.basename(info.path)}
+Path: {info.path}
+Size: {size_str} ({info.size:,} bytes)
+Type: {info.mime_type or 'Unknown'}
+Modified: {datetime.datetime.fromtimestamp(info.mtime_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S')}
+Capacity: {f"{info.capacity:,} bytes (after compression)" if info.capacity is not None else "Not limited by the carrier"}
+
+"""
+        
+        dimensions_str = info.dimensions or "--"
+        
+        if info.error:
+            metadata += f"❌ Error reading {info.file_type or 'file'}: {info.error}\n"
+            
+        # Image metadata
+        elif info.file_type == "image":
+            metadata += f"""🖼️ IMAGE DETAILS
+{'='*40}
+Format: {info.format or 'Unknown'}
+Dimensions: {dimensions_str}
+Mode: {info.mode or 'Unknown'}
+Has Alpha: {'Yes' if info.mode and 'A' in info.mode else 'No'}
+Aspect Ratio: {f"{info.width / info.height:.2f}:1" if info.width and info.height else 'Unknown'}
+
+"""
+            
+            # EXIF data
+            if info.exif:
+                metadata += "📷 EXIF DATA\n" + "="*40 + "\n"
+                for tag_name, value in list(info.exif.items())[:10]:  # Limit to first 10
+                    metadata += f"{tag_name}: {value}\n"
+                if len(info.exif) > 10:
+                    metadata += f"... and {len(info.exif) - 10} more EXIF entries\n"
+            else:
+                metadata += "📷 No EXIF data found.\n"
+                
+        # Audio metadata
+        elif info.file_type == "audio" and info.duration is not None:
+            metadata += f"""🎵 AUDIO DETAILS
+{'='*40}
+Format: {info.format or 'Unknown'}
+Codec: {info.codec or 'Unknown'}
+Channels: {info.channels or 'Unknown'}
+Sample Rate: {f"{info.sample_rate:,} Hz" if info.sample_rate else 'Unknown'}
+Sample Width: {f"{info.sample_width * 8} bit" if info.sample_width else 'Unknown'}
+Duration: {str(datetime.timedelta(seconds=int(info.duration)))}
+"""
+            
+        # Video metadata
+        elif info.file_type == "video" and info.frame_rate is not None:
+            duration = info.duration or 0
+            metadata += f"""🎥 VIDEO DETAILS
+{'='*40}
+Resolution: {dimensions_str}
+Codec: {info.codec or 'Unknown'}
+Frame Rate: {info.frame_rate:.2f} FPS
+Total Frames: {f"{info.frame_count:,}" if info.frame_count is not None else 'Unknown'}
+Duration: {str(datetime.timedelta(seconds=int(duration)))}
+Bitrate: {(info.size * 8) / (duration * 1000) if duration > 0 else 0:.0f} kbps
+"""
+            
+        return metadata, (size_str, info.mime_type or "Unknown", dimensions_str)
+        
+    except Exception as e:
+        return f"❌ Error extracting metadata: {e}", ("Error", "Error", "Error")
+
+# -------------------------
+# Payload Viewer
+# -------------------------
+
+def text_row_bounds(text, width=PAYLOAD_ROW_CHARS):
+    """(starts, ends) character offsets of every display row of text.
+
+    Lines are split at newlines and wrapped every width characters, so the
+    viewer can slice any row directly without laying out the whole payload.
+    """
+    import numpy as np
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    breaks = np.flatnonzero(codes == 10)
+    line_starts = np.concatenate(([0], breaks + 1))
+    line_ends = np.concatenate((breaks, [len(codes)]))
+    rows_per_line = np.maximum(1, -(-(line_ends - line_starts) // width))
+    line_of_row = np.repeat(np.arange(len(line_starts)), rows_per_line)
+    first_row = np.repeat(np.cumsum(rows_per_line) - rows_per_line, rows_per_line)
+    starts = line_starts[line_of_row] + (np.arange(len(line_of_row)) - first_row) * width
+    ends = np.minimum(starts + width, line_ends[line_of_row])
+    return starts, ends
+
+def format_hex_row(data, offset):
+    """One hexdump line: offset, 16 bytes in two groups of 8, printable ASCII"""
+    chunk = data[offset:offset + HEX_ROW_BYTES]
+    hex_part = chunk.hex(" ")
+    if len(chunk) > 8:
+        hex_part = hex_part[:23] + " " + hex_part[23:]
+    ascii_part = "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+    return f"{offset:08x}  {hex_part:<49}  |{ascii_part}|"
+
+def write_payload(output_path, payload):
+    """Stream a text or binary payload to disk in chunks"""
+    try:
+        with open(output_path, "wb") as f:
+            for start in range(0, len(payload), PAYLOAD_WRITE_CHUNK):
+                chunk = payload[start:start + PAYLOAD_WRITE_CHUNK]
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8", "surrogatepass")
+                f.write(chunk)
+        return True, f"✅ Payload saved to: {output_path}"
+    except Exception as e:
+        return False, f"❌ Could not save payload: {str(e)}"
+
+class PayloadViewer(ctk.CTkToplevel):
+    """Paged viewer that only ever renders the rows currently on screen"""
+    
+    def __init__(self, master, payload, run_in_background, show_popup):
+        super().__init__(master)
+        self.title("📤 Extracted Payload")
+        self.geometry("900x600")
+        self.minsize(500, 300)
+        self.payload = payload
+        self.payload_bytes = None
+        self.run_in_background = run_in_background
+        self.show_popup = show_popup
+        self.mode = tk.StringVar(value="Hex" if isinstance(payload, bytes) else "Text")
+        self.text_payload = None
+        self.rows = None
+        self.row_count = 0
+        self.top_row = 0
+        self.visible_rows = 1
+        
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        
+        toolbar = ctk.CTkFrame(self, fg_color="#1a1a1a", corner_radius=15)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", padx=10, pady=10)
+        toolbar.grid_columnconfigure(1, weight=1)
+        
+        ctk.CTkSegmentedButton(
+            toolbar,
+            values=["Text", "Hex"],
+            variable=self.mode,
+            command=lambda value: self.load_rows()
+        ).grid(row=0, column=0, padx=10, pady=10)
+        
+        self.info_label = ctk.CTkLabel(toolbar, text="", font=ctk.CTkFont(size=12), text_color="#CCCCCC")
+        self.info_label.grid(row=0, column=1, sticky="w", padx=10)
+        
+        self.save_btn = ctk.CTkButton(
+            toolbar,
+            text="💾 SAVE TO FILE",
+            corner_radius=15,
+            fg_color="#6C7B7F",
+            hover_color="#5A6B7F",
+            command=self.save_payload
+        )
+        self.save_btn.grid(row=0, column=2, padx=10, pady=10)
+        
+        self.font = ctk.CTkFont(family="Consolas", size=12)
+        self.text = tk.Text(
+            self,
+            wrap="none",
+            font=self.font,
+            bg="#0a0a0a",
+            fg="#E6E6E6",
+            borderwidth=0,
+            highlightthickness=0,
+            cursor="arrow"
+        )
+        self.text.grid(row=1, column=0, sticky="nsew", padx=(10, 0), pady=(0, 10))
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 10), pady=(0, 10))
+        
+        self.text.bind("<Configure>", self.on_resize)
+        self.text.bind("<MouseWheel>", lambda e: self.scroll_to(self.top_row - e.delta // 40))
+        self.text.bind("<Button-4>", lambda e: self.scroll_to(self.top_row - 3))
+        self.text.bind("<Button-5>", lambda e: self.scroll_to(self.top_row + 3))
+        for key, step in (("<Up>", -1), ("<Down>", 1)):
+            self.bind(key, lambda e, step=step: self.scroll_to(self.top_row + step))
+        self.bind("<Prior>", lambda e: self.scroll_to(self.top_row - self.visible_rows))
+        self.bind("<Next>", lambda e: self.scroll_to(self.top_row + self.visible_rows))
+        self.bind("<Home>", lambda e: self.scroll_to(0))
+        self.bind("<End>", lambda e: self.scroll_to(self.row_count))
+        
+        self.load_rows()
+        
+    def load_rows(self):
+        """Index the payload for the selected mode (text row offsets are built off the UI thread)"""
+        self.top_row = 0
+        if self.mode.get() == "Hex":
+            if self.payload_bytes is None:
+                self.payload_bytes = (self.payload.encode("utf-8", "surrogatepass")
+                                      if isinstance(self.payload, str) else self.payload)
+            self.rows = None
+            self.row_count = -(-len(self.payload_bytes) // HEX_ROW_BYTES)
+            self.info_label.configure(text=f"{len(self.payload_bytes):,} bytes")
+            self.render()
+        else:
+            self.rows = None
+            self.row_count = 0
+            self.info_label.configure(text="⏳ Indexing...")
+            self.render()
+            text = self.payload if isinstance(self.payload, str) else self.payload.decode("utf-8", "replace")
+            self.run_in_background(text_row_bounds, (text,), lambda rows: self.on_rows_ready(text, rows),
+                                   self.on_rows_failed)
+            
+    def on_rows_failed(self, error):
+        if self.mode.get() == "Text" and self.winfo_exists():
+            self.info_label.configure(text=f"❌ Could not index text: {error}")
+            
+    def on_rows_ready(self, text, rows):
+        if self.mode.get() != "Text" or not self.winfo_exists():
+            return
+        self.text_payload = text
+        self.rows = rows
+        self.row_count = len(rows[0])
+        self.info_label.configure(text=f"{len(text):,} characters · {self.row_count:,} rows")
+        self.render()
+        
+    def on_resize(self, event):
+        self.visible_rows = max(1, event.height // self.font.metrics("linespace"))
+        self.scroll_to(self.top_row)
+        
+    def on_scrollbar(self, action, amount, unit=None):
+        """Translate scrollbar moveto/scroll commands into a top row"""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.row_count))
+        elif unit == "pages":
+            self.scroll_to(self.top_row + int(amount) * self.visible_rows)
+        else:
+            self.scroll_to(self.top_row + int(amount))
+            
+    def scroll_to(self, row):
+        self.top_row = max(0, min(row, self.row_count - self.visible_rows))
+        self.render()
+        
+    def render(self):
+        """Replace the widget contents with just the visible rows"""
+        first, last = self.top_row, min(self.row_count, self.top_row + self.visible_rows)
+        if self.mode.get() == "Hex":
+            lines = [format_hex_row(self.payload_bytes, row * HEX_ROW_BYTES) for row in range(first, last)]
+        elif self.rows is not None:
+            starts, ends = self.rows
+            lines = [self.text_payload[starts[row]:ends[row]] for row in range(first, last)]
+        else:
+            lines = []
+            
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.configure(state="disabled")
+        
+        if self.row_count:
+            self.scrollbar.set(first / self.row_count, last / self.row_count)
+        else:
+            self.scrollbar.set(0, 1)
+            
+    def save_payload(self):
+        """Write the payload to a file in the background, bypassing the text widget"""
+        output_path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Save Payload As",
+            defaultextension=".txt" if self.mode.get() == "Text" else ".bin",
+            filetypes=[("Text files", "*.txt"), ("Binary files", "*.bin"), ("All files", "*.*")]
+        )
+        if not output_path:
+            return
+        self.save_btn.configure(state="disabled", text="💾 SAVING...")
+        self.run_in_background(write_payload, (output_path, self.payload), self.on_saved,
+                               lambda error: self.on_saved((False, f"❌ Could not save payload: {str(error)}")))
+        
+    def on_saved(self, result):
+        success, message = result
+        if self.winfo_exists():
+            self.save_btn.configure(state="normal", text="💾 SAVE TO FILE")
+        self.show_popup("Saved" if success else "Failed", message, success=success)
+
+# -------------------------
+# Bit-plane Viewer
+# -------------------------
+
+def build_bit_plane_view(source, reference, mode, channel, bit, box, out_size):
+    """Render a bit-plane or difference view off the UI thread; returns (success, image or message, stats)"""
+    from stego_bitplane import render_bit_plane, render_difference
+    try:
+        if mode == "Diff":
+            if reference is None:
+                return False, "Choose a reference image for the difference map.", {}
+            image, stats = render_difference(source, reference, bit, box, out_size)
+        else:
+            image, stats = render_bit_plane(source, channel, bit, box, out_size)
+        return True, image, stats
+    except Exception as e:
+        return False, f"❌ Could not render bit plane: {str(e)}", {}
+
+def load_bit_plane_source(image_path):
+    from stego_bitplane import BitPlaneSource
+    try:
+        return True, BitPlaneSource(image_path)
+    except Exception as e:
+        return False, f"❌ Could not open image: {str(e)}"
+
+class BitPlaneViewer(ctk.CTkToplevel):
+    """Bit-plane / LSB difference viewer; left click zooms in, right click zooms out"""
+    
+    def __init__(self, master, image_path, run_in_background, show_popup):
+        super().__init__(master)
+        self.title(f"🔬 Bit Planes - {os.path.basename(image_path)}")
+        self.geometry("1000x750")
+        self.minsize(600, 450)
+        self.run_in_background = run_in_background
+        self.show_popup = show_popup
+        self.source = None
+        self.reference = None
+        self.box = None
+        self.photo = None
+        self.render_generation = 0
+        self.render_job = None
+        self.mode = tk.StringVar(value="Plane")
+        self.channel = tk.StringVar(value="R")
+        self.bit = tk.StringVar(value="0")
+        
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        
+        toolbar = ctk.CTkFrame(self, fg_color="#1a1a1a", corner_radius=15)
+        toolbar.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+        toolbar.grid_columnconfigure(6, weight=1)
+        
+        ctk.CTkSegmentedButton(
+            toolbar, values=["Plane", "Diff"], variable=self.mode,
+            command=lambda value: self.schedule_render()
+        ).grid(row=0, column=0, padx=(10, 5), pady=10)
+        
+        self.channel_menu = ctk.CTkSegmentedButton(
+            toolbar, values=["R", "G", "B"], variable=self.channel,
+            command=lambda value: self.schedule_render()
+        )
+        self.channel_menu.grid(row=0, column=1, padx=5, pady=10)
+        
+        ctk.CTkLabel(toolbar, text="Bit:", font=ctk.CTkFont(size=12)).grid(row=0, column=2, padx=(10, 2))
+        ctk.CTkOptionMenu(
+            toolbar, values=[str(b) for b in range(8)], variable=self.bit, width=60,
+            command=lambda value: self.schedule_render()
+        ).grid(row=0, column=3, padx=5, pady=10)
+        
+        ctk.CTkButton(
+            toolbar, text="📂 REFERENCE", width=110, corner_radius=15,
+            fg_color="#6C7B7F", hover_color="#5A6B7F", command=self.choose_reference
+        ).grid(row=0, column=4, padx=5, pady=10)
+        
+        ctk.CTkButton(
+            toolbar, text="🔍 FIT", width=70, corner_radius=15,
+            fg_color="#6C7B7F", hover_color="#5A6B7F", command=self.reset_zoom
+        ).grid(row=0, column=5, padx=5, pady=10)
+        
+        self.info_label = ctk.CTkLabel(toolbar, text="⏳ Loading preview...", font=ctk.CTkFont(size=12), text_color="#CCCCCC")
+        self.info_label.grid(row=0, column=6, sticky="e", padx=10)
+        
+        self.canvas = tk.Canvas(self, bg="#0a0a0a", highlightthickness=0, cursor="crosshair")
+        self.canvas.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        self.canvas.bind("<Configure>", lambda e: self.schedule_render())
+        self.canvas.bind("<Button-1>", lambda e: self.zoom(e.x, e.y, 0.5))
+        self.canvas.bind("<Button-3>", lambda e: self.zoom(e.x, e.y, 2.0))
+        
+        self.run_in_background(load_bit_plane_source, (image_path,), self.on_source_loaded,
+                               lambda error: self.on_source_loaded((False, f"❌ Could not open image: {str(error)}")))
+        
+    def on_source_loaded(self, result):
+        success, value = result
+        if not self.winfo_exists():
+            return
+        if not success:
+            self.info_label.configure(text=value)
+            return
+        self.source = value
+        self.channel_menu.configure(values=self.source.channels)
+        if self.channel.get() not in self.source.channels:
+            self.channel.set(self.source.channels[0])
+        self.reset_zoom()
+        
+    def choose_reference(self):
+        """Pick the cover image to diff the stego image against"""
+        filename = filedialog.askopenfilename(
+            parent=self,
+            title="Select Reference Image",
+            filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp"), ("All files", "*.*")]
+        )
+        if filename:
+            self.info_label.configure(text="⏳ Loading reference...")
+            self.run_in_background(load_bit_plane_source, (filename,), self.on_reference_loaded,
+                                   lambda error: self.on_reference_loaded((False, f"❌ Could not open image: {str(error)}")))
+            
+    def on_reference_loaded(self, result):
+        success, value = result
+        if not success:
+            if self.winfo_exists():
+                self.schedule_render()  # puts the view summary back
+            self.show_popup("Failed", value, success=False)
+            return
+        self.reference = value
+        self.mode.set("Diff")
+        self.schedule_render()
+        
+    def reset_zoom(self):
+        if self.source is not None:
+            self.box = (0, 0) + self.source.size
+            self.schedule_render()
+            
+    def zoom(self, x, y, factor):
+        """Zoom around a canvas point; factor < 1 zooms in"""
+        if self.source is None or self.box is None:
+            return
+        x0, y0, x1, y1 = self.box
+        width, height = self.source.size
+        offset_x, offset_y, view_w, view_h = self.view_geometry()
+        cx = x0 + (min(max(x - offset_x, 0), view_w) / view_w) * (x1 - x0)
+        cy = y0 + (min(max(y - offset_y, 0), view_h) / view_h) * (y1 - y0)
+        new_w = min(width, max(8, (x1 - x0) * factor))
+        new_h = min(height, max(8, (y1 - y0) * factor))
+        nx0 = int(min(max(cx - new_w / 2, 0), width - new_w))
+        ny0 = int(min(max(cy - new_h / 2, 0), height - new_h))
+        self.box = (nx0, ny0, nx0 + int(new_w), ny0 + int(new_h))
+        self.schedule_render()
+        
+    def view_geometry(self):
+        """(x, y, width, height) of the rendered view inside the canvas, keeping the box aspect ratio"""
+        canvas_w = max(1, self.canvas.winfo_width())
+        canvas_h = max(1, self.canvas.winfo_height())
+        x0, y0, x1, y1 = self.box
+        scale = min(canvas_w / (x1 - x0), canvas_h / (y1 - y0))
+        view_w = max(1, int((x1 - x0) * scale))
+        view_h = max(1, int((y1 - y0) * scale))
+        return (canvas_w - view_w) // 2, (canvas_h - view_h) // 2, view_w, view_h
+        
+    def schedule_render(self):
+        """Coalesce control changes and resizes into one background render"""
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+        self.render_job = self.after(RESIZE_DEBOUNCE_MS, self.render)
+        
+    def render(self):
+        self.render_job = None
+        if self.source is None or self.box is None:
+            return
+        self.render_generation += 1
+        generation = self.render_generation
+        _, _, view_w, view_h = self.view_geometry()
+        self.info_label.configure(text="⏳ Rendering...")
+        self.run_in_background(
+            build_bit_plane_view,
+            (self.source, self.reference, self.mode.get(), self.channel.get(), int(self.bit.get()), self.box, (view_w, view_h)),
+            lambda result: self.show_view(generation, result),
+            lambda error: self.show_view(generation, (False, f"❌ Could not render bit plane: {str(error)}", {}))
+        )
+        
+    def show_view(self, generation, result):
+        """Draw a finished render unless the view changed meanwhile"""
+        if generation != self.render_generation or not self.winfo_exists():
+            return
+        success, value, stats = result
+        if not success:
+            self.info_label.configure(text=value)
+            return
+        from PIL import ImageTk
+        offset_x, offset_y, _, _ = self.view_geometry()
+        self.photo = ImageTk.PhotoImage(value)
+        self.canvas.delete("all")
+        self.canvas.create_image(offset_x, offset_y, image=self.photo, anchor="nw")
+        
+        x0, y0, x1, y1 = self.box
+        detail = "preview" if stats["preview"] else "full resolution"
+        if "changed" in stats:
+            summary = f"{stats['changed'] * 100:.1f}% pixels changed"
+        else:
+            summary = f"{stats['ones'] * 100:.1f}% ones"
+        self.info_label.configure(text=f"{x1 - x0}×{y1 - y0} at ({x0}, {y0}) · {detail} · {summary}")
+
+# -------------------------
+# Batch Queue
+# -------------------------
+
+def expand_batch_paths(paths):
+    from stego_batch import expand_paths
+    return list(expand_paths(paths))
+
+def export_batch_results(records, output_path):
+    from stego_batch import export_results
+    return export_results(records, output_path)
+
+class BatchQueueWindow(ctk.CTkToplevel):
+    """Queue of files processed concurrently on a process pool, one row per file"""
+    
+    def __init__(self, master, run_in_background, show_popup):
+        super().__init__(master)
+        self.title("📚 Batch Queue")
+        self.geometry("1100x700")
+        self.minsize(800, 450)
+        self.run_in_background = run_in_background
+        self.show_popup = show_popup
+        self.operation = tk.StringVar(value="Extract")
+        self.workers = tk.StringVar(value=str(max(1, (os.cpu_count() or 2) // 2)))
+        self.output_dir = None
+        self.records = {}      # row id -> result record (or None while queued)
+        self.paths = {}        # row id -> file path
+        self.queued = []       # row ids waiting for a worker slot
+        self.in_flight = {}    # future -> row id
+        self.outputs = {}      # row id -> output path of an embed job
+        self.taken_outputs = set()  # output paths handed out so far (normcased)
+        self.pool = None
+        self.poll_job = None
+        
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        toolbar = ctk.CTkFrame(self, fg_color="#1a1a1a", corner_radius=15)
+        toolbar.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 5))
+        toolbar.grid_columnconfigure(5, weight=1)
+        
+        button_style = {"corner_radius": 15, "fg_color": "#6C7B7F", "hover_color": "#5A6B7F", "width": 100}
+        ctk.CTkButton(toolbar, text="➕ FILES", command=self.add_files, **button_style).grid(row=0, column=0, padx=(10, 5), pady=10)
+        ctk.CTkButton(toolbar, text="📁 FOLDER", command=self.add_folder, **button_style).grid(row=0, column=1, padx=5, pady=10)
+        
+        ctk.CTkSegmentedButton(
+            toolbar, values=["Extract", "Analyze", "Embed"], variable=self.operation
+        ).grid(row=0, column=2, padx=10, pady=10)
+        
+        ctk.CTkLabel(toolbar, text="Workers:", font=ctk.CTkFont(size=12)).grid(row=0, column=3, padx=(10, 2))
+        ctk.CTkOptionMenu(
+            toolbar, values=[str(n) for n in range(1, (os.cpu_count() or 2) + 1)],
+            variable=self.workers, width=70
+        ).grid(row=0, column=4, padx=5, pady=10)
+        
+        self.start_btn = ctk.CTkButton(
+            toolbar, text="▶️ START", corner_radius=15, width=100,
+            fg_color="#FF6B6B", hover_color="#FF5252", command=self.start
+        )
+        self.start_btn.grid(row=0, column=6, padx=5, pady=10)
+        self.stop_btn = ctk.CTkButton(toolbar, text="⏹️ STOP", state="disabled", command=self.stop, **button_style)
+        self.stop_btn.grid(row=0, column=7, padx=5, pady=10)
+        ctk.CTkButton(toolbar, text="🧹 CLEAR", command=self.clear, **button_style).grid(row=0, column=8, padx=5, pady=10)
+        ctk.CTkButton(toolbar, text="💾 EXPORT", command=self.export, **button_style).grid(row=0, column=9, padx=(5, 10), pady=10)
+        
+        # Embed options
+        embed_frame = ctk.CTkFrame(self, fg_color="#1a1a1a", corner_radius=15)
+        embed_frame.grid(row=1, column=0, sticky="ew", padx=10, pady=5)
+        embed_frame.grid_columnconfigure(0, weight=1)
+        self.message_entry = ctk.CTkEntry(embed_frame, placeholder_text="Message to embed (Embed batches only)")
+        self.message_entry.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+        ctk.CTkButton(embed_frame, text="📂 OUTPUT FOLDER", command=self.choose_output_dir, **button_style).grid(row=0, column=1, padx=5, pady=10)
+        self.output_label = ctk.CTkLabel(embed_frame, text="No output folder", font=ctk.CTkFont(size=12), text_color="#CCCCCC")
+        self.output_label.grid(row=0, column=2, padx=(5, 10))
+        
+        # Queue rows
+        table_frame = ctk.CTkFrame(self, fg_color="#0a0a0a", corner_radius=15)
+        table_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=5)
+        table_frame.grid_columnconfigure(0, weight=1)
+        table_frame.grid_rowconfigure(0, weight=1)
+        
+        style = ttk.Style(self)
+        style.theme_use("default")
+        style.configure("Batch.Treeview", background="#0a0a0a", fieldbackground="#0a0a0a",
+                        foreground="#E6E6E6", rowheight=24, borderwidth=0)
+        style.configure("Batch.Treeview.Heading", background="#1a1a1a", foreground="#BB86FC", relief="flat")
+        self.table = ttk.Treeview(table_frame, columns=("type", "status", "result"), style="Batch.Treeview")
+        self.table.heading("#0", text="File")
+        self.table.heading("type", text="Type")
+        self.table.heading("status", text="Status")
+        self.table.heading("result", text="Result")
+        self.table.column("#0", width=320)
+        self.table.column("type", width=80, stretch=False)
+        self.table.column("status", width=90, stretch=False)
+        self.table.column("result", width=500)
+        for status, colour in (("running", "#FFD54F"), ("done", "#00FF7F"), ("failed", "#FF8A80"), ("error", "#FF5252")):
+            self.table.tag_configure(status, foreground=colour)
+        self.table.grid(row=0, column=0, sticky="nsew", padx=(10, 0), pady=10)
+        scrollbar = ctk.CTkScrollbar(table_frame, command=self.table.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns", padx=(0, 10), pady=10)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        
+        # Summary
+        self.progress_bar = ctk.CTkProgressBar(self, height=10, corner_radius=5)
+        self.progress_bar.set(0)
+        self.progress_bar.grid(row=3, column=0, sticky="ew", padx=20, pady=(5, 2))
+        self.summary_label = ctk.CTkLabel(self, text="Queue is empty", font=ctk.CTkFont(size=12), text_color="#CCCCCC")
+        self.summary_label.grid(row=4, column=0, sticky="w", padx=20, pady=(0, 10))
+        
+    def add_files(self):
+        filenames = filedialog.askopenfilenames(parent=self, title="Add Files to Batch")
+        if filenames:
+            self.add_paths(filenames)
+            
+    def add_folder(self):
+        folder = filedialog.askdirectory(parent=self, title="Add Folder to Batch")
+        if folder:
+            self.add_paths([folder])
+            
+    def add_paths(self, paths):
+        """Expand folders off the UI thread, then append one queued row per supported file"""
+        self.summary_label.configure(text="⏳ Collecting files...")
+        self.run_in_background(expand_batch_paths, (paths,), self.on_paths_expanded, self.on_paths_failed)
+        
+    def on_paths_expanded(self, file_paths):
+        if not self.winfo_exists():
+            return
+        known = set(self.paths.values())
+        for file_path in file_paths:
+            if file_path in known:
+                continue
+            row = self.table.insert("", "end", text=file_path, values=("", "queued", ""))
+            self.paths[row] = file_path
+            self.records[row] = None
+        self.update_summary()
+        
+    def on_paths_failed(self, error):
+        if self.winfo_exists():
+            self.update_summary()
+            self.show_popup("Failed", f"❌ Could not collect files: {str(error)}", success=False)
+            
+    def choose_output_dir(self):
+        folder = filedialog.askdirectory(parent=self, title="Output Folder for Embedded Files")
+        if folder:
+            self.output_dir = folder
+            self.output_label.configure(text=folder)
+            
+    def start(self):
+        """Run every queued row with the selected operation on a fresh process pool"""
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        
+        operation = self.operation.get().lower()
+        message = self.message_entry.get()
+        if operation == "embed" and (not message or not self.output_dir):
+            self.show_popup("Error", "Embed batches need a message and an output folder!", success=False)
+            return
+        self.queued = [row for row, record in self.records.items() if record is None]
+        if not self.queued:
+            self.show_popup("Error", "Add files to the queue first!", success=False)
+            return
+            
+        self.job_args = (operation, message or None)
+        if operation == "embed":
+            # Named up front, so two img.png files from different folders never share an output
+            from stego_batch import batch_output_paths
+            rows = [row for row in self.queued if row not in self.outputs]
+            self.outputs.update(zip(rows, batch_output_paths([self.paths[row] for row in rows],
+                                                             self.output_dir, self.taken_outputs)))
+        self.max_in_flight = int(self.workers.get())
+        # Spawned workers never inherit the Tk process's threads or locks
+        self.pool = ProcessPoolExecutor(max_workers=self.max_in_flight, mp_context=multiprocessing.get_context("spawn"))
+        self.start_btn.configure(state="disabled")
+        self.stop_btn.configure(state="normal")
+        self.fill_slots()
+        self.poll_job = self.after(JOB_POLL_MS, self.poll)
+        
+    def fill_slots(self):
+        """Keep exactly one job per worker in flight so row states stay accurate"""
+        from stego_batch import run_batch_item
+        operation, message = self.job_args
+        while self.queued and len(self.in_flight) < self.max_in_flight:
+            row = self.queued.pop(0)
+            future = self.pool.submit(run_batch_item, operation, self.paths[row], message, self.outputs.get(row))
+            self.in_flight[future] = row
+            self.table.item(row, values=("", "running", ""), tags=("running",))
+            
+    def poll(self):
+        self.poll_job = None
+        for future in [f for f in self.in_flight if f.done()]:
+            row = self.in_flight.pop(future)
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {"path": self.paths[row], "type": None, "status": "error", "result": str(e)}
+            self.records[row] = record
+            result = str(record.get("result", "")).replace("\n", " ")
+            self.table.item(row, values=(record.get("type") or "", record["status"], result[:200]), tags=(record["status"],))
+        self.fill_slots()
+        self.update_summary()
+        
+        if self.in_flight:
+            self.poll_job = self.after(JOB_POLL_MS, self.poll)
+        else:
+            self.finish()
+            
+    def finish(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        self.start_btn.configure(state="normal")
+        self.stop_btn.configure(state="disabled")
+        
+    def stop(self):
+        """Stop handing out queued rows; jobs already running are allowed to finish"""
+        for row in self.queued:
+            self.table.item(row, values=("", "queued", ""), tags=())
+        self.queued = []
+        self.stop_btn.configure(state="disabled")
+        
+    def clear(self):
+        """Remove finished and queued rows (running rows stay until they complete)"""
+        running = set(self.in_flight.values())
+        for row in list(self.paths):
+            if row not in running:
+                self.table.delete(row)
+                del self.paths[row]
+                del self.records[row]
+                self.outputs.pop(row, None)
+        self.queued = []
+        self.update_summary()
+        
+    def update_summary(self):
+        counts = {"queued": 0, "running": len(self.in_flight), "done": 0, "failed": 0, "error": 0}
+        for row, record in self.records.items():
+            if record is not None:
+                counts[record["status"]] += 1
+            elif row not in self.in_flight.values():
+                counts["queued"] += 1
+        total = len(self.records)
+        finished = counts["done"] + counts["failed"] + counts["error"]
+        self.progress_bar.set(finished / total if total else 0)
+        self.summary_label.configure(text=" · ".join(f"{count} {status}" for status, count in counts.items()) + f" · {total} total")
+        
+    def export(self):
+        records = [record for record in self.records.values() if record is not None]
+        if not records:
+            self.show_popup("Error", "There are no finished results to export yet!", success=False)
+            return
+        output_path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Export Batch Results",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json")]
+        )
+        if output_path:
+            self.run_in_background(
+                export_batch_results, (records, output_path),
+                lambda result: self.show_popup("Exported" if result[0] else "Failed", result[1], success=result[0]),
+                lambda error: self.show_popup("Failed", f"❌ Could not export results: {str(error)}", success=False)
+            )
+            
+    def on_close(self):
+        if self.poll_job is not None:
+            self.after_cancel(self.poll_job)
+        self.queued = []
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
 class ModernSteganographyApp:
     def __init__(self):
         self.root = ctk.CTk()
@@ -24,8 +845,20 @@ class ModernSteganographyApp:
         self.root.configure(fg_color="#0D1117")
         self.file_path = tk.StringVar()
         self.operation = tk.StringVar(value="embed")
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stego-job")
+        self.current_job = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.animation_job = None
+        self.relayout_job = None
+        self.last_activity = time.monotonic()
+        self.animation_frames = 0
+        self.metadata_generation = 0
+        self.preview_image = None
+        self.startup_seconds = None
+        self.warmup_seconds = None
         self.create_main_interface()
-        self.animate_floating_elements()
+        self.bind_activity_tracking()
+        self.resume_animation()
         
     def create_main_interface(self):
         """Create the main responsive interface"""
@@ -148,42 +981,69 @@ class ModernSteganographyApp:
         self.setup_animation()
         
     def setup_animation(self):
-        """Setup animated elements"""
-        self.animation_items = []
+        """Create the animated canvas items once; resizes only move them"""
         self.animation_angle = 0
+        self.animation_layout = None
         
         # Create animated circles
         colors = ['#00FFFF', '#1E90FF', '#8A2BE2', '#FF1493', '#00FF7F']
+        self.animation_items = [
+            self.canvas.create_oval(0, 0, 0, 0, outline=color, width=2, fill='', tags="circle", state="hidden")
+            for color in colors
+        ]
         
-        def update_canvas_size(event=None):
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
-            center_x, center_y = canvas_width // 2, canvas_height // 2
-            
-            # Clear existing items
-            self.canvas.delete("all")
-            self.animation_items.clear()
-            
-            # Create new circles based on canvas size
-            if canvas_width > 50 and canvas_height > 50:
-                for i, color in enumerate(colors):
-                    radius = min(canvas_width, canvas_height) // 8 + i * 10
-                    if radius < min(canvas_width, canvas_height) // 2 - 20:
-                        circle = self.canvas.create_oval(
-                            center_x - radius, center_y - radius,
-                            center_x + radius, center_y + radius,
-                            outline=color, width=2, fill='', tags="circle"
-                        )
-                        self.animation_items.append(circle)
-                
-                # Central glow
-                self.center_circle = self.canvas.create_oval(
-                    center_x - 15, center_y - 15,
-                    center_x + 15, center_y + 15,
-                    fill='#FFD700', outline='#FFA500', width=2
-                )
+        # Central glow
+        self.center_circle = self.canvas.create_oval(
+            0, 0, 0, 0, fill='#FFD700', outline='#FFA500', width=2, state="hidden"
+        )
+        
+        self.canvas.bind('<Configure>', lambda event: self.schedule_relayout())
         
-        self.canvas.bind('<Configure>', update_canvas_size)
+    def schedule_relayout(self):
+        """Coalesce bursts of <Configure> events into a single relayout"""
+        if self.relayout_job is not None:
+            self.root.after_cancel(self.relayout_job)
+        self.relayout_job = self.root.after(RESIZE_DEBOUNCE_MS, self.layout_animation)
+        
+    def layout_animation(self):
+        """Position the animated items for the current canvas size"""
+        self.relayout_job = None
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        if self.animation_layout == (canvas_width, canvas_height):
+            return
+        self.animation_layout = (canvas_width, canvas_height)
+        
+        visible = canvas_width > 50 and canvas_height > 50
+        self.animation_radii = []
+        for i, item in enumerate(self.animation_items):
+            radius = min(canvas_width, canvas_height) // 8 + i * 10
+            fits = visible and radius < min(canvas_width, canvas_height) // 2 - 20
+            self.animation_radii.append(radius)
+            self.canvas.itemconfigure(item, state="normal" if fits else "hidden")
+        self.canvas.itemconfigure(self.center_circle, state="normal" if visible else "hidden")
+        self.draw_animation_frame()
+        
+    def draw_animation_frame(self):
+        """Move the existing items to their positions for the current angle"""
+        if not self.animation_layout:
+            return
+        canvas_width, canvas_height = self.animation_layout
+        center_x, center_y = canvas_width // 2, canvas_height // 2
+        
+        for i, (item, radius) in enumerate(zip(self.animation_items, self.animation_radii)):
+            # Small floating movement around the centre
+            offset_angle = math.radians(self.animation_angle + (i * 72))
+            x = center_x + math.sin(offset_angle) * 1.5
+            y = center_y + math.cos(offset_angle) * 1.5
+            self.canvas.coords(item, x - radius, y - radius, x + radius, y + radius)
+            
+        # Pulse the center circle
+        pulse = 15 + math.sin(math.radians(self.animation_angle * 2)) * 2
+        self.canvas.coords(
+            self.center_circle,
+            center_x - pulse, center_y - pulse, center_x + pulse, center_y + pulse
+        )
         
     def create_file_section(self):
         """Create responsive file selection section"""
@@ -287,9 +1147,11 @@ class ModernSteganographyApp:
         button_frame.grid(row=4, column=0, sticky="ew", padx=15, pady=(0, 15))
         button_frame.grid_columnconfigure(0, weight=3)  # Execute button gets more space
         button_frame.grid_columnconfigure(1, weight=1)  # Clear button
+        button_frame.grid_columnconfigure(2, weight=1)  # Cancel button
+        button_frame.grid_columnconfigure(3, weight=1)  # Batch button
         
         # Execute button
-        execute_btn = ctk.CTkButton(
+        self.execute_btn = ctk.CTkButton(
             button_frame,
             text="🚀 EXECUTE",
             height=45,
@@ -299,7 +1161,7 @@ class ModernSteganographyApp:
             font=ctk.CTkFont(size=16, weight="bold"),
             command=self.execute_operation
         )
-        execute_btn.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.execute_btn.grid(row=0, column=0, sticky="ew", padx=(0, 10))
         
         # Clear button
         clear_btn = ctk.CTkButton(
@@ -311,7 +1173,56 @@ class ModernSteganographyApp:
             hover_color="#5A6B7F",
             command=self.clear_fields
         )
-        clear_btn.grid(row=0, column=1, sticky="ew")
+        clear_btn.grid(row=0, column=1, sticky="ew", padx=(0, 10))
+        
+        # Cancel button (enabled while a job runs)
+        self.cancel_btn = ctk.CTkButton(
+            button_frame,
+            text="⏹️ CANCEL",
+            height=45,
+            corner_radius=22,
+            fg_color="#6C7B7F",
+            hover_color="#5A6B7F",
+            state="disabled",
+            command=self.cancel_operation
+        )
+        self.cancel_btn.grid(row=0, column=2, sticky="ew", padx=(0, 10))
+        
+        # Batch queue window
+        batch_btn = ctk.CTkButton(
+            button_frame,
+            text="📚 BATCH",
+            height=45,
+            corner_radius=22,
+            fg_color="#8A2BE2",
+            hover_color="#7B1FA2",
+            command=self.open_batch_queue
+        )
+        batch_btn.grid(row=0, column=3, sticky="ew")
+        
+        # Job progress
+        self.progress_bar = ctk.CTkProgressBar(button_frame, height=10, corner_radius=5)
+        self.progress_bar.set(0)
+        self.progress_bar.grid(row=1, column=0, columnspan=4, sticky="ew", pady=(12, 4))
+        
+        self.status_label = ctk.CTkLabel(
+            button_frame,
+            text="Ready",
+            font=ctk.CTkFont(size=12),
+            text_color="#CCCCCC"
+        )
+        self.status_label.grid(row=2, column=0, columnspan=3, sticky="w")
+        
+        # Profile the next embed/extract (captures go to stego_profile.profile_dir())
+        self.profile_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            button_frame,
+            text="⏱️ Profile",
+            variable=self.profile_var,
+            font=ctk.CTkFont(size=12),
+            checkbox_width=18,
+            checkbox_height=18
+        ).grid(row=2, column=3, sticky="e")
         
     def create_right_panel(self):
         """Create responsive metadata panel"""
@@ -326,7 +1237,7 @@ class ModernSteganographyApp:
         
         # Configure internal grid
         self.right_panel.grid_columnconfigure(0, weight=1)
-        self.right_panel.grid_rowconfigure(1, weight=1)  # Metadata content expands
+        self.right_panel.grid_rowconfigure(2, weight=1)  # Metadata content expands
         
         # Header
         header_frame = ctk.CTkFrame(
@@ -347,13 +1258,44 @@ class ModernSteganographyApp:
             text_color="#BB86FC"
         ).grid(row=0, column=0)
         
+        ctk.CTkButton(
+            header_frame,
+            text="🔬 BIT PLANES",
+            width=120,
+            corner_radius=15,
+            fg_color="#8A2BE2",
+            hover_color="#7B1FA2",
+            command=self.open_bit_planes
+        ).grid(row=0, column=1, padx=(0, 15))
+        
+        # Thumbnail preview
+        preview_frame = ctk.CTkFrame(
+            self.right_panel,
+            corner_radius=15,
+            height=PREVIEW_SIZE[1] + 20,
+            fg_color="#0a0a0a"
+        )
+        preview_frame.grid(row=1, column=0, sticky="ew", padx=15, pady=(0, 15))
+        preview_frame.grid_propagate(False)
+        preview_frame.grid_columnconfigure(0, weight=1)
+        preview_frame.grid_rowconfigure(0, weight=1)
+        
+        self.preview_label = tk.Label(
+            preview_frame,
+            text="🖼️ No preview",
+            bg="#0a0a0a",
+            fg="#888888",
+            borderwidth=0
+        )
+        self.preview_label.grid(row=0, column=0)
+        
         # Metadata content (scrollable)
         metadata_frame = ctk.CTkFrame(
             self.right_panel,
             corner_radius=15,
             fg_color="#0a0a0a"
         )
-        metadata_frame.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 15))
+        metadata_frame.grid(row=2, column=0, sticky="nsew", padx=15, pady=(0, 15))
         metadata_frame.grid_columnconfigure(0, weight=1)
         metadata_frame.grid_rowconfigure(0, weight=1)
         
@@ -377,7 +1319,7 @@ class ModernSteganographyApp:
             height=120,
             fg_color="#1a1a1a"
         )
-        stats_frame.grid(row=2, column=0, sticky="ew", padx=15, pady=(0, 15))
+        stats_frame.grid(row=3, column=0, sticky="ew", padx=15, pady=(0, 15))
         stats_frame.grid_propagate(False)
         stats_frame.grid_columnconfigure((0, 1), weight=1)
         
@@ -414,36 +1356,98 @@ class ModernSteganographyApp:
         )
         self.dimensions_label.grid(row=2, column=0, columnspan=2, sticky="w", padx=10, pady=(0, 10))
         
+    def bind_activity_tracking(self):
+        """Track user activity and window visibility to throttle or pause the animation"""
+        for sequence in ('<Motion>', '<KeyPress>', '<ButtonPress>', '<MouseWheel>'):
+            self.root.bind_all(sequence, self.on_user_activity, add="+")
+        self.root.bind('<Map>', self.on_root_map, add="+")
+        self.root.bind('<Unmap>', self.on_root_map, add="+")
+        
+    def on_root_map(self, event):
+        # Toplevel bindings also fire for every child widget
+        if event.widget is self.root:
+            if str(event.type) == "Map":
+                self.resume_animation()
+                if self.startup_seconds is None:
+                    self.root.after_idle(self.on_first_frame)
+            else:
+                self.pause_animation()
+                
+    def on_first_frame(self):
+        """Record cold-start time and warm up the heavy imports off the UI thread"""
+        if self.startup_seconds is not None:
+            return
+        self.startup_seconds = time.perf_counter() - _IMPORT_START
+        self.run_in_background(warm_up_imports, (), lambda seconds: setattr(self, "warmup_seconds", seconds),
+                               lambda error: None)  # the first real job reports import errors
+            
+    def on_user_activity(self, event=None):
+        was_idle = time.monotonic() - self.last_activity > ANIMATION_IDLE_AFTER_S
+        self.last_activity = time.monotonic()
+        if was_idle:
+            self.resume_animation()
+            
+    def animation_allowed(self):
+        """Animate only while the window is visible and no job is running"""
+        try:
+            return (
+                self.current_job is None
+                and self.root.state() != "iconic"
+                and bool(self.canvas.winfo_viewable())
+            )
+        except tk.TclError:
+            return False
+            
+    def pause_animation(self):
+        if self.animation_job is not None:
+            self.root.after_cancel(self.animation_job)
+            self.animation_job = None
+            
+    def resume_animation(self):
+        """(Re)start the frame loop at the interval matching the current activity"""
+        self.pause_animation()
+        self.animation_job = self.root.after(ANIMATION_FRAME_MS, self.animate_floating_elements)
+        
     def animate_floating_elements(self):
-        """Animate the floating elements responsively"""
+        """Advance the animation one frame and schedule the next one"""
+        self.animation_job = None
+        if not self.animation_allowed():
+            return  # resumed by <Map>, user activity or the end of a job
+            
         try:
-            if hasattr(self, 'canvas') and self.canvas.winfo_exists():
-                self.animation_angle += 2
-                canvas_width = self.canvas.winfo_width()
-                canvas_height = self.canvas.winfo_height()
-                
-                if canvas_width > 1 and canvas_height > 1:
-                    center_x, center_y = canvas_width // 2, canvas_height // 2
-                    
-                    for i, item in enumerate(self.animation_items):
-                        if self.canvas.coords(item):
-                            # Create floating effect
-                            offset_angle = self.animation_angle + (i * 72)
-                            offset_x = math.sin(math.radians(offset_angle)) * 1.5
-                            offset_y = math.cos(math.radians(offset_angle)) * 1.5
-                            
-                            # Small floating movement
-                            self.canvas.move(item, offset_x * 0.1, offset_y * 0.1)
-                    
-                    # Pulse the center circle
-                    if hasattr(self, 'center_circle') and self.canvas.coords(self.center_circle):
-                        pulse = 2 + math.sin(math.radians(self.animation_angle * 2)) * 0.5
-                        
-        except Exception:
-            pass  # Continue animation even if elements are destroyed
+            self.animation_angle = (self.animation_angle + 2) % 360
+            self.draw_animation_frame()
+            self.animation_frames += 1
+        except tk.TclError:
+            return  # Canvas destroyed
+            
+        idle = time.monotonic() - self.last_activity > ANIMATION_IDLE_AFTER_S
+        delay = ANIMATION_IDLE_FRAME_MS if idle else ANIMATION_FRAME_MS
+        self.animation_job = self.root.after(delay, self.animate_floating_elements)
+        
+    def measure_idle_cpu(self, seconds):
+        """Report frames drawn and process CPU use over an idle interval, then quit"""
+        start_cpu, start_wall, start_frames = time.process_time(), time.monotonic(), self.animation_frames
+        
+        def finish():
+            cpu = time.process_time() - start_cpu
+            wall = time.monotonic() - start_wall
+            print(f"idle_cpu_percent={100 * cpu / wall:.2f} frames={self.animation_frames - start_frames} "
+                  f"seconds={wall:.1f}")
+            self.on_close()
             
-        # Schedule next frame
-        self.root.after(50, self.animate_floating_elements)
+        self.root.after(int(seconds * 1000), finish)
+        
+    def measure_startup(self):
+        """Print time to first frame and background warm-up time, then quit"""
+        def check():
+            if self.startup_seconds is None or self.warmup_seconds is None:
+                self.root.after(JOB_POLL_MS, check)
+                return
+            print(f"startup_ms={self.startup_seconds * 1000:.0f} warmup_ms={self.warmup_seconds * 1000:.0f}")
+            self.on_close()
+            
+        self.root.after(JOB_POLL_MS, check)
         
     def toggle_operation(self):
         """Toggle between embed and extract modes"""
@@ -481,105 +1485,79 @@ class ModernSteganographyApp:
             self.extract_metadata(filename)
             
     def extract_metadata(self, file_path):
-        """Extract and display file metadata with statistics"""
+        """Populate the metadata panel without blocking the UI"""
+        self.metadata_generation += 1
+        generation = self.metadata_generation
         self.metadata_text.delete("1.0", "end")
+        self.metadata_text.insert("1.0", "⏳ Reading metadata...")
+        self.update_stats("--", "--", "--")
+        self.preview_label.configure(image="", text="⏳ Loading preview...")
+        self.run_in_background(
+            build_preview, (file_path,),
+            lambda image: self.show_preview(generation, image),
+            lambda error: self.show_preview(generation, None)
+        )
+        self.run_in_background(
+            build_metadata_report, (file_path,),
+            lambda result: self.show_metadata(generation, result),
+            lambda error: self.show_metadata(generation, (f"❌ Error extracting metadata: {error}", ("Error", "Error", "Error")))
+        )
         
-        if not os.path.exists(file_path):
-            self.metadata_text.insert("end", "❌ File not found.\n")
-            self.update_stats("--", "--", "--")
+    def show_preview(self, generation, image):
+        """Display a thumbnail unless a newer file was selected meanwhile"""
+        if generation != self.metadata_generation:
             return
-            
-        try:
-            # Basic file info
-            file_size_bytes = os.path.getsize(file_path)
-            file_size_kb = file_size_bytes / 1024
-            file_size_mb = file_size_kb / 1024
-            
-            # Format file size
-            if file_size_mb >= 1:
-                size_str = f"{file_size_mb:.2f} MB"
+        if image is None:
+            self.preview_image = None
+            self.preview_label.configure(image="", text="🖼️ No preview")
+            return
+        from PIL import ImageTk
+        self.preview_image = ImageTk.PhotoImage(image)
+        self.preview_label.configure(image=self.preview_image, text="")
+        
+    def show_metadata(self, generation, result):
+        """Display a metadata report unless a newer file was selected meanwhile"""
+        if generation != self.metadata_generation:
+            return
+        metadata, stats = result
+        self.metadata_text.delete("1.0", "end")
+        self.metadata_text.insert("1.0", metadata)
+        self.update_stats(*stats)
+        
+    def open_bit_planes(self):
+        """Open the bit-plane viewer for the selected image"""
+        file_path = self.file_path.get()
+        if not file_path or os.path.splitext(file_path)[1].lower() not in (".png", ".bmp", ".jpg", ".jpeg"):
+            self.show_modern_popup("Error", "Please select a PNG, BMP or JPEG image first!", success=False)
+            return
+        BitPlaneViewer(self.root, file_path, self.run_in_background, self.show_modern_popup)
+        
+    def open_batch_queue(self):
+        BatchQueueWindow(self.root, self.run_in_background, self.show_modern_popup)
+        
+    def run_in_background(self, func, args, on_done, on_error=None):
+        """Run func(*args) on the executor and pass its result to on_done on the Tk thread.
+
+        If func raises, the exception goes to on_error instead, or to an
+        error popup when no on_error is given.
+        """
+        future = self.executor.submit(func, *args)
+        
+        def check():
+            if not future.done():
+                self.root.after(JOB_POLL_MS, check)
+            elif future.cancelled():
+                return
+            elif future.exception() is not None:
+                if on_error is not None:
+                    on_error(future.exception())
+                else:
+                    self.show_modern_popup("Error", f"An unexpected error occurred:\n{str(future.exception())}", success=False)
             else:
-                size_str = f"{file_size_kb:.2f} KB"
+                on_done(future.result())
                 
-            mime_type, _ = mimetypes.guess_type(file_path)
-            file_name = os.path.basename(file_path)
-            
-            metadata = f"""📁 FILE INFORMATION
-{'='*40}
-Name: {file_name}
-Path: {file_path}
-Size: {size_str} ({file_size_bytes:,} bytes)
-Type: {mime_type or 'Unknown'}
-Modified: {datetime.datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M:%S')}
-
-"""
-            
-            dimensions_str = "--"
-            
-            # Image metadata
-            if mime_type and mime_type.startswith("image"):
-                try:
-                    img = Image.open(file_path)
-                    dimensions_str = f"{img.width} × {img.height}"
-                    
-                    metadata += f"""🖼️ IMAGE DETAILS
-{'='*40}
-Format: {img.format}
-Dimensions: {dimensions_str}
-Mode: {img.mode}
-Has Alpha: {'Yes' if 'A' in img.mode else 'No'}
-Aspect Ratio: {img.width/img.height:.2f}:1
-
-"""
-                    
-                    # EXIF data
-                    exif_data = img.getexif()
-                    if exif_data:
-                        metadata += "📷 EXIF DATA\n" + "="*40 + "\n"
-                        for tag, value in list(exif_data.items())[:10]:  # Limit to first 10
-                            tag_name = ExifTags.TAGS.get(tag, f"Tag_{tag}")
-                            metadata += f"{tag_name}: {value}\n"
-                        if len(exif_data) > 10:
-                            metadata += f"... and {len(exif_data) - 10} more EXIF entries\n"
-                    else:
-                        metadata += "📷 No EXIF data found.\n"
-                        
-                except Exception as e:
-                    metadata += f"❌ Error reading image: {e}\n"
-                    
-            # Video metadata
-            elif mime_type and mime_type.startswith("video"):
-                try:
-                    cap = cv2.VideoCapture(file_path)
-                    if cap.isOpened():
-                        fps = cap.get(cv2.CAP_PROP_FPS)
-                        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                        duration = frame_count / fps if fps > 0 else 0
-                        dimensions_str = f"{width} × {height}"
-                        
-                        metadata += f"""🎥 VIDEO DETAILS
-{'='*40}
-Resolution: {dimensions_str}
-Frame Rate: {fps:.2f} FPS
-Total Frames: {frame_count:,}
-Duration: {str(datetime.timedelta(seconds=int(duration)))}
-Bitrate: {(file_size_bytes * 8) / (duration * 1000) if duration > 0 else 0:.0f} kbps
-"""
-                    cap.release()
-                except Exception as e:
-                    metadata += f"❌ Error reading video: {e}\n"
-                    
-            # Update quick stats
-            self.update_stats(size_str, mime_type or "Unknown", dimensions_str)
-            
-            self.metadata_text.insert("1.0", metadata)
-            
-        except Exception as e:
-            self.metadata_text.insert("1.0", f"❌ Error extracting metadata: {e}")
-            self.update_stats("Error", "Error", "Error")
-            
+        self.root.after(JOB_POLL_MS, check)
+        
     def update_stats(self, size, file_type, dimensions):
         """Update the quick stats section"""
         self.size_label.configure(text=f"Size: {size}")
@@ -590,7 +1568,10 @@ Bitrate: {(file_size_bytes * 8) / (duration * 1000) if duration > 0 else 0:.0f}
         """Clear all input fields"""
         self.file_path.set("")
         self.message_text.delete("1.0", "end")
+        self.metadata_generation += 1
         self.metadata_text.delete("1.0", "end")
+        self.preview_image = None
+        self.preview_label.configure(image="", text="🖼️ No preview")
         self.update_stats("--", "--", "--")
         
     def show_modern_popup(self, title, message, success=True):
@@ -655,62 +1636,154 @@ Bitrate: {(file_size_bytes * 8) / (duration * 1000) if duration > 0 else 0:.0f}
         ok_btn.grid(row=2, column=0, pady=20)
         
     def execute_operation(self):
-        """Execute the selected operation with proper error handling"""
+        """Validate the inputs and run the selected operation on the background executor"""
+        if self.current_job is not None:
+            return
+            
         file_path = self.file_path.get()
         
         if not file_path:
             self.show_modern_popup("Error", "Please select a file first!", success=False)
             return
             
-        try:
-            if self.operation.get() == "embed":
-                message = self.message_text.get("1.0", "end").strip()
-                if not message:
-                    self.show_modern_popup("Error", "Please enter a message to embed!", success=False)
-                    return
-                    
-                # Save dialog
-                file_ext = os.path.splitext(file_path)[1].lower()
-                initial_filename = os.path.splitext(os.path.basename(file_path))[0] + "_stego" + file_ext
+        if self.operation.get() == "embed":
+            message = self.message_text.get("1.0", "end").strip()
+            if not message:
+                self.show_modern_popup("Error", "Please enter a message to embed!", success=False)
+                return
                 
-                if file_ext in [".png", ".jpg", ".jpeg", ".bmp"]:
-                    filetypes = [("Image files", "*.png *.jpg *.jpeg *.bmp"), ("All files", "*.*")]
-                elif file_ext in [".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv"]:
-                    filetypes = [("Video files", "*.mp4 *.mkv *.mov *.avi *.webm *.flv *.wmv"), ("All files", "*.*")]
-                else:
-                    filetypes = [("All files", "*.*")]
-                    
-                output_path = filedialog.asksaveasfilename(
-                    title="Save Stego File As",
-                    defaultextension=file_ext,
-                    initialfile=initial_filename,
-                    filetypes=filetypes
-                )
+            # Save dialog
+            file_ext = os.path.splitext(file_path)[1].lower()
+            initial_filename = os.path.splitext(os.path.basename(file_path))[0] + "_stego" + file_ext
+            
+            if file_ext in [".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp", ".apng"]:
+                filetypes = [("Image files", "*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff *.webp *.apng"), ("All files", "*.*")]
+            elif file_ext in [".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv"]:
+                filetypes = [("Video files", "*.mp4 *.mkv *.mov *.avi *.webm *.flv *.wmv"), ("All files", "*.*")]
+            else:
+                filetypes = [("All files", "*.*")]
                 
-                if output_path:
-                    success, result = embed_message(file_path, output_path, message)
-                    if success:
-                        media_type = "video" if file_ext in [".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv"] else "image"
-                        self.show_modern_popup("Success!", f"Message successfully hidden in the {media_type}!\n\nSaved to: {os.path.basename(output_path)}")
-                    else:
-                        self.show_modern_popup("Failed", f"Operation failed: {result}", success=False)
-                        
-            elif self.operation.get() == "extract":
-                success, message = extract_message(file_path)
-                if success:
-                    self.message_text.delete("1.0", "end")
-                    self.message_text.insert("1.0", message)
-                    
-                    file_ext = os.path.splitext(file_path)[1].lower()
-                    media_type = "video" if file_ext in [".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv"] else "image"
-                    char_count = len(message)
-                    self.show_modern_popup("Success!", f"Message successfully extracted from the {media_type}!\n\nExtracted {char_count} characters.")
-                else:
-                    self.show_modern_popup("Failed", f"Extraction failed: {message}", success=False)
+            output_path = filedialog.asksaveasfilename(
+                title="Save Stego File As",
+                defaultextension=file_ext,
+                initialfile=initial_filename,
+                filetypes=filetypes
+            )
+            
+            if output_path:
+                self.start_job(
+                    embed_message, (file_path, output_path, message),
+                    lambda result: self.on_embed_finished(result, file_path, output_path)
+                )
                     
+        elif self.operation.get() == "extract":
+            self.start_job(
+                extract_message, (file_path,),
+                lambda result: self.on_extract_finished(result, file_path)
+            )
+            
+    def start_job(self, func, args, on_done):
+        """Submit a backend call with progress/cancel hooks and start polling it"""
+        cancel = threading.Event()
+        updates = queue.Queue()
+        
+        def progress(fraction, stage):
+            updates.put((fraction, stage))
+            
+        profile = "cprofile" if self.profile_var.get() else None
+        future = self.executor.submit(func, *args, progress=progress, cancel=cancel, profile=profile)
+        self.current_job = (future, cancel, updates, on_done, profile)
+        self.set_busy(True)
+        self.root.after(JOB_POLL_MS, self.poll_job)
+        
+    def poll_job(self):
+        """Apply queued progress updates and hand the result back on the Tk thread"""
+        future, cancel, updates, on_done, profile = self.current_job
+        latest = None
+        while True:
+            try:
+                latest = updates.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            fraction, stage = latest
+            self.progress_bar.set(fraction)
+            if not cancel.is_set():
+                self.status_label.configure(text=f"{stage}... {fraction * 100:.0f}%")
+                
+        if not future.done():
+            self.root.after(JOB_POLL_MS, self.poll_job)
+            return
+            
+        self.current_job = None
+        self.set_busy(False)
+        try:
+            result = future.result()
         except Exception as e:
             self.show_modern_popup("Error", f"An unexpected error occurred:\n{str(e)}", success=False)
+            return
+        if profile:
+            from stego_profile import profile_dir
+            self.status_label.configure(text=f"⏱️ Profile saved to: {profile_dir()}")
+        on_done(result)
+        
+    def cancel_operation(self):
+        """Ask the running backend to stop at its next checkpoint"""
+        if self.current_job is not None:
+            self.current_job[1].set()
+            self.cancel_btn.configure(state="disabled")
+            self.status_label.configure(text="Cancelling...")
+            
+    def set_busy(self, busy):
+        """Toggle the controls between idle and running states"""
+        self.execute_btn.configure(state="disabled" if busy else "normal")
+        self.cancel_btn.configure(state="normal" if busy else "disabled")
+        if busy:
+            self.progress_bar.set(0)
+            self.status_label.configure(text="Starting...")
+            self.pause_animation()
+        else:
+            self.status_label.configure(text="Ready")
+            self.resume_animation()
+            
+    def on_embed_finished(self, result, file_path, output_path):
+        success, message = result
+        if success:
+            file_ext = os.path.splitext(file_path)[1].lower()
+            media_type = "video" if file_ext in [".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv"] else "image"
+            self.progress_bar.set(1)
+            self.show_modern_popup("Success!", f"Message successfully hidden in the {media_type}!\n\nSaved to: {os.path.basename(output_path)}")
+        else:
+            self.show_modern_popup("Failed", f"Operation failed: {message}", success=False)
+            
+    def on_extract_finished(self, result, file_path):
+        success, message = result
+        if success:
+            self.message_text.delete("1.0", "end")
+            if isinstance(message, bytes):
+                self.message_text.insert("1.0", f"📦 Binary payload of {len(message):,} bytes opened in the payload viewer.")
+                PayloadViewer(self.root, message, self.run_in_background, self.show_modern_popup)
+            elif len(message) <= INLINE_PAYLOAD_CHARS:
+                self.message_text.insert("1.0", message)
+            else:
+                self.message_text.insert("1.0", f"📄 Payload of {len(message):,} characters opened in the payload viewer.")
+                PayloadViewer(self.root, message, self.run_in_background, self.show_modern_popup)
             
+            file_ext = os.path.splitext(file_path)[1].lower()
+            media_type = "video" if file_ext in [".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv"] else "image"
+            unit = "bytes" if isinstance(message, bytes) else "characters"
+            self.progress_bar.set(1)
+            self.show_modern_popup("Success!", f"Message successfully extracted from the {media_type}!\n\nExtracted {len(message):,} {unit}.")
+        else:
+            self.show_modern_popup("Failed", f"Extraction failed: {message}", success=False)
+            
+    def on_close(self):
+        """Cancel any running job before closing the window"""
+        if self.current_job is not None:
+            self.current_job[1].set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+        
     def run(self):
         """Start the application"""
         # Bind window resize event for responsiveness
@@ -720,10 +1793,22 @@ Bitrate: {(file_size_bytes * 8) / (duration * 1000) if duration > 0 else 0:.0f}
     def on_window_resize(self, event=None):
         """Handle window resize events"""
         if event and event.widget == self.root:
-            # Update canvas animation if needed
+            # Relayout once the resize burst settles
             if hasattr(self, 'canvas'):
-                self.root.after_idle(self.setup_animation)
+                self.schedule_relayout()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="StegLyzer GUI")
+    parser.add_argument("--measure-idle", type=float, metavar="SECONDS",
+                        help="Print idle CPU usage after SECONDS and exit")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Print cold-start and warm-up times in milliseconds and exit")
+    args = parser.parse_args()
+    
     app = ModernSteganographyApp()
+    if args.measure_idle:
+        app.measure_idle_cpu(args.measure_idle)
+    if args.measure_startup:
+        app.measure_startup()
     app.run()
@@ -1,42 +1,145 @@
 # stego_archive.py
 
 import os
+import struct
+from stego_progress import report_progress, check_cancelled
+from stego_instrument import span
+from stego_frame import MAGIC, HEADER_SIZE, FrameError, as_frame, parse_header, read_payload, read_index
 
 SUPPORTED_ARCHIVES = [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".iso", ".dmg"]
 
-# Unique marker so we know where our message starts
+# Unique marker so we know where our message starts (archives written before payload frames)
 MARKER = b"<<SECRET_MSG_START>>"
 
+# Appended after the frame (or slot container): its length and the frame magic, so extractors start from the end
+TRAILER = struct.Struct(">I4s")
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Older archives end with MARKER + message; only this much of a file's tail is searched for it by default
+LEGACY_TAIL_SIZE = 1024 * 1024
+
 def is_supported_archive(file_path):
     ext = os.path.splitext(file_path)[-1].lower()
     return ext in SUPPORTED_ARCHIVES
 
-def embed_text_in_archive(input_path, output_path, secret_text):
+def embed_text_in_archive(input_path, output_path, secret_text, progress=None, cancel=None):
     if not is_supported_archive(input_path):
         return False, "❌ Unsupported archive type."
 
     try:
-        with open(input_path, "rb") as original_file:
-            data = original_file.read()
+        total = os.path.getsize(input_path) or 1
+        copied = 0
+        # Written next to the output and moved into place, so the output may be the input itself
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            with open(input_path, "rb") as original_file, open(temp_path, "wb") as stego_file:
+                with span("copy_archive") as s:
+                    while True:
+                        check_cancelled(cancel)
+                        chunk = original_file.read(COPY_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        stego_file.write(chunk)
+                        copied += len(chunk)
+                        report_progress(progress, 0.95 * copied / total, "Copying archive")
+                    s.add_bytes(copied)
+                with span("append_payload") as s:
+                    frame = as_frame(secret_text)
+                    s.add_bytes(stego_file.write(frame + TRAILER.pack(len(frame), MAGIC)))
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
 
-        with open(output_path, "wb") as stego_file:
-            stego_file.write(data)
-            stego_file.write(MARKER + secret_text.encode("utf-8"))
+        report_progress(progress, 1.0, "Done")
 
         return True, f"✅ Message embedded in archive: {output_path}"
     except Exception as e:
         return False, f"❌ Error: {str(e)}"
 
-def extract_text_from_archive(stego_path):
+def _find_marker(f, total, progress=None, cancel=None, start=0):
+    """File offset of the first MARKER from start on, scanning in chunks so memory stays constant, or -1"""
+    overlap = len(MARKER) - 1
+    tail = b""
+    position = start
+    f.seek(start)
+    while True:
+        check_cancelled(cancel)
+        chunk = f.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            return -1
+        window = tail + chunk
+        index = window.find(MARKER)
+        if index != -1:
+            return position - len(tail) + index
+        position += len(chunk)
+        tail = window[-overlap:]
+        report_progress(progress, 0.1 + 0.85 * (position - start) / max(1, total - start), "Searching for marker")
+
+def _trailer_reader(f, size):
+    """read(offset, count) over the frame referenced by the trailer, or None if the file does not end with one"""
+    if size < TRAILER.size + HEADER_SIZE:
+        return None
+    f.seek(size - TRAILER.size)
+    length, magic = TRAILER.unpack(f.read(TRAILER.size))
+    if magic != MAGIC or length > size - TRAILER.size:
+        return None
+    base = size - TRAILER.size - length
+    f.seek(base)
+    header = parse_header(f.read(HEADER_SIZE))
+    if header is None or header.total_size != length:
+        return None
+
+    def read(offset, count):
+        with span("read_payload") as s:
+            f.seek(base + offset)
+            data = f.read(max(0, min(count, length - offset)))
+            s.add_bytes(len(data))
+        return data
+    return read
+
+def read_archive_index(stego_path):
+    """Slot index of an archive's trailing payload (see stego_frame.read_index)"""
+    with open(stego_path, "rb") as f:
+        read = _trailer_reader(f, os.path.getsize(stego_path))
+        return read_index(read) if read else None
+
+def extract_text_from_archive(stego_path, progress=None, cancel=None, slot=None, full_scan=False):
+    """Extract the payload appended to an archive.
+
+    The trailer at the end decides whether there is one. Older archives
+    (MARKER + message) are searched for in the last LEGACY_TAIL_SIZE bytes,
+    so a clean archive costs a few reads however large it is; full_scan
+    searches the whole file for a marker instead.
+    """
     try:
+        report_progress(progress, 0.1, "Reading archive")
+        total = os.path.getsize(stego_path) or 1
         with open(stego_path, "rb") as f:
-            data = f.read()
+            # Current format: a few bytes at the end decide it, then a seek to the slot
+            read = _trailer_reader(f, total)
+            if read is not None:
+                payload = read_payload(read, slot)
+                report_progress(progress, 1.0, "Done")
+                return True, payload
+            if slot is not None:
+                return False, "⚠️ No payload slots found."
 
-        index = data.find(MARKER)
-        if index == -1:
-            return False, "⚠️ No hidden message found."
+            # Older archives: scan for the marker
+            start = 0 if full_scan else max(0, total - LEGACY_TAIL_SIZE)
+            with span("find_marker") as s:
+                index = _find_marker(f, total, progress, cancel, start)
+                s.add_bytes((total if index == -1 else index + len(MARKER)) - start)
+            if index == -1:
+                return False, "⚠️ No hidden message found."
 
-        secret_data = data[index + len(MARKER):]
+            with span("read_payload") as s:
+                f.seek(index + len(MARKER))
+                secret_data = f.read()
+                s.add_bytes(len(secret_data))
         return True, secret_data.decode("utf-8", errors="replace")
+    except FrameError as e:
+        return False, f"❌ {str(e)}"
     except Exception as e:
         return False, f"❌ Error: {str(e)}"
@@ -1,7 +1,7 @@
 # stego_audio.py - Enhanced Multi-Format Audio Steganography (MP3 Removed)
 
 import os
-import wave
+import shutil
 import contextlib
 from mutagen.flac import FLAC
 from mutagen.mp4 import MP4
@@ -11,6 +11,22 @@ from mutagen.wave import WAVE
 from pydub import AudioSegment
 import tempfile
 import struct
+from dataclasses import dataclass
+import numpy as np
+from stego_progress import report_progress, check_cancelled
+from stego_instrument import span
+from stego_spread import KeyedPermutation
+from stego_frame import (HEADER_SIZE, FrameError, as_frame, read_payload, read_index, to_bits, from_bits,
+                         frame_to_text, text_to_payload)
+
+# Bits processed between progress reports / cancellation checks in LSB loops
+LSB_CHUNK_BITS = 1 << 16
+
+# Bytes per read when copying a carrier before rewriting its tags
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Frames copied per block when streaming the untouched part of a WAV
+WAV_COPY_FRAMES = 1 << 16
 
 # Supported audio formats (MP3 REMOVED)
 SUPPORTED_LSB_FORMATS = [".wav", ".aiff", ".au", ".raw"]  # Uncompressed formats for LSB
@@ -41,7 +57,7 @@ def get_audio_format_type(file_path):
 # Main Audio Steganography Functions
 # -------------------------
 
-def embed_text_in_audio(input_path, output_path, secret_text):
+def embed_text_in_audio(input_path, output_path, secret_text, progress=None, cancel=None, key=None):
     """Main function to embed text in various audio formats (NO MP3)"""
     if not is_supported_audio(input_path):
         ext = os.path.splitext(input_path)[1].lower()
@@ -50,21 +66,23 @@ def embed_text_in_audio(input_path, output_path, secret_text):
         return False, "❌ Unsupported audio format."
     
     format_type = get_audio_format_type(input_path)
+    if key and format_type == "metadata":
+        return False, "❌ Keyed spreading needs an LSB carrier; this format stores the message in metadata."
     
     try:
         if format_type == "lsb":
-            return embed_lsb_audio(input_path, output_path, secret_text)
+            return embed_lsb_audio(input_path, output_path, secret_text, progress, cancel, key)
         elif format_type == "metadata":
-            return embed_metadata_audio(input_path, output_path, secret_text)
+            return embed_metadata_audio(input_path, output_path, secret_text, progress, cancel)
         elif format_type == "convert":
-            return embed_convert_audio(input_path, output_path, secret_text)
+            return embed_convert_audio(input_path, output_path, secret_text, progress, cancel, key)
         else:
             return False, "❌ Unsupported audio format."
     except Exception as e:
         return False, f"❌ Error embedding message: {str(e)}"
 
-def extract_text_from_audio(input_path):
-    """Main function to extract text from various audio formats (NO MP3)"""
+def extract_text_from_audio(input_path, progress=None, cancel=None, slot=None, key=None):
+    """Main function to extract text (or one named payload slot) from various audio formats (NO MP3)"""
     if not is_supported_audio(input_path):
         ext = os.path.splitext(input_path)[1].lower()
         if ext == ".mp3":
@@ -72,14 +90,16 @@ def extract_text_from_audio(input_path):
         return False, "❌ Unsupported audio format."
     
     format_type = get_audio_format_type(input_path)
+    if key and format_type == "metadata":
+        return False, "❌ Keyed spreading needs an LSB carrier; this format stores the message in metadata."
     
     try:
         if format_type == "lsb":
-            return extract_lsb_audio(input_path)
+            return extract_lsb_audio(input_path, progress, cancel, slot, key)
         elif format_type == "metadata":
-            return extract_metadata_audio(input_path)
+            return extract_metadata_audio(input_path, progress, cancel, slot)
         elif format_type == "convert":
-            return extract_convert_audio(input_path)
+            return extract_convert_audio(input_path, progress, cancel, slot, key)
         else:
             return False, "❌ Unsupported audio format."
     except Exception as e:
@@ -89,21 +109,31 @@ def extract_text_from_audio(input_path):
 # LSB Steganography (Uncompressed Formats)
 # -------------------------
 
-def _text_to_bits(text):
-    """Convert text to binary representation"""
-    return ''.join(format(ord(c), '08b') for c in text)
-
 def _bits_to_text(bits):
     """Convert binary representation back to text"""
     chars = [bits[i:i+8] for i in range(0, len(bits), 8)]
     return ''.join(chr(int(char, 2)) for char in chars if char)
 
-def embed_lsb_audio(input_path, output_path, secret_text):
+def _decode_to_wav(input_path, wav_path):
+    """Decode any FFmpeg-readable audio file to a temporary WAV"""
+    with span("decode_audio", format=os.path.splitext(input_path)[1].lower()) as s:
+        s.add_bytes(os.path.getsize(input_path))
+        audio = AudioSegment.from_file(input_path)
+        audio.export(wav_path, format="wav")
+
+def _encode_from_wav(wav_path, output_path, fmt):
+    """Re-encode a WAV to the given container format"""
+    with span("encode_audio", format=fmt) as s:
+        audio = AudioSegment.from_wav(wav_path)
+        audio.export(output_path, format=fmt)
+        s.add_bytes(os.path.getsize(output_path))
+
+def embed_lsb_audio(input_path, output_path, secret_text, progress=None, cancel=None, key=None):
     """Embed text using LSB method for uncompressed audio"""
     ext = os.path.splitext(input_path)[1].lower()
     
     if ext == ".wav":
-        return embed_text_in_wav(input_path, output_path, secret_text)
+        return embed_text_in_wav(input_path, output_path, secret_text, progress, cancel, key)
     elif ext in [".aiff", ".au", ".raw"]:
         # Convert to WAV first, then embed
         temp_wav_in = tempfile.mktemp(suffix=".wav")
@@ -111,16 +141,17 @@ def embed_lsb_audio(input_path, output_path, secret_text):
         
         try:
             # Convert input to WAV
-            audio = AudioSegment.from_file(input_path)
-            audio.export(temp_wav_in, format="wav")
+            report_progress(progress, 0.0, "Converting to WAV")
+            _decode_to_wav(input_path, temp_wav_in)
+            check_cancelled(cancel)
             
             # Embed in WAV
-            success, result = embed_text_in_wav(temp_wav_in, temp_wav_out, secret_text)
+            success, result = embed_text_in_wav(temp_wav_in, temp_wav_out, secret_text, progress, cancel, key)
             
             if success:
                 # Convert back to original format
-                stego_audio = AudioSegment.from_wav(temp_wav_out)
-                stego_audio.export(output_path, format=ext[1:])  # Remove the dot
+                report_progress(progress, 0.95, f"Converting back to {ext[1:].upper()}")
+                _encode_from_wav(temp_wav_out, output_path, ext[1:])  # Remove the dot
                 return True, f"✅ Message embedded in {ext.upper()} file: {output_path}"
             else:
                 return success, result
@@ -131,133 +162,322 @@ def embed_lsb_audio(input_path, output_path, secret_text):
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
 
-def extract_lsb_audio(input_path):
+def extract_lsb_audio(input_path, progress=None, cancel=None, slot=None, key=None):
     """Extract text using LSB method from uncompressed audio"""
     ext = os.path.splitext(input_path)[1].lower()
     
     if ext == ".wav":
-        return extract_text_from_wav(input_path)
+        return extract_text_from_wav(input_path, progress, cancel, slot, key)
     elif ext in [".aiff", ".au", ".raw"]:
         # Convert to WAV first, then extract
         temp_wav = tempfile.mktemp(suffix=".wav")
         
         try:
             # Convert to WAV
-            audio = AudioSegment.from_file(input_path)
-            audio.export(temp_wav, format="wav")
+            report_progress(progress, 0.0, "Converting to WAV")
+            _decode_to_wav(input_path, temp_wav)
+            check_cancelled(cancel)
             
             # Extract from WAV
-            return extract_text_from_wav(temp_wav)
+            return extract_text_from_wav(temp_wav, progress, cancel, slot, key)
             
         finally:
             if os.path.exists(temp_wav):
                 os.remove(temp_wav)
 
-def embed_text_in_wav(input_path, output_path, secret_text):
-    """Enhanced WAV LSB embedding"""
+# WAVE_FORMAT_* tags of the fmt chunk; EXTENSIBLE files carry the real tag in their sub-format GUID
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+WAV_SAMPLE_WIDTHS = {WAVE_FORMAT_PCM: (1, 2, 3, 4), WAVE_FORMAT_IEEE_FLOAT: (4, 8)}
+
+@dataclass
+class WavLayout:
+    format_tag: int
+    channels: int
+    sample_rate: int
+    sample_width: int   # bytes per sample container
+    valid_bits: int     # significant bits, left-justified in the container
+    data_offset: int
+    data_size: int
+
+    @property
+    def codec(self):
+        return "IEEE float" if self.format_tag == WAVE_FORMAT_IEEE_FLOAT else "PCM"
+
+    @property
+    def frames(self):
+        return self.data_size // (self.sample_width * self.channels)
+
+    @property
+    def samples(self):
+        return self.frames * self.channels
+
+    @property
+    def lsb_bit(self):
+        """Bit offset of the least significant valid bit in a little-endian sample"""
+        return self.sample_width * 8 - self.valid_bits
+
+def read_wav_layout(path):
+    """Sample format and data chunk of a RIFF/WAVE file, from its fmt chunk"""
+    fmt = None
+    with open(path, "rb") as f:
+        riff, _, form = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or form != b"WAVE":
+            raise ValueError("Not a RIFF/WAVE file.")
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("WAV file has no data chunk.")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(size)
+                f.seek(size & 1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+    if fmt is None or len(fmt) < 16:
+        raise ValueError("WAV file has no fmt chunk.")
+
+    tag, channels, rate, _, block_align, bits = struct.unpack_from("<HHIIHH", fmt)
+    width = block_align // channels if channels else 0
+    valid_bits = width * 8
+    if tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        valid_bits = struct.unpack_from("<H", fmt, 18)[0] or width * 8
+        tag = struct.unpack_from("<H", fmt, 24)[0]
+    if width not in WAV_SAMPLE_WIDTHS.get(tag, ()) or not 0 < valid_bits <= width * 8:
+        raise ValueError(f"Unsupported WAV sample format (format tag {tag:#06x}, {bits}-bit).")
+    if tag == WAVE_FORMAT_IEEE_FLOAT:
+        valid_bits = width * 8  # the mantissa LSB is the container LSB
+    size = min(size, os.path.getsize(path) - offset)
+    return WavLayout(tag, channels, rate, width, valid_bits, offset, size)
+
+def _wav_lsb_bytes(path, layout, mode="r"):
+    """(memmap of the data chunk, zero-copy view of the byte holding each sample's LSB)
+
+    Samples are little-endian, so for 8/16/24/32-bit PCM and 32/64-bit
+    float alike the byte at a fixed offset in every sample container holds
+    its least significant valid bit: a strided uint8 view over the memmap
+    reaches it for packed 24-bit data as well, without reading the rest.
+    """
+    data = np.memmap(path, dtype=np.uint8, mode=mode, offset=layout.data_offset,
+                     shape=(layout.samples * layout.sample_width,))
+    return data, data[layout.lsb_bit // 8::layout.sample_width]
+
+def embed_text_in_wav(input_path, output_path, secret_text, progress=None, cancel=None, key=None):
+    """Sample-aware WAV LSB embedding: one bit in the least significant valid bit of every sample.
+
+    The file is copied as-is (every chunk is kept) next to the output and
+    the bits are written in place through a memmap, in order or, with a
+    key, at keyed pseudo-random samples across all channels; the copy then
+    replaces the output, which may be the input itself. 8-32-bit PCM and
+    32/64-bit IEEE float data, plain or WAVE_FORMAT_EXTENSIBLE, are supported.
+    """
     try:
-        with wave.open(input_path, 'rb') as audio:
-            params = audio.getparams()
-            frames = bytearray(audio.readframes(audio.getnframes()))
-
-        # Add length prefix and EOF marker
-        message_length = len(secret_text)
-        length_bits = format(message_length, '032b')  # 32-bit length
-        text_bits = _text_to_bits(secret_text)
-        bits = length_bits + text_bits + '1111111111111110'  # EOF marker
+        report_progress(progress, 0.05, "Reading WAV")
+        layout = read_wav_layout(input_path)
+        capacity = layout.samples
 
-        if len(bits) > len(frames):
-            return False, f"❌ Message too large. Max capacity: {len(frames)//8} characters"
+        # Framed payload: magic, length and CRC ahead of the (compressed) bytes
+        with span("pack_bits") as s:
+            bits = to_bits(as_frame(secret_text))
+            s.add_bytes(len(bits) // 8)
 
-        # Embed bits in LSB
-        for i, bit in enumerate(bits):
-            frames[i] = (frames[i] & 254) | int(bit)
+        if len(bits) > capacity:
+            return False, f"❌ Message too large. Max capacity: {max(0, capacity // 8 - HEADER_SIZE)} bytes"
 
-        with wave.open(output_path, 'wb') as stego_audio:
-            stego_audio.setparams(params)
-            stego_audio.writeframes(frames)
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            with span("copy_wav") as s, open(input_path, 'rb') as src, open(temp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+                s.add_bytes(dst.tell())
+            check_cancelled(cancel)
+
+            with span("embed_bits", bits=len(bits), spread=bool(key), sample_width=layout.sample_width) as s:
+                data, lsb = _wav_lsb_bytes(temp_path, layout, "r+")
+                shift = np.uint8(layout.lsb_bit % 8)
+                keep = np.uint8(0xFF ^ (1 << int(shift)))
+                permutation = KeyedPermutation(key, capacity) if key else None
+                total = len(bits)
+                for start in range(0, total, LSB_CHUNK_BITS):
+                    check_cancelled(cancel)
+                    report_progress(progress, 0.3 + 0.7 * start / total, "Embedding bits")
+                    end = min(start + LSB_CHUNK_BITS, total)
+                    chunk = bits[start:end]
+                    if permutation is None:
+                        positions = slice(start, end)
+                    else:
+                        # Sorted positions turn the scatter into one forward pass over the file's pages
+                        positions = permutation.range(start, end)
+                        order = np.argsort(positions)
+                        positions, chunk = positions[order], chunk[order]
+                    lsb[positions] = (lsb[positions] & keep) | (chunk << shift)
+                data.flush()
+                del data, lsb
+                s.add_bytes(total)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
 
-        return True, f"✅ Message embedded in WAV: {output_path}"
+        report_progress(progress, 1.0, "Done")
+        return True, f"✅ Message embedded in {layout.valid_bits}-bit {layout.codec} WAV: {output_path}"
         
     except Exception as e:
         return False, f"❌ WAV embedding error: {str(e)}"
 
-def extract_text_from_wav(stego_path):
-    """Enhanced WAV LSB extraction"""
+def _wav_reader(lsb, shift=0, key=None):
+    """read(offset, count) over the bytes stored in bit shift of the lsb bytes (see _wav_lsb_bytes).
+
+    Only the requested bit range is touched, through the memmap; with a key
+    just the keyed positions of those bits are gathered.
+    """
+    available = len(lsb) // 8
+    permutation = KeyedPermutation(key, len(lsb)) if key and len(lsb) else None
+
+    def read(offset, count):
+        count = max(0, min(count, available - offset))
+        start, end = offset * 8, (offset + count) * 8
+        with span("read_wav") as s:
+            s.add_bytes(count * 8)
+            positions = permutation.range(start, end) if permutation is not None else slice(start, end)
+            return from_bits((lsb[positions] >> shift) & 1)
+    return read
+
+def _wav_readers(stego_path, key=None):
+    """Readers to try in turn: sample LSBs, then the byte-LSB layout written before sample-aware embedding"""
+    layout = read_wav_layout(stego_path)
+    data, lsb = _wav_lsb_bytes(stego_path, layout)
+    readers = [_wav_reader(lsb, layout.lsb_bit % 8, key)]
+    if layout.sample_width > 1:
+        readers.append(_wav_reader(data, 0, key))
+    return data, readers
+
+def read_wav_index(stego_path, key=None):
+    """Slot index of a WAV's payload (see stego_frame.read_index)"""
+    _, readers = _wav_readers(stego_path, key)
+    for read in readers:
+        entries = read_index(read)
+        if entries is not None:
+            return entries
+    return None
+
+def extract_text_from_wav(stego_path, progress=None, cancel=None, slot=None, key=None):
+    """Sample-aware WAV LSB extraction, reading only the samples that hold the message.
+
+    The frame header is checked after HEADER_SIZE bytes of LSBs, so files
+    without a payload are rejected without reading further; with a slot
+    container only the index and the requested slot are read. Files written
+    with the older byte-LSB layout, or before payload frames, still extract.
+    """
     try:
-        with wave.open(stego_path, 'rb') as audio:
-            frames = bytearray(audio.readframes(audio.getnframes()))
-
-        # Extract length (first 32 bits)
-        length_bits = ''
-        for i in range(32):
-            if i < len(frames):
-                length_bits += str(frames[i] & 1)
-
-        if len(length_bits) < 32:
-            return False, "⚠️ No valid message found."
-
-        message_length = int(length_bits, 2)
-        
-        if message_length <= 0 or message_length > 100000:  # Sanity check
-            return False, "⚠️ No valid hidden message found."
-
-        # Extract message bits
-        message_bits = ''
-        for i in range(32, 32 + (message_length * 8)):
-            if i < len(frames):
-                message_bits += str(frames[i] & 1)
-
-        if len(message_bits) < message_length * 8:
-            return False, "⚠️ Incomplete message found."
-
-        return True, _bits_to_text(message_bits)
+        report_progress(progress, 0.05, "Reading WAV")
+        data, readers = _wav_readers(stego_path, key)
+        with span("extract_bits"):
+            for read in readers:
+                message = read_payload(read, slot)
+                if message is not None:
+                    break
+        if message is None:
+            if key:
+                return False, "⚠️ No hidden message found for this key."
+            if slot is not None:
+                return False, "⚠️ No payload slots found."
+            return _extract_legacy_wav(data, progress, cancel)
+        report_progress(progress, 1.0, "Done")
+        return True, message
         
+    except FrameError as e:
+        return False, f"❌ {str(e)}"
     except Exception as e:
         return False, f"❌ WAV extraction error: {str(e)}"
 
+def _extract_legacy_wav(data, progress=None, cancel=None):
+    """Read the pre-frame format from the data bytes: 32-bit character count, then 8 bits per character"""
+    if len(data) < 32:
+        return False, "⚠️ No valid message found."
+    message_length = int.from_bytes(from_bits(data[:32] & 1), "big")
+
+    if message_length <= 0 or message_length > 100000:  # Sanity check
+        return False, "⚠️ No valid hidden message found."
+
+    # Read just the bytes that hold the message bits
+    end = min(32 + message_length * 8, len(data))
+    message_bits = []
+    with span("extract_bits") as s:
+        for start in range(32, end, LSB_CHUNK_BITS):
+            check_cancelled(cancel)
+            report_progress(progress, 0.1 + 0.85 * (start - 32) / (end - 32), "Reading bits")
+            message_bits.append(data[start:min(start + LSB_CHUNK_BITS, end)] & 1)
+        message_bits = ''.join(map(str, np.concatenate(message_bits).tolist())) if message_bits else ''
+        s.add_bytes(len(message_bits))
+
+    if len(message_bits) < message_length * 8:
+        return False, "⚠️ Incomplete message found."
+
+    with span("decode_text") as s:
+        s.add_bytes(message_length)
+        message = _bits_to_text(message_bits)
+    report_progress(progress, 1.0, "Done")
+    return True, message
+
 # -------------------------
 # Metadata Steganography (Compressed Formats - NO MP3)
 # -------------------------
 
-def embed_metadata_audio(input_path, output_path, secret_text):
+def embed_metadata_audio(input_path, output_path, secret_text, progress=None, cancel=None):
     """Embed text in audio metadata for compressed formats (NO MP3)"""
     ext = os.path.splitext(input_path)[1].lower()
     
     try:
         # Copy file first
+        report_progress(progress, 0.1, "Copying file")
         if input_path != output_path:
-            with open(input_path, 'rb') as src, open(output_path, 'wb') as dst:
-                dst.write(src.read())
+            with span("copy_file") as s, open(input_path, 'rb') as src, open(output_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+                s.add_bytes(dst.tell())
+        check_cancelled(cancel)
+        report_progress(progress, 0.6, "Writing metadata")
         
-        # Embed in metadata based on format (MP3 REMOVED)
-        if ext == ".flac":
-            return embed_flac_metadata(output_path, secret_text)
-        elif ext in [".m4a", ".mp4", ".aac"]:
-            return embed_mp4_metadata(output_path, secret_text)
-        elif ext == ".ogg":
-            return embed_ogg_metadata(output_path, secret_text)
-        else:
-            return False, f"❌ Metadata embedding not supported for {ext}"
+        # Embed in metadata based on format (MP3 REMOVED); tags hold the frame as text
+        with span("write_metadata", format=ext) as s:
+            tag_text = frame_to_text(as_frame(secret_text))
+            s.add_bytes(len(tag_text))
+            if ext == ".flac":
+                return embed_flac_metadata(output_path, tag_text)
+            elif ext in [".m4a", ".mp4", ".aac"]:
+                return embed_mp4_metadata(output_path, tag_text)
+            elif ext == ".ogg":
+                return embed_ogg_metadata(output_path, tag_text)
+            else:
+                return False, f"❌ Metadata embedding not supported for {ext}"
             
     except Exception as e:
         return False, f"❌ Metadata embedding error: {str(e)}"
 
-def extract_metadata_audio(input_path):
+def extract_metadata_audio(input_path, progress=None, cancel=None, slot=None):
     """Extract text from audio metadata (NO MP3)"""
     ext = os.path.splitext(input_path)[1].lower()
     
     try:
+        check_cancelled(cancel)
+        report_progress(progress, 0.5, "Reading metadata")
         # MP3 support removed
-        if ext == ".flac":
-            return extract_flac_metadata(input_path)
-        elif ext in [".m4a", ".mp4", ".aac"]:
-            return extract_mp4_metadata(input_path)
-        elif ext == ".ogg":
-            return extract_ogg_metadata(input_path)
-        else:
-            return False, f"❌ Metadata extraction not supported for {ext}"
+        with span("read_metadata", format=ext):
+            if ext == ".flac":
+                success, result = extract_flac_metadata(input_path)
+            elif ext in [".m4a", ".mp4", ".aac"]:
+                success, result = extract_mp4_metadata(input_path)
+            elif ext == ".ogg":
+                success, result = extract_ogg_metadata(input_path)
+            else:
+                return False, f"❌ Metadata extraction not supported for {ext}"
+        return (True, text_to_payload(result, slot)) if success else (False, result)
             
+    except FrameError as e:
+        return False, f"❌ {str(e)}"
     except Exception as e:
         return False, f"❌ Metadata extraction error: {str(e)}"
 
@@ -323,7 +543,7 @@ def extract_ogg_metadata(file_path):
 # Convert-to-WAV Method (Exotic Formats)
 # -------------------------
 
-def embed_convert_audio(input_path, output_path, secret_text):
+def embed_convert_audio(input_path, output_path, secret_text, progress=None, cancel=None, key=None):
     """Convert exotic formats to WAV, embed, then convert back"""
     ext = os.path.splitext(input_path)[1].lower()
     temp_wav_in = tempfile.mktemp(suffix=".wav")
@@ -331,16 +551,17 @@ def embed_convert_audio(input_path, output_path, secret_text):
     
     try:
         # Convert input to WAV
-        audio = AudioSegment.from_file(input_path)
-        audio.export(temp_wav_in, format="wav")
+        report_progress(progress, 0.0, "Converting to WAV")
+        _decode_to_wav(input_path, temp_wav_in)
+        check_cancelled(cancel)
         
         # Embed in WAV
-        success, result = embed_text_in_wav(temp_wav_in, temp_wav_out, secret_text)
+        success, result = embed_text_in_wav(temp_wav_in, temp_wav_out, secret_text, progress, cancel, key)
         
         if success:
             # Convert back to original format
-            stego_audio = AudioSegment.from_wav(temp_wav_out)
-            stego_audio.export(output_path, format=ext[1:])
+            report_progress(progress, 0.95, f"Converting back to {ext[1:].upper()}")
+            _encode_from_wav(temp_wav_out, output_path, ext[1:])
             return True, f"✅ Message embedded in {ext.upper()} file: {output_path}"
         else:
             return success, result
@@ -354,17 +575,18 @@ def embed_convert_audio(input_path, output_path, secret_text):
             if os.path.exists(temp_file):
                 os.remove(temp_file)
 
-def extract_convert_audio(input_path):
+def extract_convert_audio(input_path, progress=None, cancel=None, slot=None, key=None):
     """Convert exotic formats to WAV and extract"""
     temp_wav = tempfile.mktemp(suffix=".wav")
     
     try:
         # Convert to WAV
-        audio = AudioSegment.from_file(input_path)
-        audio.export(temp_wav, format="wav")
+        report_progress(progress, 0.0, "Converting to WAV")
+        _decode_to_wav(input_path, temp_wav)
+        check_cancelled(cancel)
         
         # Extract from WAV
-        return extract_text_from_wav(temp_wav)
+        return extract_text_from_wav(temp_wav, progress, cancel, slot, key)
         
     except Exception as e:
         return False, f"❌ Conversion extraction error: {str(e)}"
@@ -378,7 +600,8 @@ def extract_convert_audio(input_path):
 # -------------------------
 
 def get_audio_info(file_path):
-    """Get detailed audio file information (NO MP3)"""
+    """Get detailed audio file information (NO MP3) from the cached header inspection"""
+    from stego_inspect import inspect_file
     try:
         ext = os.path.splitext(file_path)[1].lower()
         
@@ -386,16 +609,17 @@ def get_audio_info(file_path):
         if ext == ".mp3":
             return {"error": "MP3 format not supported due to metadata compatibility issues"}
         
-        audio = AudioSegment.from_file(file_path)
-        format_type = get_audio_format_type(file_path)
+        media = inspect_file(file_path)
+        if media.error:
+            return {"error": media.error}
         
         info = {
             "format": ext[1:].upper(),
-            "format_type": format_type,
-            "duration": len(audio) / 1000.0,  # seconds
-            "channels": audio.channels,
-            "sample_rate": audio.frame_rate,
-            "frame_width": audio.frame_width,
+            "format_type": get_audio_format_type(file_path),
+            "duration": media.duration,  # seconds
+            "channels": media.channels,
+            "sample_rate": media.sample_rate,
+            "frame_width": media.channels * media.sample_width if media.channels and media.sample_width else None,
             "max_message_length": estimate_capacity(file_path)
         }
         return info
@@ -405,6 +629,7 @@ def get_audio_info(file_path):
 
 def estimate_capacity(file_path):
     """Estimate message capacity for audio file (NO MP3)"""
+    from stego_inspect import inspect_file
     try:
         ext = os.path.splitext(file_path)[1].lower()
         
@@ -415,10 +640,8 @@ def estimate_capacity(file_path):
         format_type = get_audio_format_type(file_path)
         
         if format_type == "lsb":
-            # For LSB, capacity depends on audio length
-            audio = AudioSegment.from_file(file_path)
-            total_samples = len(audio.raw_data)
-            return total_samples // 8  # rough estimate
+            # For LSB, capacity depends on audio length (read from the header)
+            return inspect_file(file_path).capacity or 0
             
         elif format_type in ["metadata", "convert"]:
             # For metadata, typically limited to comment field
@@ -429,6 +652,22 @@ def estimate_capacity(file_path):
     except Exception:
         return 0
 
+def iter_wav_blocks(input_path, block_frames=65536, block_seconds=None):
+    """Yield (layout, frame_bytes) blocks from a WAV file without loading it whole (see read_wav_layout)"""
+    layout = read_wav_layout(input_path)
+    if block_seconds:
+        block_frames = max(1, int(layout.sample_rate * block_seconds))
+    frame_size = layout.sample_width * layout.channels
+    remaining = layout.frames * frame_size
+    with open(input_path, "rb") as f:
+        f.seek(layout.data_offset)
+        while remaining > 0:
+            frames = f.read(min(remaining, block_frames * frame_size))
+            if not frames:
+                break
+            remaining -= len(frames)
+            yield layout, frames
+
 def get_supported_formats_info():
     """Get information about supported formats"""
     return {
@@ -0,0 +1,157 @@
+# stego_audio_analysis.py - Streaming LSB steganalysis for WAV/PCM audio
+
+import numpy as np
+
+from stego_audio import WAVE_FORMAT_IEEE_FLOAT, iter_wav_blocks
+from stego_image_analysis import spa_estimate
+
+# Sample values are folded into this many (2k, 2k+1) pair buckets so the
+# pair-balance histogram stays constant-size for 24/32-bit audio too
+PAIR_BUCKETS = 1 << 16
+
+# SPA is ill-conditioned when few adjacent samples share their upper bits
+# (loud passages); below this fraction of such pairs it is not reported
+MIN_CLOSE_PAIRS = 0.05
+
+# Windows whose estimates exceed these are marked anomalous
+WINDOW_RATE_THRESHOLD = 0.15
+PAIR_BALANCE_THRESHOLD = 0.3
+RATE_THRESHOLD = 0.05
+
+def decode_samples(frame_bytes, layout):
+    """Sample values of little-endian WAV frame bytes as an int64 (frames, channels) array.
+
+    PCM values count steps of the least significant valid bit. Float
+    samples become integers in the order of the floats (the sign and
+    magnitude of their bit patterns), so a mantissa LSB flip moves a value
+    by one just as it does for PCM.
+    """
+    width, channels = layout.sample_width, layout.channels
+    raw = np.frombuffer(frame_bytes, dtype=np.uint8)
+    usable = len(raw) - len(raw) % (width * channels)
+    raw = raw[:usable]
+
+    if layout.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        bits = raw.view(f"<i{width}").astype(np.int64)
+        magnitude = bits & np.int64((1 << (width * 8 - 1)) - 1)
+        samples = np.where(bits < 0, -magnitude, magnitude)
+    elif width == 1:
+        samples = raw.astype(np.int64)  # 8-bit WAV is unsigned
+    elif width == 3:
+        b = raw.reshape(-1, 3).astype(np.int64)
+        samples = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - 0x1000000, samples)
+    else:
+        samples = raw.view(f"<i{width}").astype(np.int64)
+    if layout.format_tag != WAVE_FORMAT_IEEE_FLOAT:
+        samples >>= layout.lsb_bit  # padding bits below the valid ones
+    return samples.reshape(-1, channels)
+
+def _pair_histogram(samples):
+    """(PAIR_BUCKETS, 2) counts of even/odd values per folded value pair"""
+    flat = samples.ravel()
+    index = ((flat >> 1) & (PAIR_BUCKETS - 1)) * 2 + (flat & 1)
+    return np.bincount(index, minlength=PAIR_BUCKETS * 2)
+
+def _spa_counts(samples):
+    """SPA pair counts over temporally adjacent samples of each channel"""
+    u = samples[:-1]
+    v = samples[1:]
+    s = (np.greater(v, u).astype(np.int64) - np.less(v, u)) * (1 - 2 * (v & 1))  # no overflow for float bits
+    k = (u >> 1) == (v >> 1)
+    table = np.bincount((s + 1 + 3 * k).ravel(), minlength=6)
+    return np.array([table[2] + table[5], table[0] + table[3], table[3:].sum(), table.sum()], dtype=np.int64)
+
+def _spa_rate(counts):
+    """SPA embedding rate, or None when too few close pairs make it meaningless"""
+    x, y, k, n = counts
+    if n == 0 or k / n < MIN_CLOSE_PAIRS:
+        return None
+    return spa_estimate({"x": x, "y": y, "k": k, "n": n})
+
+def pair_balance(pair_hist):
+    """How much more alike (2k, 2k+1) counts are than (2k+1, 2k+2) counts.
+
+    Natural audio gives about 0; LSB replacement equalises the pairs and
+    pushes it towards 1.
+    """
+    h = pair_hist.astype(np.float64)
+    within = np.abs(h[0::2] - h[1::2]).sum()
+    across = np.abs(h[1:-1:2] - h[2::2]).sum()
+    if across == 0:
+        return 0.0
+    return float(min(1.0, max(0.0, 1.0 - within / across)))
+
+def _lsb_byte_histogram(samples):
+    """Histogram of the LSB plane packed into bytes, in time order"""
+    return np.bincount(np.packbits((samples.ravel() & 1).astype(np.uint8)), minlength=256)
+
+def _entropy(byte_histogram):
+    total = byte_histogram.sum()
+    if total == 0:
+        return 0.0
+    p = byte_histogram[byte_histogram > 0] / total
+    return float(-(p * np.log2(p)).sum())
+
+def analyze_wav(input_path, window_seconds=1.0):
+    """Score a WAV file for LSB embedding in one sequential, constant-memory pass.
+
+    Returns a global report plus a per-window timeline with the SPA embedding
+    rate estimate (None where the signal is too loud for SPA), the pair
+    balance index and the entropy (bits per byte, max 8) of the packed LSB
+    plane for each window.
+    """
+    pair_hist = np.zeros(PAIR_BUCKETS * 2, dtype=np.int64)
+    lsb_hist = np.zeros(256, dtype=np.int64)
+    spa_total = np.zeros(4, dtype=np.int64)
+    timeline = []
+    layout = None
+    position = 0
+
+    for layout, frame_bytes in iter_wav_blocks(input_path, block_seconds=window_seconds):
+        samples = decode_samples(frame_bytes, layout)
+        if not len(samples):
+            continue
+
+        window_pairs = _pair_histogram(samples)
+        window_lsb = _lsb_byte_histogram(samples)
+        window_spa = _spa_counts(samples)
+        pair_hist += window_pairs
+        lsb_hist += window_lsb
+        spa_total += window_spa
+
+        rate = _spa_rate(window_spa)
+        balance = pair_balance(window_pairs)
+        start = position / layout.sample_rate
+        position += len(samples)
+        timeline.append({
+            "start": round(start, 3),
+            "end": round(position / layout.sample_rate, 3),
+            "spa": None if rate is None else round(rate, 4),
+            "pair_balance": round(balance, 4),
+            "lsb_entropy": round(_entropy(window_lsb), 4),
+            "anomalous": bool((rate or 0) > WINDOW_RATE_THRESHOLD or balance > PAIR_BALANCE_THRESHOLD),
+        })
+
+    if layout is None:
+        raise ValueError("WAV file contains no audio frames.")
+
+    rate = _spa_rate(spa_total)
+    balance = pair_balance(pair_hist)
+    anomalous = sum(1 for w in timeline if w["anomalous"])
+    return {
+        "path": input_path,
+        "codec": layout.codec,
+        "channels": layout.channels,
+        "sample_rate": layout.sample_rate,
+        "sample_width": layout.sample_width,
+        "valid_bits": layout.valid_bits,
+        "duration": round(position / layout.sample_rate, 3),
+        "spa": None if rate is None else round(rate, 4),
+        "pair_balance": round(balance, 4),
+        "lsb_entropy": round(_entropy(lsb_hist), 4),
+        "rate": round(rate or 0.0, 4),
+        "anomalous_windows": anomalous,
+        "timeline": timeline,
+        "suspicious": bool((rate or 0) > RATE_THRESHOLD or balance > PAIR_BALANCE_THRESHOLD or anomalous),
+    }
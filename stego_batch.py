@@ -0,0 +1,97 @@
+# stego_batch.py - Per-file batch jobs and result export for the GUI queue
+
+import os
+import csv
+import json
+import time
+
+from stego_manager import get_file_type, embed_message, extract_message, analyze_file
+from stego_scan import iter_supported_files
+from stego_frame import payload_fields
+
+BATCH_OPERATIONS = ("extract", "analyze", "embed")
+
+# Columns written by export_csv, in order
+CSV_FIELDS = ["path", "type", "operation", "status", "result", "output", "seconds"]
+
+def expand_paths(paths):
+    """Yield supported carrier files from a mix of file and folder paths, without duplicates"""
+    seen = set()
+    for path in paths:
+        candidates = iter_supported_files(path) if os.path.isdir(path) else [path]
+        for candidate in candidates:
+            candidate = os.path.abspath(candidate)
+            if candidate not in seen and get_file_type(candidate):
+                seen.add(candidate)
+                yield candidate
+
+def batch_output_path(file_path, output_dir, taken=()):
+    """Where an embedded copy of file_path goes: <output_dir>/<stem>_stego<ext>.
+
+    Jobs run concurrently, so a name already in taken (the outputs handed
+    to other jobs, e.g. for an img.png from another folder) gets a numbered
+    suffix instead: <stem>_stego-2<ext>, <stem>_stego-3<ext> and so on.
+    """
+    stem, ext = os.path.splitext(os.path.basename(file_path))
+    output_path = os.path.join(output_dir, f"{stem}_stego{ext}")
+    number = 1
+    while os.path.normcase(output_path) in taken:
+        number += 1
+        output_path = os.path.join(output_dir, f"{stem}_stego-{number}{ext}")
+    return output_path
+
+def batch_output_paths(file_paths, output_dir, taken=None):
+    """Distinct output paths for a batch of embed jobs; taken (normcased paths) is updated with them"""
+    taken = set() if taken is None else taken
+    output_paths = []
+    for file_path in file_paths:
+        output_paths.append(batch_output_path(file_path, output_dir, taken))
+        taken.add(os.path.normcase(output_paths[-1]))
+    return output_paths
+
+def run_batch_item(operation, file_path, message=None, output_path=None):
+    """Run one queue entry and return a JSON-serialisable record (executed on a worker process)"""
+    record = {"path": file_path, "type": get_file_type(file_path), "operation": operation}
+    start = time.perf_counter()
+    try:
+        if operation == "extract":
+            success, result = extract_message(file_path)
+        elif operation == "analyze":
+            success, result = analyze_file(file_path)
+            if success:
+                record["report"] = result
+                result = f"{'⚠️ suspicious' if result['suspicious'] else '✅ clean'} (estimated rate {result['rate']:.3f})"
+        elif operation == "embed":
+            record["output"] = output_path
+            success, result = embed_message(file_path, record["output"], message)
+        else:
+            raise ValueError(f"Unknown batch operation: {operation}")
+        record["status"] = "done" if success else "failed"
+        record.update(payload_fields(result, "result"))
+    except Exception as e:
+        record["status"] = "error"
+        record["result"] = str(e)
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+def export_json(records, output_path):
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+
+def export_csv(records, output_path):
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+
+def export_results(records, output_path):
+    """Write records as CSV or JSON depending on the file extension"""
+    try:
+        if os.path.splitext(output_path)[1].lower() == ".csv":
+            export_csv(records, output_path)
+        else:
+            export_json(records, output_path)
+        return True, f"✅ Exported {len(records)} results to: {output_path}"
+    except Exception as e:
+        return False, f"❌ Export failed: {str(e)}"
@@ -0,0 +1,298 @@
+# stego_bench.py - Throughput benchmarks on deterministic synthetic carriers
+
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import struct
+import tarfile
+import zipfile
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import numpy as np
+from PIL import Image
+
+from stego_manager import get_file_type, embed_message, extract_message
+
+SEED = 1234
+WRITE_CHUNK = 1 << 20
+
+# format -> (size unit, default size sweep)
+DEFAULT_SWEEPS = {
+    "wav": ("minutes", (0.5, 2, 5)),
+    "aiff": ("minutes", (0.5, 2)),
+    "png": ("megapixels", (1, 4, 12)),
+    "bmp": ("megapixels", (1, 4, 12)),
+    "jpg": ("megapixels", (1, 4, 12)),
+    "zip": ("gigabytes", (0.01, 0.1, 0.5)),
+    "tar": ("gigabytes", (0.01, 0.1, 0.5)),
+    "mp4": ("seconds", (5, 20)),
+    "mkv": ("seconds", (5, 20)),
+}
+
+PERCENTILES = (50, 90, 99)
+
+def benchmark_message(length=256):
+    """Fixed printable payload so every run embeds the same bytes"""
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789 "
+    rng = np.random.default_rng(SEED)
+    return "".join(alphabet[i] for i in rng.integers(0, len(alphabet), length))
+
+# -------------------------
+# Synthetic carriers
+# -------------------------
+
+def _noise_blocks(total_samples, block, seed):
+    rng = np.random.default_rng(seed)
+    for start in range(0, total_samples, block):
+        yield rng.integers(-12000, 12000, min(block, total_samples - start), dtype=np.int16)
+
+def make_wav(path, minutes, sample_rate=44100, channels=2, seed=SEED):
+    """16-bit PCM noise, written block by block"""
+    total = int(minutes * 60 * sample_rate) * channels
+    with wave.open(path, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        for block in _noise_blocks(total, WRITE_CHUNK, seed):
+            out.writeframes(block.astype("<i2").tobytes())
+
+def _extended80(value):
+    """IEEE 754 80-bit extended float, as AIFF stores its sample rate"""
+    exponent = 16383 + 63
+    mantissa = int(value)
+    while mantissa and not mantissa & (1 << 63):
+        mantissa <<= 1
+        exponent -= 1
+    return struct.pack(">HQ", exponent, mantissa)
+
+def make_aiff(path, minutes, sample_rate=44100, channels=2, seed=SEED):
+    """16-bit big-endian PCM noise in an AIFF FORM container"""
+    frames = int(minutes * 60 * sample_rate)
+    data_size = frames * channels * 2
+    with open(path, "wb") as out:
+        out.write(b"FORM" + struct.pack(">I", 4 + 26 + 16 + data_size) + b"AIFF")
+        out.write(b"COMM" + struct.pack(">IhIh", 18, channels, frames, 16) + _extended80(sample_rate))
+        out.write(b"SSND" + struct.pack(">III", 8 + data_size, 0, 0))
+        for block in _noise_blocks(frames * channels, WRITE_CHUNK, seed):
+            out.write(block.astype(">i2").tobytes())
+
+def make_image(path, megapixels, seed=SEED):
+    """A gradient with noise in 4:3, saved in the format given by the extension"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    rng = np.random.default_rng(seed)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    ramp = np.linspace(0, 200, width, dtype=np.float32)
+    for y in range(0, height, 256):
+        rows = min(256, height - y)
+        noise = rng.integers(0, 56, (rows, width, 3), dtype=np.uint8)
+        pixels[y:y + rows] = ramp[None, :, None].astype(np.uint8) + noise
+    options = {"quality": 90} if path.lower().endswith((".jpg", ".jpeg")) else {}
+    Image.fromarray(pixels).save(path, **options)
+
+def _sparse_size(gigabytes):
+    return int(gigabytes * (1 << 30)) // 512 * 512
+
+def make_tar(path, gigabytes):
+    """One member of zeros written as a hole, so an N GB tar costs no disk blocks"""
+    size = _sparse_size(gigabytes)
+    info = tarfile.TarInfo("sparse.bin")
+    info.size = size
+    info.mtime = 0
+    with open(path, "wb") as out:
+        out.write(info.tobuf(format=tarfile.GNU_FORMAT))
+        out.seek(size, os.SEEK_CUR)
+        out.write(b"\0" * (2 * tarfile.BLOCKSIZE))
+
+def make_zip(path, gigabytes):
+    """One stored member of zeros (ZIP needs the data written out for its CRC and offsets)"""
+    size = _sparse_size(gigabytes)
+    zero = bytes(WRITE_CHUNK)
+    info = zipfile.ZipInfo("sparse.bin", date_time=(1980, 1, 1, 0, 0, 0))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        with archive.open(info, "w", force_zip64=size >= 1 << 32) as member:
+            for start in range(0, size, WRITE_CHUNK):
+                member.write(zero[:min(WRITE_CHUNK, size - start)])
+
+def find_ffmpeg():
+    return shutil.which("ffmpeg")
+
+def make_video(path, seconds):
+    """Test-pattern clip with a sine tone encoded by the local ffmpeg"""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not found on PATH")
+    subprocess.run([
+        ffmpeg, "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=size=640x360:rate=25:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path,
+    ], check=True)
+
+GENERATORS = {
+    "wav": make_wav, "aiff": make_aiff,
+    "png": make_image, "bmp": make_image, "jpg": make_image,
+    "zip": make_zip, "tar": make_tar,
+    "mp4": make_video, "mkv": make_video,
+}
+
+def make_carrier(fmt, size, work_dir):
+    """Create (or reuse) the carrier for one sweep point and return its path"""
+    path = os.path.join(work_dir, f"carrier_{fmt}_{size:g}.{fmt}")
+    if not os.path.exists(path):
+        temp_path = f"{path}.tmp.{fmt}"
+        try:
+            GENERATORS[fmt](temp_path, size)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return path
+
+# -------------------------
+# Timing
+# -------------------------
+
+def summarize(latencies, carrier_bytes):
+    latencies = np.asarray(latencies, dtype=np.float64)
+    summary = {
+        "min": float(latencies.min()),
+        "mean": float(latencies.mean()),
+        "max": float(latencies.max()),
+    }
+    for q in PERCENTILES:
+        summary[f"p{q}"] = float(np.percentile(latencies, q))
+    summary["mb_per_s"] = carrier_bytes / summary["p50"] / 1e6 if summary["p50"] > 0 else None
+    return summary
+
+def time_operation(func, repeats):
+    """Run func repeats times; returns (latencies, last result)"""
+    latencies = []
+    result = (False, "not run")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+        if not result[0]:
+            break
+    return latencies, result
+
+def bench_case(fmt, size, work_dir, repeats=5, message=None):
+    """Time embed and extract on one carrier; returns one record per operation"""
+    message = message or benchmark_message()
+    unit = DEFAULT_SWEEPS[fmt][0]
+    base = {"format": fmt, "size": size, "unit": unit}
+    try:
+        carrier = make_carrier(fmt, size, work_dir)
+    except Exception as e:
+        return [dict(base, operation=op, status="skipped", error=str(e)) for op in ("embed", "extract")]
+
+    base.update(type=get_file_type(carrier), carrier_bytes=os.path.getsize(carrier))
+    output = os.path.join(work_dir, f"stego_{fmt}_{size:g}.{fmt}")
+    records = []
+    for operation, func in (
+        ("embed", lambda: embed_message(carrier, output, message)),
+        ("extract", lambda: extract_message(output)),
+    ):
+        record = dict(base, operation=operation, repeats=repeats)
+        try:
+            latencies, (success, result) = time_operation(func, repeats)
+        except Exception as e:
+            success, result, latencies = False, str(e), []
+        if success and (operation == "embed" or result == message):
+            record["status"] = "ok"
+            record.update(summarize(latencies, base["carrier_bytes"]))
+        else:
+            record["status"] = "failed"
+            record["error"] = result if not success else "extracted text does not match"
+        records.append(record)
+        if not success:
+            break  # no stego file to extract from
+    if os.path.exists(output):
+        os.remove(output)
+    return records
+
+def environment_info():
+    info = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                        cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return info
+
+def run_benchmarks(formats=None, sweeps=None, repeats=5, work_dir=None, keep_carriers=True, progress=None):
+    """Benchmark every format over its size sweep and return a JSON-serialisable report.
+
+    sweeps maps format -> sizes and overrides DEFAULT_SWEEPS; carriers are
+    kept in work_dir between runs unless keep_carriers is False.
+    """
+    formats = formats or list(DEFAULT_SWEEPS)
+    sweeps = sweeps or {}
+    work_dir = work_dir or os.path.join(os.getcwd(), "bench_carriers")
+    os.makedirs(work_dir, exist_ok=True)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "repeats": repeats,
+        "results": [],
+    }
+    for fmt in formats:
+        if fmt not in DEFAULT_SWEEPS:
+            raise ValueError(f"Unknown benchmark format: {fmt}")
+        for size in sweeps.get(fmt, DEFAULT_SWEEPS[fmt][1]):
+            for record in bench_case(fmt, size, work_dir, repeats):
+                report["results"].append(record)
+                if progress:
+                    progress(record)
+    if not keep_carriers:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+# -------------------------
+# Reports
+# -------------------------
+
+def case_key(record):
+    return record["format"], record["size"], record["operation"]
+
+def format_record(record):
+    name = f"{record['format']:<5} {record['size']:>6g} {record['unit']:<10} {record['operation']:<8}"
+    if record["status"] != "ok":
+        return f"{name} {record['status']}: {record.get('error', '')}"
+    rate = f"{record['mb_per_s']:9.1f} MB/s" if record["mb_per_s"] else ""
+    return (f"{name} p50 {record['p50'] * 1000:9.1f} ms  p90 {record['p90'] * 1000:9.1f} ms  "
+            f"p99 {record['p99'] * 1000:9.1f} ms  {rate}")
+
+def compare_reports(baseline, current):
+    """Lines comparing p50 latency per case; ratios above 1 mean the current run is slower"""
+    previous = {case_key(r): r for r in baseline["results"] if r["status"] == "ok"}
+    lines = []
+    for record in current["results"]:
+        before = previous.get(case_key(record))
+        if record["status"] != "ok" or before is None:
+            continue
+        ratio = record["p50"] / before["p50"] if before["p50"] else float("inf")
+        lines.append(f"{record['format']:<5} {record['size']:>6g} {record['operation']:<8} "
+                     f"{before['p50'] * 1000:9.1f} -> {record['p50'] * 1000:9.1f} ms  x{ratio:.2f}")
+    return lines
+
+def save_report(report, output_path):
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def load_report(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,92 @@
+# stego_bitplane.py - Bit-plane and LSB difference views for (very large) images
+
+import threading
+import numpy as np
+from PIL import Image
+
+from stego_image import UNSUPPORTED_IMAGE, is_supported_image, open_reduced
+
+# Pixels decoded for the overview; zooming past its resolution switches to full-resolution tiles
+DEFAULT_PREVIEW_PIXELS = 4_000_000
+
+# Colours for each channel's changed bits in a difference map
+DIFF_COLOURS = {"R": (255, 64, 64), "G": (64, 255, 64), "B": (64, 128, 255), "A": (255, 255, 255), "L": (255, 255, 255)}
+
+def _normalise(img):
+    if img.mode not in ("L", "RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    return img
+
+class BitPlaneSource:
+    """One image's pixels for bit-plane rendering.
+
+    A decimated preview is decoded up front; the full-resolution image is
+    only decoded the first time a view needs more detail than the preview
+    holds, and is then cropped per tile.
+    """
+
+    def __init__(self, image_path, preview_pixels=DEFAULT_PREVIEW_PIXELS):
+        if not is_supported_image(image_path):
+            raise ValueError(UNSUPPORTED_IMAGE)
+        self.image_path = image_path
+        with Image.open(image_path) as img:
+            self.size = img.size
+        preview, self.preview_scale = open_reduced(image_path, preview_pixels)
+        self.preview = np.asarray(_normalise(preview))
+        if self.preview.ndim == 2:
+            self.preview = self.preview[:, :, np.newaxis]
+        self.channels = list(_normalise(preview).getbands())
+        self._full = None
+        self._full_lock = threading.Lock()
+
+    def full_image(self):
+        with self._full_lock:
+            if self._full is None:
+                img = _normalise(Image.open(self.image_path))
+                img.load()
+                self._full = img
+            return self._full
+
+    def wants_preview(self, box, out_size):
+        """True while the preview still has at least one pixel per output pixel of the view"""
+        x0, y0, x1, y1 = box
+        sx, sy = self.preview_scale
+        return (sx, sy) == (1.0, 1.0) or ((x1 - x0) / sx >= out_size[0] and (y1 - y0) / sy >= out_size[1])
+
+    def pixels(self, box, from_preview):
+        """(rows, cols, channels) pixels of box = (x0, y0, x1, y1) given in full-resolution coordinates"""
+        x0, y0, x1, y1 = box
+        if from_preview:
+            sx, sy = self.preview_scale
+            return self.preview[int(y0 / sy):max(int(y0 / sy) + 1, int(np.ceil(y1 / sy))),
+                                int(x0 / sx):max(int(x0 / sx) + 1, int(np.ceil(x1 / sx)))]
+        region = np.asarray(self.full_image().crop(box))
+        return region[:, :, np.newaxis] if region.ndim == 2 else region
+
+def render_bit_plane(source, channel, bit, box, out_size):
+    """Render one channel's bit plane (white = 1) for a view; returns (image, stats)"""
+    from_preview = source.wants_preview(box, out_size)
+    plane = (source.pixels(box, from_preview)[:, :, source.channels.index(channel)] >> bit) & 1
+    img = Image.fromarray((plane * 255).astype(np.uint8), "L").resize(out_size, Image.NEAREST)
+    return img, {"ones": float(plane.mean()) if plane.size else 0.0, "preview": from_preview}
+
+def render_difference(source, reference, bit, box, out_size):
+    """Colour each pixel by the channels whose given bit differs from the reference image"""
+    if source.size != reference.size:
+        raise ValueError("Reference image must have the same dimensions.")
+    from_preview = (source.wants_preview(box, out_size)
+                    and source.preview.shape[:2] == reference.preview.shape[:2])
+    pixels = source.pixels(box, from_preview)
+    ref_pixels = reference.pixels(box, from_preview)
+
+    colours = np.zeros(pixels.shape[:2] + (3,), dtype=np.uint16)
+    any_changed = np.zeros(pixels.shape[:2], dtype=bool)
+    for name in source.channels:
+        if name not in reference.channels:
+            continue
+        diff = ((pixels[:, :, source.channels.index(name)]
+                 ^ ref_pixels[:, :, reference.channels.index(name)]) >> bit) & 1
+        colours += diff[:, :, np.newaxis] * np.array(DIFF_COLOURS[name], dtype=np.uint16)
+        any_changed |= diff.astype(bool)
+    img = Image.fromarray(np.minimum(colours, 255).astype(np.uint8), "RGB").resize(out_size, Image.NEAREST)
+    return img, {"changed": float(any_changed.mean()) if any_changed.size else 0.0, "preview": from_preview}
@@ -0,0 +1,322 @@
+# stego_cli.py - Command-line front end for StegLyzer
+
+import argparse
+import json
+import sys
+import os
+
+from stego_manager import embed_message, extract_message, analyze_file, list_slots, embed_sharded, extract_sharded
+
+def cmd_embed(args):
+    if args.slot:
+        if args.file or args.message is not None:
+            print("❌ Use either --slot or a single message/--file.", file=sys.stderr)
+            return 2
+        message = {}
+        for spec in args.slot:
+            name, _, path = spec.partition("=")
+            if not name or not path:
+                print(f"❌ Expected --slot NAME=FILE, got: {spec}", file=sys.stderr)
+                return 2
+            with open(path, "rb") as f:
+                message[name] = f.read()
+    elif args.file:
+        with open(args.file, "rb") as f:
+            message = f.read()
+    elif args.message is not None:
+        message = args.message
+    else:
+        print("❌ Give a message or --file.", file=sys.stderr)
+        return 2
+    success, result = embed_message(args.input, args.output, message, compression=args.compression, key=args.key)
+    print(result)
+    return 0 if success else 1
+
+def cmd_extract(args):
+    if args.list_slots:
+        success, result = list_slots(args.input, key=args.key)
+        if not success:
+            print(result)
+            return 1
+        if not result:
+            print("📄 Single payload (no named slots).")
+        for entry in result:
+            print(f"{entry.name}\t{entry.length:,} bytes\tcrc32 {entry.crc:08x}")
+        return 0
+
+    success, result = extract_message(args.input, slot=args.slot, key=args.key)
+    if not success:
+        print(result)
+        return 1
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(result if isinstance(result, bytes) else result.encode("utf-8"))
+        print(f"✅ Payload saved to: {args.output}")
+    elif isinstance(result, bytes):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(result)
+    else:
+        print(result)
+    return 0
+
+def cmd_split(args):
+    with open(args.payload, "rb") as f:
+        message = f.read()
+    os.makedirs(args.output_dir, exist_ok=True)
+    carriers = [(path, os.path.join(args.output_dir, os.path.basename(path))) for path in args.carriers]
+    success, result = embed_sharded(carriers, message, parity=not args.no_parity, workers=args.workers,
+                                    compression=args.compression, key=args.key)
+    print(result)
+    return 0 if success else 1
+
+def cmd_join(args):
+    success, result = extract_sharded(args.inputs, workers=args.workers, slot=args.slot, key=args.key)
+    if not success:
+        print(result)
+        return 1
+    with open(args.output, "wb") as f:
+        f.write(result if isinstance(result, bytes) else result.encode("utf-8"))
+    print(f"✅ Payload saved to: {args.output}")
+    return 0
+
+def cmd_analyze(args):
+    status = 0
+    for path in args.inputs:
+        success, report = analyze_file(path)
+        if not success:
+            print(f"{path}: {report}", file=sys.stderr)
+            status = 1
+        elif args.json:
+            print(json.dumps(report, ensure_ascii=False))
+        else:
+            verdict = "⚠️ suspicious" if report["suspicious"] else "✅ clean"
+            print(f"{path}: {verdict} (estimated rate {report['rate']:.3f})")
+    return status
+
+def cmd_scan(args):
+    from stego_scan import scan_directory
+
+    def report(record, stats):
+        if record.get("found"):
+            print(f"🔍 {record['path']}")
+
+    max_size = int(args.max_size_mb * 1024 * 1024) if args.max_size_mb else None
+    stats = scan_directory(
+        args.root, args.output,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        max_file_size=max_size,
+        file_timeout=args.timeout,
+        resume=not args.no_resume,
+        progress=None if args.quiet else report
+    )
+    print(f"✅ Scanned {stats['scanned']} files ({stats['resumed']} already done): "
+          f"{stats['found']} with payload, {stats['errors']} errors, {stats['skipped']} skipped.")
+    return 0
+
+def cmd_watch(args):
+    import signal
+    import threading
+    from stego_watch import WatchDaemon
+
+    def report(record, stats):
+        if record.get("found"):
+            print(f"🔍 {record['path']}", flush=True)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    start_metrics_exporters(args)
+
+    daemon = WatchDaemon(
+        args.roots, args.index,
+        results_path=args.output,
+        workers=args.workers,
+        poll_interval=args.poll_interval,
+        use_inotify=not args.poll,
+        progress=None if args.quiet else report
+    )
+    stats = daemon.run(stop_event=stop, once=args.once)
+    print(f"✅ Processed {stats['processed']} new or changed files "
+          f"({stats['unchanged']} unchanged): {stats['found']} with payload.")
+    return 0
+
+def cmd_serve(args):
+    from stego_server import serve
+    start_metrics_exporters(args)
+    max_upload = int(args.max_upload_mb * 1024 * 1024) if args.max_upload_mb else None
+    print(f"🚀 StegLyzer job service listening on http://{args.host}:{args.port}", flush=True)
+    serve(args.host, args.port, workers=args.workers, queue_size=args.queue_size,
+          job_ttl=args.job_ttl, max_upload=max_upload)
+    return 0
+
+def cmd_bench(args):
+    from stego_bench import DEFAULT_SWEEPS, run_benchmarks, format_record, save_report, load_report, compare_reports
+
+    sweeps = {}
+    for spec in args.sizes or []:
+        fmt, _, sizes = spec.partition("=")
+        sweeps[fmt] = [float(size) for size in sizes.split(",") if size]
+    formats = args.formats.split(",") if args.formats else list(DEFAULT_SWEEPS)
+
+    report = run_benchmarks(formats, sweeps, repeats=args.repeats, work_dir=args.work_dir,
+                            keep_carriers=not args.clean, progress=lambda record: print(format_record(record), flush=True))
+    save_report(report, args.output)
+    print(f"✅ Saved {len(report['results'])} results to: {args.output}")
+    if args.compare:
+        for line in compare_reports(load_report(args.compare), report):
+            print(line)
+    return 0
+
+def cmd_memcheck(args):
+    from stego_memprof import run_memory_checks, format_memory_record, save_memory_report
+
+    cases = args.cases.split(",") if args.cases else None
+    within_budget, records = run_memory_checks(cases, work_dir=args.work_dir,
+                                               progress=lambda record: print(format_memory_record(record), flush=True))
+    if args.output:
+        save_memory_report(records, args.output)
+    print("✅ All backends within their memory budgets." if within_budget else "❌ Memory budget exceeded.")
+    return 0 if within_budget else 1
+
+def start_metrics_exporters(args):
+    from stego_metrics import serve_metrics, start_textfile_writer
+    if getattr(args, "metrics_port", None):
+        serve_metrics("127.0.0.1", args.metrics_port)
+        print(f"📈 Metrics on http://127.0.0.1:{args.metrics_port}/metrics", flush=True)
+    if args.metrics_file:
+        start_textfile_writer(args.metrics_file, args.metrics_interval)
+
+def add_metrics_arguments(p, port=True):
+    if port:
+        p.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    p.add_argument("--metrics-file", default=None, help="Periodically write Prometheus metrics to this textfile")
+    p.add_argument("--metrics-interval", type=float, default=15.0, help="Seconds between textfile writes")
+
+def add_key_argument(p):
+    p.add_argument("--key", default=os.environ.get("STEGLYZER_KEY"),
+                   help="Spread LSB bits in a keyed pseudo-random order (image/WAV; default: $STEGLYZER_KEY)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="steglyzer", description="StegLyzer - A Steganography Analyzer")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print per-stage timings to stderr (in-process commands only)")
+    parser.add_argument("--profile", choices=["sample", "cprofile"], default=None,
+                        help="Save a profiler capture of every embed/extract call, worker processes included")
+    parser.add_argument("--profile-dir", default=None, help="Where captures are saved (default: ./profiles)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("embed", help="Hide a message in a carrier file")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("message", nargs="?")
+    p.add_argument("--file", default=None, help="Embed this file's bytes as a binary payload instead")
+    p.add_argument("--compression", choices=["auto", "none", "zlib", "lzma", "zstd"], default="auto")
+    p.add_argument("--slot", action="append", metavar="NAME=FILE",
+                   help="Store FILE as a named slot; repeat to embed several payloads in one carrier")
+    add_key_argument(p)
+    p.set_defaults(func=cmd_embed)
+
+    p = sub.add_parser("extract", help="Extract a hidden message from a file")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", default=None, help="Write the payload to this file")
+    p.add_argument("--slot", default=None, help="Name of the slot to extract (default: the first)")
+    p.add_argument("--list-slots", action="store_true", help="List the named slots instead of extracting")
+    add_key_argument(p)
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("split", help="Spread one payload file over several carriers, with parity")
+    p.add_argument("payload")
+    p.add_argument("carriers", nargs="+")
+    p.add_argument("-d", "--output-dir", required=True, help="Stego files are written here under the carrier names")
+    p.add_argument("--no-parity", action="store_true", help="Use every carrier for data (none may then go missing)")
+    p.add_argument("--compression", choices=["auto", "none", "zlib", "lzma", "zstd"], default="auto")
+    p.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    add_key_argument(p)
+    p.set_defaults(func=cmd_split)
+
+    p = sub.add_parser("join", help="Reassemble a payload spread over several carriers")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output", required=True, help="Write the payload to this file")
+    p.add_argument("--slot", default=None, help="Name of the slot to extract (default: the first)")
+    p.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    add_key_argument(p)
+    p.set_defaults(func=cmd_join)
+
+    p = sub.add_parser("analyze", help="Statistically test files for LSB embedding")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("--json", action="store_true", help="Print the full report as JSON Lines")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("scan", help="Scan a directory tree for files carrying a payload")
+    p.add_argument("root")
+    p.add_argument("-o", "--output", default="scan_results.jsonl", help="JSON Lines results / checkpoint file")
+    p.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--max-in-flight", type=int, default=None, help="Files queued at once (default: 4 per worker)")
+    p.add_argument("--max-size-mb", type=float, default=None, help="Skip files larger than this")
+    p.add_argument("--timeout", type=float, default=None, help="Record a file as an error after this many seconds")
+    p.add_argument("--no-resume", action="store_true", help="Start over instead of resuming from the results file")
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("watch", help="Watch drop directories and process new or changed files")
+    p.add_argument("roots", nargs="+")
+    p.add_argument("--index", default="steglyzer_index.db", help="Persistent (path, size, mtime, inode) index")
+    p.add_argument("-o", "--output", default=None, help="Also append results to this JSON Lines file")
+    p.add_argument("-j", "--workers", type=int, default=None)
+    p.add_argument("--poll", action="store_true", help="Use polling instead of inotify")
+    p.add_argument("--poll-interval", type=float, default=30.0, help="Seconds between polling passes")
+    p.add_argument("--once", action="store_true", help="Process changes since the last run and exit")
+    p.add_argument("-q", "--quiet", action="store_true")
+    add_metrics_arguments(p)
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("serve", help="Run the local HTTP job service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--queue-size", type=int, default=64, help="Jobs accepted before clients get 503")
+    p.add_argument("--job-ttl", type=float, default=3600, help="Seconds to keep finished jobs")
+    p.add_argument("--max-upload-mb", type=float, default=None)
+    add_metrics_arguments(p, port=False)  # GET /metrics on the service port
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("bench", help="Time embed/extract on synthetic carriers and save a JSON report")
+    p.add_argument("--formats", default=None, help="Comma-separated, e.g. wav,png,zip (default: all)")
+    p.add_argument("--sizes", action="append", metavar="FMT=S1,S2",
+                   help="Size sweep for one format, in its unit (minutes, megapixels, GB, seconds)")
+    p.add_argument("--repeats", type=int, default=5, help="Timed runs per operation")
+    p.add_argument("--work-dir", default=None, help="Where carriers are generated and reused (default: ./bench_carriers)")
+    p.add_argument("--clean", action="store_true", help="Delete the generated carriers afterwards")
+    p.add_argument("-o", "--output", default="bench_results.json")
+    p.add_argument("--compare", default=None, help="Earlier report to compare p50 latencies against")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("memcheck", help="Measure peak memory per backend and fail on budget overruns")
+    p.add_argument("--cases", default=None, help="Comma-separated case names (default: all in stego_memprof)")
+    p.add_argument("--work-dir", default=None, help="Where carriers are generated and reused (default: ./bench_carriers)")
+    p.add_argument("-o", "--output", default=None, help="Also save the records as JSON")
+    p.set_defaults(func=cmd_memcheck)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        # Environment variables reach the scan/watch/serve worker processes as well
+        from stego_profile import PROFILE_ENV, PROFILE_DIR_ENV, profile_dir
+        os.environ[PROFILE_ENV] = args.profile
+        if args.profile_dir:
+            os.environ[PROFILE_DIR_ENV] = os.path.abspath(args.profile_dir)
+        print(f"⏱️ Saving {args.profile} profiles to: {profile_dir()}", file=sys.stderr)
+    if not args.timings:
+        return args.func(args)
+
+    from stego_instrument import collect_spans, format_spans
+    with collect_spans() as spans:
+        status = args.func(args)
+    print(format_spans(spans), file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+# stego_frame.py - Versioned, checksummed and optionally compressed payload frames
+#
+# A carrier holds either one frame or a slot container: a frame whose body is
+# an index of named slots (offset, length, CRC32), followed by one complete
+# frame per slot. Extractors read the header and index, then jump to a slot.
+
+import lzma
+import zlib
+import base64
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # optional; zstd frames then fail to decode with a clear error
+    zstandard = None
+
+# magic, version, flags, stored length, original length, CRC32 of the stored bytes
+MAGIC = b"SGLZ"
+VERSION = 1
+HEADER = struct.Struct(">4sBBIII")
+HEADER_SIZE = HEADER.size
+
+COMPRESSION_MASK = 0x03
+FLAG_BINARY = 0x04  # payload is bytes rather than UTF-8 text
+FLAG_CONTAINER = 0x08  # body is a slot index; raw length is the whole container
+COMPRESSIONS = {"none": 0, "zlib": 1, "lzma": 2, "zstd": 3}
+COMPRESSION_NAMES = {code: name for name, code in COMPRESSIONS.items()}
+
+# Payloads shorter than this are stored as-is; the compressor's own header would eat the gain
+MIN_COMPRESS_SIZE = 64
+
+# Largest original length a frame may declare; a few stored bytes must not inflate into gigabytes
+MAX_RAW_LENGTH = 256 * 1024 * 1024
+
+# Prefix of a frame stored in a text field (audio tags, video metadata)
+TEXT_PREFIX = "SGLZ:"
+
+# Slot index: entry count, then per slot its offset (after the index), length, CRC32 and name
+SLOT_COUNT = struct.Struct(">H")
+SLOT_ENTRY = struct.Struct(">IIIB")
+MAX_SLOT_NAME = 255
+
+class FrameError(ValueError):
+    """A frame with our magic that is truncated, corrupt or of an unknown version"""
+
+class EncodedFrame(bytes):
+    """A complete frame; backends handed one embed it as-is instead of framing it again"""
+
+@dataclass
+class FrameHeader:
+    version: int
+    flags: int
+    length: int
+    raw_length: int
+    crc: int
+
+    @property
+    def compression(self):
+        return COMPRESSION_NAMES[self.flags & COMPRESSION_MASK]
+
+    @property
+    def binary(self):
+        return bool(self.flags & FLAG_BINARY)
+
+    @property
+    def container(self):
+        return bool(self.flags & FLAG_CONTAINER)
+
+    @property
+    def index_size(self):
+        """Bytes up to the end of this header's body (the index, for containers)"""
+        return HEADER_SIZE + self.length
+
+    @property
+    def total_size(self):
+        """Bytes the whole frame occupies in the carrier, slots included"""
+        return self.raw_length if self.container else self.index_size
+
+@dataclass
+class SlotEntry:
+    name: str
+    offset: int
+    length: int
+    crc: int
+
+def _compress(name, data):
+    if name == "zlib":
+        return zlib.compress(data, 6)
+    if name == "lzma":
+        return lzma.compress(data, preset=6)
+    if name == "zstd":
+        if zstandard is None:
+            raise FrameError("zstd compression needs the 'zstandard' package.")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+CODEC_ERRORS = (zlib.error, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+def _decompress(name, data, max_length):
+    """Inflate data, stopping after max_length + 1 bytes so oversized output shows as a length mismatch"""
+    if name == "none":
+        return data
+    try:
+        if name == "zlib":
+            decompressor = zlib.decompressobj()
+            raw = decompressor.decompress(data, max_length + 1)
+            complete = decompressor.eof
+        elif name == "lzma":
+            decompressor = lzma.LZMADecompressor()
+            raw = decompressor.decompress(data, max_length + 1)
+            complete = decompressor.eof
+        else:
+            if zstandard is None:
+                raise FrameError("This payload is zstd-compressed; install 'zstandard' to read it.")
+            # The frame's own content size is not trusted, so read through a bounded stream
+            reader = zstandard.ZstdDecompressor().stream_reader(data)
+            raw = bytearray()
+            while len(raw) <= max_length:
+                chunk = reader.read(max_length + 1 - len(raw))
+                if not chunk:
+                    break
+                raw += chunk
+            raw, complete = bytes(raw), True
+    except CODEC_ERRORS as e:
+        raise FrameError(f"Corrupt compressed payload: {e}")
+    if not complete and len(raw) <= max_length:
+        raise FrameError("Corrupt compressed payload: stream is truncated.")
+    return raw
+
+def encode_frame(payload, compression="auto"):
+    """Frame a str or bytes payload.
+
+    compression is "none", "zlib", "lzma", "zstd" or "auto" (the smaller of
+    zlib and, when installed, zstd; kept only if it actually saves space).
+    """
+    binary = isinstance(payload, (bytes, bytearray, memoryview))
+    raw = bytes(payload) if binary else payload.encode("utf-8")
+    if compression == "auto":
+        candidates = ["zlib"] + (["zstd"] if zstandard is not None else [])
+        stored, method = raw, "none"
+        if len(raw) >= MIN_COMPRESS_SIZE:
+            for name in candidates:
+                packed = _compress(name, raw)
+                if len(packed) < len(stored):
+                    stored, method = packed, name
+    elif compression in COMPRESSIONS:
+        stored, method = _compress(compression, raw), compression
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+
+    flags = COMPRESSIONS[method] | (FLAG_BINARY if binary else 0)
+    header = HEADER.pack(MAGIC, VERSION, flags, len(stored), len(raw), zlib.crc32(stored))
+    return EncodedFrame(header + stored)
+
+def as_frame(payload, compression="auto"):
+    """payload itself when it is already a frame, otherwise a new frame"""
+    return payload if isinstance(payload, EncodedFrame) else encode_frame(payload, compression)
+
+def parse_header(data):
+    """FrameHeader from the first HEADER_SIZE bytes, or None when they are not a frame.
+
+    This is the fast reject: extractors read HEADER_SIZE bytes and stop on None.
+    """
+    if len(data) < HEADER_SIZE:
+        return None
+    magic, version, flags, length, raw_length, crc = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        return None
+    if version != VERSION:
+        raise FrameError(f"Unsupported payload frame version {version}.")
+    if length > MAX_RAW_LENGTH:
+        raise FrameError(f"Payload frame claims {length:,} stored bytes, more than the {MAX_RAW_LENGTH:,} allowed.")
+    return FrameHeader(version, flags, length, raw_length, crc)
+
+def decode_body(header, body):
+    """Verify and unpack the stored bytes that follow a parsed header"""
+    if len(body) < header.length:
+        raise FrameError("Truncated payload.")
+    if header.raw_length > MAX_RAW_LENGTH:
+        raise FrameError(f"Payload claims {header.raw_length:,} bytes, more than the {MAX_RAW_LENGTH:,} allowed.")
+    body = bytes(body[:header.length])
+    if zlib.crc32(body) != header.crc:
+        raise FrameError("Payload checksum mismatch.")
+    raw = _decompress(header.compression, body, header.raw_length)
+    if len(raw) != header.raw_length:
+        raise FrameError("Payload length mismatch.")
+    if header.binary:
+        return raw
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        raise FrameError("Payload is not valid UTF-8 text.")
+
+def decode_frame(data, slot=None):
+    """Payload (str or bytes) of a complete frame or of one of its slots; FrameError if data is not one"""
+    payload = read_payload(lambda offset, count: data[offset:offset + count], slot)
+    if payload is None:
+        raise FrameError("No payload frame found.")
+    return payload
+
+# -------------------------
+# Slot containers
+# -------------------------
+
+def encode_container(slots, compression="auto"):
+    """Frame a {name: str or bytes payload} mapping as a slot container.
+
+    Each slot is an ordinary frame (compressed on its own), so one can be
+    decoded without touching the others.
+    """
+    if not slots:
+        raise ValueError("A slot container needs at least one slot.")
+    if len(slots) > 0xFFFF:
+        raise ValueError("Too many slots.")
+    entries, frames, offset = [], [], 0
+    for name, payload in slots.items():
+        encoded_name = str(name).encode("utf-8")
+        if not encoded_name or len(encoded_name) > MAX_SLOT_NAME:
+            raise ValueError(f"Slot names must be 1 to {MAX_SLOT_NAME} bytes: {name!r}")
+        frame = encode_frame(payload, compression)
+        entries.append(SLOT_ENTRY.pack(offset, len(frame), zlib.crc32(frame), len(encoded_name)) + encoded_name)
+        frames.append(frame)
+        offset += len(frame)
+    index = SLOT_COUNT.pack(len(entries)) + b"".join(entries)
+    total = HEADER_SIZE + len(index) + offset
+    header = HEADER.pack(MAGIC, VERSION, FLAG_CONTAINER, len(index), total, zlib.crc32(index))
+    return EncodedFrame(header + index + b"".join(frames))
+
+def encode_payload(payload, compression="auto"):
+    """A container for a mapping of named payloads, otherwise a single frame"""
+    if isinstance(payload, dict):
+        return encode_container(payload, compression)
+    return as_frame(payload, compression)
+
+def decode_index(header, body):
+    """SlotEntry list of a container whose index body follows header"""
+    if len(body) < header.length:
+        raise FrameError("Truncated slot index.")
+    body = bytes(body[:header.length])
+    if zlib.crc32(body) != header.crc:
+        raise FrameError("Slot index checksum mismatch.")
+    if len(body) < SLOT_COUNT.size:
+        raise FrameError("Truncated slot index.")
+    (count,), position = SLOT_COUNT.unpack_from(body), SLOT_COUNT.size
+    if count == 0:
+        raise FrameError("Empty slot container.")
+    entries = []
+    for _ in range(count):
+        if position + SLOT_ENTRY.size > len(body):
+            raise FrameError("Truncated slot index.")
+        offset, length, crc, name_length = SLOT_ENTRY.unpack_from(body, position)
+        position += SLOT_ENTRY.size
+        name = body[position:position + name_length].decode("utf-8", errors="replace")
+        position += name_length
+        if header.index_size + offset + length > header.total_size:
+            raise FrameError(f"Slot '{name}' lies outside the container.")
+        entries.append(SlotEntry(name, offset, length, crc))
+    return entries
+
+def find_slot(entries, name=None):
+    """The entry called name, or the first slot when name is None"""
+    if not entries:
+        raise FrameError("Empty slot container.")
+    if name is None:
+        return entries[0]
+    for entry in entries:
+        if entry.name == name:
+            return entry
+    raise FrameError(f"No slot named '{name}' (slots: {', '.join(e.name for e in entries)}).")
+
+def read_index(read):
+    """Slot entries through read(offset, count) (see read_payload); [] for a single payload, None for no frame"""
+    header = parse_header(read(0, HEADER_SIZE))
+    if header is None:
+        return None
+    if not header.container:
+        return []
+    return decode_index(header, read(HEADER_SIZE, header.length))
+
+def read_payload(read, slot=None):
+    """Payload of the frame behind read(offset, count), or None when there is no frame.
+
+    read returns up to count bytes at offset in the stored frame (fewer at
+    the end of the carrier), so backends can map it onto a file seek or an
+    LSB bit range. Only the header, the index and the requested slot are
+    read; slot None means the only payload, or the first slot.
+    """
+    header = parse_header(read(0, HEADER_SIZE))
+    if header is None:
+        return None
+    if not header.container:
+        if slot is not None:
+            raise FrameError(f"No slot named '{slot}': this file holds a single payload.")
+        return decode_body(header, read(HEADER_SIZE, header.length))
+    entry = find_slot(decode_index(header, read(HEADER_SIZE, header.length)), slot)
+    data = read(header.index_size + entry.offset, entry.length)
+    if len(data) < entry.length:
+        raise FrameError(f"Slot '{entry.name}' is truncated.")
+    if zlib.crc32(data) != entry.crc:
+        raise FrameError(f"Slot '{entry.name}' checksum mismatch.")
+    return decode_frame(data)
+
+# -------------------------
+# Bit and text encodings
+# -------------------------
+
+def to_bits(data):
+    """Bits of data, most significant first, as a uint8 array of 0/1"""
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+def from_bits(bits):
+    """Inverse of to_bits for a whole number of bytes"""
+    return np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+
+def frame_to_text(frame):
+    """ASCII form of a frame for text-only fields such as audio tags and video metadata"""
+    return TEXT_PREFIX + base64.b64encode(frame).decode("ascii")
+
+def text_to_payload(text, slot=None):
+    """Payload of a text field written by frame_to_text; other text is returned unchanged (legacy)"""
+    if not text.startswith(TEXT_PREFIX):
+        if slot is not None:
+            raise FrameError(f"No slot named '{slot}': this file holds a single payload.")
+        return text
+    try:
+        frame = base64.b64decode(text[len(TEXT_PREFIX):], validate=True)
+    except ValueError:
+        raise FrameError("Corrupt payload encoding.")
+    return decode_frame(frame, slot)
+
+def payload_fields(payload, key="message"):
+    """JSON-safe record fields for a payload: text as-is, bytes as base64"""
+    if isinstance(payload, (bytes, bytearray)):
+        return {key: base64.b64encode(payload).decode("ascii"), f"{key}_encoding": "base64"}
+    return {key: payload}
@@ -3,66 +3,347 @@
 from stegano import lsb
 from PIL import Image, ImageFile
 import os
+import math
+from contextlib import contextmanager
+import numpy as np
+from stego_progress import report_progress, check_cancelled
+from stego_frame import HEADER_SIZE, FrameError, as_frame, read_payload, read_index, to_bits, from_bits
+from stego_instrument import span
+from stego_spread import KeyedPermutation
+from stego_jpeg import JpegCoefficients, JpegUnsupported
+from stego_multiframe import MULTIFRAME_TYPES, FrameCarrier, open_frames, save_frames
 
 # Allow very large images without warnings
 Image.MAX_IMAGE_PIXELS = None
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
-# Supported formats (JPGs will be converted)
-SUPPORTED_IMAGE_TYPES = [".png", ".bmp", ".jpg", ".jpeg"]
+# Supported formats (JPEGs carry the payload in their DCT coefficients; GIF, TIFF,
+# WebP and animated PNG keep every frame, see stego_multiframe)
+SUPPORTED_IMAGE_TYPES = [".png", ".bmp", ".jpg", ".jpeg"] + MULTIFRAME_TYPES
+UNSUPPORTED_IMAGE = "Only PNG, BMP, JPEG, GIF, TIFF and WebP images are supported."
 
 def is_supported_image(file_path: str) -> bool:
     """Check if the file extension is a supported image type."""
     ext = os.path.splitext(file_path)[-1].lower()
     return ext in SUPPORTED_IMAGE_TYPES
 
-def convert_jpg_to_png(input_path: str) -> str:
-    """Convert JPG/JPEG to PNG to ensure LSB stego works reliably."""
-    output_path = os.path.splitext(input_path)[0] + "_converted.png"
+def is_jpeg_file(file_path: str) -> bool:
+    """True when the file content is JPEG (older stego '.jpg' outputs hold PNG data)."""
+    with open(file_path, "rb") as f:
+        return f.read(2) == b"\xff\xd8"
+
+def is_multiframe_image(file_path: str) -> bool:
+    """True for carriers written frame by frame: GIF, TIFF, WebP and animated PNG"""
+    ext = os.path.splitext(file_path)[-1].lower()
+    if ext in MULTIFRAME_TYPES:
+        return True
+    if ext != ".png":
+        return False
+    with Image.open(file_path) as img:
+        return getattr(img, "n_frames", 1) > 1
+
+def _load_jpeg(image_path):
+    with span("read_jpeg") as s, open(image_path, "rb") as f:
+        data = f.read()
+        s.add_bytes(len(data))
+    return JpegCoefficients(data)
+
+def open_reduced(image_path: str, max_pixels: int):
+    """Open an image at no more than about max_pixels while keeping real sample values.
+
+    JPEGs are decoded at a reduced DCT scale with draft(); the result is then
+    decimated with nearest-neighbour sampling, because box filtering
+    (reduce()) would average away the low bits. Returns (image, (sx, sy)),
+    the scale being full-resolution pixels per returned pixel.
+    """
+    img = Image.open(image_path)
+    width, height = img.size
+    factor = max(1, math.ceil(math.sqrt(width * height / max_pixels)))
+    target = (max(1, width // factor), max(1, height // factor))
+    if factor > 1 and img.format == "JPEG":
+        img.draft(img.mode, target)
+    if img.size != target:
+        img = img.resize(target, Image.NEAREST)
+    return img, (width / img.width, height / img.height)
+
+def _load_pixels(image_path):
+    """Pixel array and mode for LSB work: RGB or RGBA, other modes converted to RGB"""
+    with Image.open(image_path) as img:
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        return np.array(img), img.mode
+
+def _spread_indices(pixels, permutation, start, stop):
+    """Indices into pixels.reshape(-1) of payload bits start..stop-1 under a keyed permutation"""
+    positions = permutation.range(start, stop)
+    channels = pixels.shape[2]
+    if channels == 3:
+        return positions
+    return positions // np.uint64(3) * np.uint64(channels) + positions % np.uint64(3)  # skip alpha
+
+def _lsb_reader(pixels, permutation=None):
+    """read(offset, count) over the bytes stored in the R, G, B least significant bits.
+
+    Bits run row by row, or at keyed positions when a permutation is given.
+    Only the requested bit range is touched, so a slot is read without
+    walking the slots stored before it.
+    """
+    row_bits = pixels.shape[1] * 3
+    available = pixels.shape[0] * row_bits // 8
+
+    def read(offset, count):
+        count = max(0, min(count, available - offset))
+        start, end = offset * 8, (offset + count) * 8
+        if permutation is not None:
+            return from_bits(pixels.reshape(-1)[_spread_indices(pixels, permutation, start, end)] & 1)
+        first, last = start // row_bits, -(-end // row_bits)
+        bits = pixels[first:last, :, :3].reshape(-1)[start - first * row_bits:end - first * row_bits] & 1
+        return from_bits(bits)
+    return read
+
+def _has_legacy_prefix(read, capacity):
+    """True when the LSB bytes start like stegano's "<length>:" header with a length that fits.
+
+    lsb.reveal decodes pixel by pixel until it finds the ':', which takes
+    minutes on a large clean image; this reads a dozen bytes instead.
+    """
+    head = read(0, len(str(capacity)) + 1)
+    colon = head.find(b":")
+    if colon < 1 or not head[:colon].isdigit():
+        return False
+    return 0 < int(head[:colon]) <= capacity - colon - 1
+
+def _permutation(pixels, key):
+    return KeyedPermutation(key, pixels.shape[0] * pixels.shape[1] * 3) if key else None
+
+def _coefficient_reader(jpeg, key=None):
+    """read(offset, count) over the bytes stored in a JPEG's usable AC coefficients.
+
+    Unkeyed reads decode the scan only as far as the requested bits; a key
+    needs the full coefficient count to build its permutation.
+    """
+    if key:
+        every = jpeg.positions()
+        permutation = KeyedPermutation(key, len(every)) if len(every) else None
+
+    def read(offset, count):
+        start, end = offset * 8, (offset + count) * 8
+        if key:
+            end = min(end, len(every) // 8 * 8)
+            positions = every[permutation.range(start, end)] if permutation and end > start else every[:0]
+        else:
+            positions = jpeg.positions(end)[start:]
+            positions = positions[:len(positions) // 8 * 8]
+        return from_bits(jpeg.read_bits(positions))
+    return read
+
+def _embed_in_jpeg(cover_image_path, output_image_path, bits, key, progress=None, cancel=None):
+    """Write the bits into the cover's AC coefficients; headers, tables and other segments are kept"""
+    report_progress(progress, 0.1, "Reading JPEG")
+    jpeg = _load_jpeg(cover_image_path)
+    check_cancelled(cancel)
+    report_progress(progress, 0.2, "Decoding scan")
+    with span("decode_scan") as s:
+        positions = jpeg.positions() if key else jpeg.positions(len(bits))
+        s.add_bytes(len(jpeg.buffer))
+    if len(positions) < len(bits):
+        capacity = jpeg.capacity_bits() // 8 - HEADER_SIZE
+        return False, f"❌ Message too large. Max capacity: {max(0, capacity)} bytes"
+    if key:
+        positions = positions[KeyedPermutation(key, len(positions)).range(0, len(bits))]
+
+    check_cancelled(cancel)
+    report_progress(progress, 0.7, "Writing JPEG")
+    with span("encode_jpeg") as s:
+        jpeg.write(output_image_path, positions, bits)
+        s.add_bytes(os.path.getsize(output_image_path))
+    report_progress(progress, 1.0, "Done")
+    return True, f"✅ Message embedded in JPEG coefficients: {output_image_path}"
+
+def _frame_reader(carrier, key=None):
+    """read(offset, count) over the bytes stored in a multi-frame image's samples.
+
+    Unkeyed reads decode only the frames the requested bits lie in; a key
+    needs every frame's sample count to build its permutation.
+    """
+    if key:
+        total = carrier.available()
+        permutation = KeyedPermutation(key, total) if total else None
+
+    def read(offset, count):
+        start, end = offset * 8, (offset + count) * 8
+        if key:
+            end = min(end, total // 8 * 8)
+            positions = permutation.range(start, end) if permutation and end > start else []
+        else:
+            end = min(end, carrier.available(end) // 8 * 8)
+            positions = range(start, max(start, end))
+        return from_bits(carrier.read_bits(positions))
+    return read
+
+def _tracked_frames(frames, total, progress=None, cancel=None):
+    for number, frame in enumerate(frames, 1):
+        check_cancelled(cancel)
+        report_progress(progress, 0.3 + 0.6 * number / total, f"Encoding frame {number}/{total}")
+        yield frame
+
+def _embed_in_frames(cover_image_path, output_image_path, bits, key, progress=None, cancel=None):
+    """Write the bits across the frames of a GIF, TIFF, WebP or APNG and save it in the same format.
+
+    Frames are read lazily from the cover while they are encoded, so the
+    result is written next to the output and moved into place once it is
+    complete; the output may be the cover itself.
+    """
+    report_progress(progress, 0.1, "Reading frames")
+    temp_path = f"{output_image_path}.{os.getpid()}.tmp"
     try:
-        img = Image.open(input_path)
-        img = img.convert("RGB")  # Remove alpha if present
-        img.save(output_path, "PNG", optimize=False)
-        return output_path
-    except Exception as e:
-        raise ValueError(f"❌ JPG conversion failed: {str(e)}")
+        with open_frames(cover_image_path) as img:
+            carrier = FrameCarrier(img)
+            with span("count_frames", frames=carrier.n_frames):
+                available = carrier.available(None if key else len(bits))
+            if available < len(bits):
+                capacity = carrier.available() // 8 - HEADER_SIZE
+                return False, f"❌ Message too large. Max capacity: {max(0, capacity)} bytes"
+            positions = KeyedPermutation(key, available).range(0, len(bits)) if key else range(len(bits))
 
-def embed_text_in_image(cover_image_path: str, output_image_path: str, secret_text: str):
-    """Embed secret text into an image using LSB steganography."""
-    if not is_supported_image(cover_image_path):
-        raise ValueError("Only PNG, BMP, JPG, and JPEG images are supported.")
+            check_cancelled(cancel)
+            with span("encode_frames", frames=carrier.n_frames) as s:
+                frames = _tracked_frames(carrier.frames(positions, bits), carrier.n_frames, progress, cancel)
+                save_frames(img, frames, temp_path)
+                s.add_bytes(os.path.getsize(temp_path))
+            image_format = img.format
 
-    # Convert JPG/JPEG before embedding
-    ext = os.path.splitext(cover_image_path)[-1].lower()
-    if ext in [".jpg", ".jpeg"]:
-        cover_image_path = convert_jpg_to_png(cover_image_path)
+        # GIF, APNG and WebP encoders fold a frame identical to the one before into it, which moves the bits
+        with Image.open(temp_path) as written:
+            merged = getattr(written, "n_frames", 1) != carrier.n_frames
+        if merged:
+            return False, (f"❌ The {image_format} encoder merged repeated frames of this carrier, "
+                           "which would lose the payload. Use a carrier without repeated frames.")
+        os.replace(temp_path, output_image_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    report_progress(progress, 1.0, "Done")
+    return True, f"✅ Message embedded in {carrier.n_frames} {image_format} frame(s): {output_image_path}"
+
+def embed_text_in_image(cover_image_path: str, output_image_path: str, secret_text,
+                        progress=None, cancel=None, key=None):
+    """Embed a text or binary payload frame in the RGB least significant bits of an image.
+
+    JPEGs keep their format: the bits go into quantized AC coefficients (see
+    stego_jpeg). Progressive and other non-sequential JPEGs are decoded and
+    saved as PNG data instead. GIF, TIFF, WebP and animated PNG carriers keep
+    their format and every frame (see stego_multiframe). With a key the bits
+    are scattered over the whole carrier in a keyed pseudo-random order
+    instead of filling it in order.
+    """
+    if not is_supported_image(cover_image_path):
+        raise ValueError(UNSUPPORTED_IMAGE)
 
     try:
-        # Hide the message
-        secret_image = lsb.hide(cover_image_path, secret_text)
+        check_cancelled(cancel)
+        bits = to_bits(as_frame(secret_text))
+        note = ""
+        if is_jpeg_file(cover_image_path):
+            try:
+                return _embed_in_jpeg(cover_image_path, output_image_path, bits, key, progress, cancel)
+            except JpegUnsupported:
+                note = " (progressive JPEG: saved as PNG data)"
+        elif is_multiframe_image(cover_image_path):
+            return _embed_in_frames(cover_image_path, output_image_path, bits, key, progress, cancel)
+
+        report_progress(progress, 0.1, "Reading image")
+        pixels, mode = _load_pixels(cover_image_path)
+        height, width = pixels.shape[:2]
+        if len(bits) > height * width * 3:
+            return False, f"❌ Message too large. Max capacity: {height * width * 3 // 8 - HEADER_SIZE} bytes"
+
+        check_cancelled(cancel)
+        report_progress(progress, 0.4, "Embedding bits")
+        with span("embed_bits", bits=len(bits), spread=bool(key)) as s:
+            if key:
+                flat = pixels.reshape(-1)
+                index = _spread_indices(pixels, _permutation(pixels, key), 0, len(bits))
+                flat[index] = (flat[index] & 0xFE) | bits
+                s.add_bytes(len(bits))
+            else:
+                # Only the rows that carry bits are touched
+                rows = -(-len(bits) // (width * 3))
+                region = pixels[:rows, :, :3].reshape(-1)
+                region[:len(bits)] = (region[:len(bits)] & 0xFE) | bits
+                pixels[:rows, :, :3] = region.reshape(rows, width, 3)
+                s.add_bytes(rows * width * 3)
 
         # Save safely for large PNGs
-        secret_image.save(output_image_path, format="PNG", optimize=False)
+        check_cancelled(cancel)
+        report_progress(progress, 0.6, "Saving image")
+        with span("encode_png") as s:
+            Image.fromarray(pixels, mode).save(output_image_path, format="PNG", optimize=False)
+            s.add_bytes(os.path.getsize(output_image_path))
 
-        return True, f"✅ Message embedded successfully in: {output_image_path}"
+        report_progress(progress, 1.0, "Done")
+        return True, f"✅ Message embedded successfully in: {output_image_path}{note}"
     except Exception as e:
         return False, f"❌ Failed to embed message: {str(e)}"
 
-def extract_text_from_image(stego_image_path: str):
-    """Extract hidden text from an image using LSB steganography."""
-    if not is_supported_image(stego_image_path):
-        raise ValueError("Only PNG, BMP, JPG, and JPEG images are supported.")
+@contextmanager
+def _payload_reader(stego_image_path, key=None):
+    """(read, pixels) for the image's payload bits; pixels is None unless they are a single frame's LSBs"""
+    if is_jpeg_file(stego_image_path):
+        try:
+            jpeg = _load_jpeg(stego_image_path)
+        except JpegUnsupported:
+            jpeg = None
+        if jpeg is not None:
+            yield _coefficient_reader(jpeg, key), None
+            return
+    elif is_multiframe_image(stego_image_path):
+        with open_frames(stego_image_path) as img:
+            yield _frame_reader(FrameCarrier(img), key), None
+        return
+    pixels, _ = _load_pixels(stego_image_path)
+    yield _lsb_reader(pixels, _permutation(pixels, key)), pixels
+
+def read_image_index(stego_image_path: str, key=None):
+    """Slot index of an image's payload (see stego_frame.read_index)"""
+    with _payload_reader(stego_image_path, key) as (read, _):
+        return read_index(read)
 
-    # Convert JPG/JPEG before extraction
-    ext = os.path.splitext(stego_image_path)[-1].lower()
-    if ext in [".jpg", ".jpeg"]:
-        stego_image_path = convert_jpg_to_png(stego_image_path)
+def extract_text_from_image(stego_image_path: str, progress=None, cancel=None, slot=None, key=None):
+    """Extract a hidden payload frame, or one named slot of it.
+
+    JPEGs are read from their AC coefficients, decoding only as much of the
+    scan as the requested bits need; multi-frame images decode only the
+    frames the bits lie in. With a key only the keyed positions of the bits
+    being read are computed. PNG/BMP images without a frame fall back to
+    stegano's legacy format when their first bytes hold its length prefix.
+    """
+    if not is_supported_image(stego_image_path):
+        raise ValueError(UNSUPPORTED_IMAGE)
 
     try:
-        message = lsb.reveal(stego_image_path)
-        if message:
+        check_cancelled(cancel)
+        report_progress(progress, 0.2, "Reading bits")
+        with span("extract_bits") as s:
+            s.add_bytes(os.path.getsize(stego_image_path))
+            with _payload_reader(stego_image_path, key) as (read, pixels):
+                message = read_payload(read, slot)
+            framed = message is not None
+            if not framed:
+                if key:
+                    return False, "⚠️ No hidden message found for this key."
+                if slot is not None:
+                    return False, "⚠️ No payload slots found."
+                if pixels is None or not _has_legacy_prefix(read, pixels.shape[0] * pixels.shape[1] * 3 // 8):
+                    return False, "⚠️ No hidden message found."
+                del pixels, read
+                message = lsb.reveal(stego_image_path)  # written before payload frames
+        report_progress(progress, 1.0, "Done")
+        if framed or message:
             return True, message
         else:
             return False, "⚠️ No hidden message found."
+    except FrameError as e:
+        return False, f"❌ {str(e)}"
     except Exception as e:
         return False, f"❌ Error extracting message: {str(e)}"
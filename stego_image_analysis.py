@@ -0,0 +1,281 @@
+# stego_image_analysis.py - Statistical LSB steganalysis for images (chi-square, RS, SPA)
+
+import math
+import numpy as np
+from PIL import Image
+
+from stego_image import is_supported_image
+
+# Images above this many pixels are analysed on an evenly spaced subset of rows.
+# Every estimator below works on horizontal neighbours, so row sampling keeps
+# them unbiased while bounding the work per image.
+DEFAULT_MAX_PIXELS = 2_000_000
+
+# Regions (and whole images) whose estimated embedding rate exceeds these are flagged
+RATE_THRESHOLD = 0.05
+REGION_RATE_THRESHOLD = 0.15
+CHI_SQUARE_THRESHOLD = 0.95
+
+# -------------------------
+# Loading
+# -------------------------
+
+def load_planes(image_path, max_pixels=DEFAULT_MAX_PIXELS):
+    """Return (planes, row_indices, (width, height), channel_names).
+
+    planes is a (channels, rows, width) uint8 array holding the sampled rows.
+    """
+    img = Image.open(image_path)
+    width, height = img.size
+    if img.mode not in ("L", "RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    channel_names = [b for b in img.getbands() if b != "A"]
+
+    pixels = np.asarray(img)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+    pixels = pixels[:, :, :len(channel_names)]
+
+    step = 1
+    if max_pixels and width * height > max_pixels:
+        step = int(math.ceil(width * height / max_pixels))
+    rows = np.arange(0, height, step)
+    planes = np.ascontiguousarray(pixels[::step].transpose(2, 0, 1))
+    return planes, rows, (width, height), channel_names
+
+def _region_ids(rows, width, height, grid):
+    """Region index (row-major over a grid x grid layout) for every sampled pixel"""
+    region_row = np.minimum(rows * grid // height, grid - 1)
+    region_col = np.minimum(np.arange(width) * grid // width, grid - 1)
+    return (region_row[:, np.newaxis] * grid + region_col[np.newaxis, :]).astype(np.int64)
+
+# -------------------------
+# Chi-square Attack
+# -------------------------
+
+def _chi2_sf(x, dof):
+    """Survival function of the chi-square distribution (regularized upper gamma Q)"""
+    if dof <= 0:
+        return 0.0
+    a, x = dof / 2.0, x / 2.0
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # Series for the lower gamma P(a, x)
+        term = total = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-12:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    # Continued fraction for Q(a, x) (modified Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-12:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+def chi_square_probability(histogram):
+    """Westfeld-Pfitzmann probability that pairs of values (2k, 2k+1) were equalised by embedding"""
+    histogram = np.asarray(histogram, dtype=np.float64)
+    even, odd = histogram[0::2], histogram[1::2]
+    expected = (even + odd) / 2
+    used = expected > 4
+    if used.sum() < 2:
+        return 0.0
+    chi2 = float((((even[used] - expected[used]) ** 2) / expected[used]).sum())
+    return _chi2_sf(chi2, int(used.sum()) - 1)
+
+# -------------------------
+# RS Analysis
+# -------------------------
+
+_RS_KEYS = ("rm", "sm", "rn", "sn", "rm1", "sm1", "rn1", "sn1", "groups")
+
+def _rs_counts(planes, ids, bins):
+    """Regular/singular group counts for masks M=[0,1,1,0] and -M on the image and its LSB-flipped twin"""
+    channels, rows, width = planes.shape
+    usable = width - width % 4
+    counts = {}
+    if usable == 0:
+        return {k: np.zeros(bins, dtype=np.int64) for k in _RS_KEYS}
+
+    groups = planes[:, :, :usable].reshape(channels, rows, usable // 4, 4).astype(np.int16)
+    group_ids = ids[:, :, 0:usable:4].ravel()
+    counts["groups"] = np.bincount(group_ids, minlength=bins)
+    # Each group lands in bin (id, sign(f(F(x)) - f(x)) + 1): singular, unusable, regular
+    sign_base = group_ids * 3 + 1
+
+    def smoothness(x0, x1, x2, x3):
+        return np.abs(x1 - x0) + np.abs(x2 - x1) + np.abs(x3 - x2)
+
+    def flip_pos(x):   # F1: 2k <-> 2k+1
+        return x ^ 1
+
+    def flip_neg(x):   # F-1: 2k-1 <-> 2k
+        return ((x + 1) ^ 1) - 1
+
+    for suffix, g in (("", groups), ("1", groups ^ 1)):
+        x0, x1, x2, x3 = g[..., 0], g[..., 1], g[..., 2], g[..., 3]
+        base = smoothness(x0, x1, x2, x3)
+        for key, flip in (("m", flip_pos), ("n", flip_neg)):
+            delta = np.sign(smoothness(x0, flip(x1), flip(x2), x3) - base).ravel()
+            table = np.bincount(sign_base + delta, minlength=bins * 3).reshape(bins, 3)
+            counts["r" + key + suffix] = table[:, 2]
+            counts["s" + key + suffix] = table[:, 0]
+    return counts
+
+def rs_estimate(c):
+    """Fridrich RS estimate of the embedding rate from summed group counts"""
+    total = float(c["groups"])
+    if total == 0:
+        return 0.0
+    d0 = (c["rm"] - c["sm"]) / total
+    d1 = (c["rm1"] - c["sm1"]) / total
+    dn0 = (c["rn"] - c["sn"]) / total
+    dn1 = (c["rn1"] - c["sn1"]) / total
+    a = 2 * (d1 + d0)
+    b = dn0 - dn1 - d1 - 3 * d0
+    cc = d0 - dn0
+    if abs(a) < 1e-12:
+        z = -cc / b if abs(b) > 1e-12 else 0.0
+    else:
+        disc = b * b - 4 * a * cc
+        if disc < 0:
+            return 0.0
+        roots = ((-b + math.sqrt(disc)) / (2 * a), (-b - math.sqrt(disc)) / (2 * a))
+        z = min(roots, key=abs)
+    if abs(z - 0.5) < 1e-12:
+        return 1.0
+    return float(min(1.0, max(0.0, z / (z - 0.5))))
+
+# -------------------------
+# Sample Pair Analysis
+# -------------------------
+
+def _spa_counts(planes, ids, bins):
+    """Dumitrescu-Wu-Wang pair counts over horizontally adjacent samples"""
+    u = planes[:, :, :-1]
+    v = planes[:, :, 1:]
+    pair_ids = ids[:, :, :-1].ravel()
+    # s = +1 for X pairs (v even and u < v, or v odd and u > v), -1 for Y pairs, 0 when u == v;
+    # each pair lands in bin (id, s + 1 + 3 * [upper 7 bits of u and v match])
+    s = np.sign(v.astype(np.int16) - u.astype(np.int16)) * (1 - 2 * (v & 1).astype(np.int16))
+    k = (u >> 1) == (v >> 1)
+    code = (s + 1 + 3 * k).ravel()
+    table = np.bincount(pair_ids * 6 + code, minlength=bins * 6).reshape(bins, 6)
+    return {
+        "x": table[:, 2] + table[:, 5],
+        "y": table[:, 0] + table[:, 3],
+        "k": table[:, 3:].sum(axis=1),
+        "n": table.sum(axis=1),
+    }
+
+def spa_estimate(c):
+    """Embedding rate from SPA counts: smaller root of (k/2)p^2 + (2x - n)p + (y - x) = 0"""
+    x, y, k, n = float(c["x"]), float(c["y"]), float(c["k"]), float(c["n"])
+    if n == 0:
+        return 0.0
+    a, b, cc = k / 2, 2 * x - n, y - x
+    if a == 0:
+        p = -cc / b if b else 0.0
+    else:
+        disc = b * b - 4 * a * cc
+        if disc < 0:
+            return 0.0
+        p = min((-b + math.sqrt(disc)) / (2 * a), (-b - math.sqrt(disc)) / (2 * a))
+    return float(min(1.0, max(0.0, p)))
+
+# -------------------------
+# Public API
+# -------------------------
+
+def _summarise(hist, rs, spa):
+    rs_rate = rs_estimate(rs)
+    spa_rate = spa_estimate(spa)
+    return {
+        "chi_square": round(chi_square_probability(hist), 4),
+        "rs": round(rs_rate, 4),
+        "spa": round(spa_rate, 4),
+        "rate": round((rs_rate + spa_rate) / 2, 4),
+    }
+
+def analyze_image(image_path, grid=4, max_pixels=DEFAULT_MAX_PIXELS):
+    """Score an image for LSB embedding with chi-square, RS and sample-pair analysis.
+
+    Returns a dict with per-channel and per-region results (regions are a
+    grid x grid layout in row-major order). "rate" is the mean of the RS and
+    SPA estimates of the fraction of samples carrying payload bits.
+    """
+    if not is_supported_image(image_path):
+        raise ValueError("Unsupported image type for analysis.")
+
+    planes, rows, (width, height), channel_names = load_planes(image_path, max_pixels)
+    channels = planes.shape[0]
+    regions = grid * grid
+    bins = channels * regions
+
+    ids = _region_ids(rows, width, height, grid)
+    ids = ids[np.newaxis, :, :] + (np.arange(channels) * regions)[:, np.newaxis, np.newaxis]
+
+    # One bincount per statistic, indexed by (channel, region)
+    hist = np.bincount((ids * 256 + planes).ravel(), minlength=bins * 256).reshape(channels, regions, 256)
+    rs = {k: v.reshape(channels, regions) for k, v in _rs_counts(planes, ids, bins).items()}
+    spa = {k: v.reshape(channels, regions) for k, v in _spa_counts(planes, ids, bins).items()}
+
+    report = {
+        "path": image_path,
+        "width": width,
+        "height": height,
+        "sampled_rows": int(len(rows)),
+        "channels": {},
+        "regions": [],
+    }
+    for ci, name in enumerate(channel_names):
+        report["channels"][name] = _summarise(
+            hist[ci].sum(axis=0),
+            {k: v[ci].sum() for k, v in rs.items()},
+            {k: v[ci].sum() for k, v in spa.items()},
+        )
+    for ri in range(regions):
+        r, c = divmod(ri, grid)
+        entry = {
+            "row": r, "col": c,
+            "box": (c * width // grid, r * height // grid, (c + 1) * width // grid, (r + 1) * height // grid),
+        }
+        entry.update(_summarise(
+            hist[:, ri].sum(axis=0),
+            {k: v[:, ri].sum() for k, v in rs.items()},
+            {k: v[:, ri].sum() for k, v in spa.items()},
+        ))
+        report["regions"].append(entry)
+
+    overall = _summarise(
+        hist.sum(axis=(0, 1)),
+        {k: v.sum() for k, v in rs.items()},
+        {k: v.sum() for k, v in spa.items()},
+    )
+    report.update(overall)
+    report["suspicious"] = bool(
+        overall["rate"] > RATE_THRESHOLD
+        or overall["chi_square"] > CHI_SQUARE_THRESHOLD
+        or any(r["rate"] > REGION_RATE_THRESHOLD for r in report["regions"])
+    )
+    return report
@@ -0,0 +1,188 @@
+# stego_inspect.py - Header-only media inspection with a per-session cache
+
+import os
+import struct
+import mimetypes
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+from stego_audio import get_audio_format_type, read_wav_layout
+from stego_instrument import span
+from stego_frame import HEADER_SIZE
+
+# Inspected records kept per session, keyed by (path, size, mtime)
+CACHE_SIZE = 512
+
+@dataclass
+class MediaInfo:
+    """What a carrier is and how much it can hold, read from its headers only"""
+    path: str
+    size: int
+    mtime_ns: int
+    file_type: Optional[str] = None
+    mime_type: Optional[str] = None
+    format: Optional[str] = None
+    codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    mode: Optional[str] = None
+    exif: dict = field(default_factory=dict)
+    duration: Optional[float] = None
+    frame_rate: Optional[float] = None
+    frame_count: Optional[int] = None
+    channels: Optional[int] = None
+    sample_rate: Optional[int] = None
+    sample_width: Optional[int] = None
+    capacity: Optional[int] = None  # stored payload bytes after framing; None when not bounded by the carrier
+    error: Optional[str] = None
+
+    @property
+    def dimensions(self):
+        return f"{self.width} × {self.height}" if self.width and self.height else None
+
+    def as_dict(self):
+        return asdict(self)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# -------------------------
+# Per-type Readers
+# -------------------------
+
+def _inspect_image(info):
+    from PIL import Image, ExifTags
+    with Image.open(info.path) as img:
+        info.format = img.format
+        info.width, info.height = img.size
+        info.mode = img.mode
+        info.exif = {ExifTags.TAGS.get(tag, f"Tag_{tag}"): str(value) for tag, value in img.getexif().items()}
+        frames = getattr(img, "n_frames", 1)
+    if info.format in ("JPEG", "GIF") or frames > 1:
+        return  # coefficient, palette or per-frame capacity needs decoding; the backend checks it
+    # One bit in each of R, G and B, minus the frame header
+    info.capacity = max(0, info.width * info.height * 3 // 8 - HEADER_SIZE)
+
+def _read_au_header(info):
+    """Sun .au header: magic, data offset, data size, encoding, rate, channels"""
+    au_widths = {2: 1, 3: 2, 4: 3, 5: 4, 6: 4, 7: 8}
+    with open(info.path, "rb") as f:
+        magic, offset, data_size, encoding, rate, channels = struct.unpack(">4sIIIII", f.read(24))
+    if magic != b".snd":
+        raise ValueError("Not a Sun AU file.")
+    info.codec = f"AU encoding {encoding}"
+    info.sample_rate, info.channels = rate, channels
+    info.sample_width = au_widths.get(encoding)
+    if data_size == 0xFFFFFFFF:
+        data_size = info.size - offset
+    if info.sample_width and rate and channels:
+        info.duration = data_size / (rate * channels * info.sample_width)
+
+def _inspect_audio(info):
+    ext = os.path.splitext(info.path)[1].lower()
+    info.format = ext[1:].upper()
+    format_type = get_audio_format_type(info.path)
+
+    if ext == ".wav":
+        try:
+            layout = read_wav_layout(info.path)
+            info.codec = layout.codec
+            info.channels, info.sample_rate, info.sample_width = layout.channels, layout.sample_rate, layout.sample_width
+            info.duration = layout.frames / layout.sample_rate if layout.sample_rate else 0.0
+        except ValueError:
+            pass  # e.g. a sample format the LSB backend rejects; mutagen below still reads the header
+    elif ext == ".au":
+        _read_au_header(info)
+
+    if info.duration is None and ext != ".raw":
+        import mutagen
+        audio = mutagen.File(info.path)
+        if audio is None:
+            raise ValueError("Unrecognised audio header.")
+        stream = audio.info
+        info.codec = getattr(stream, "codec", None) or type(stream).__name__.replace("Info", "")
+        info.duration = getattr(stream, "length", None)
+        info.channels = getattr(stream, "channels", None)
+        info.sample_rate = getattr(stream, "sample_rate", None)
+        bits = getattr(stream, "bits_per_sample", None)
+        info.sample_width = bits // 8 if bits else None
+
+    if format_type in ("lsb", "convert") and info.duration and info.sample_rate and info.channels:
+        # One bit in every sample of every channel
+        samples = int(round(info.duration * info.sample_rate)) * info.channels
+        info.capacity = max(0, samples // 8 - HEADER_SIZE)
+
+def _inspect_video(info):
+    info.format = os.path.splitext(info.path)[1][1:].upper()
+    try:
+        import cv2
+    except ImportError:
+        return
+    cap = cv2.VideoCapture(info.path)
+    try:
+        if not cap.isOpened():
+            raise ValueError("OpenCV could not open the video.")
+        info.frame_rate = cap.get(cv2.CAP_PROP_FPS)
+        info.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        info.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        info.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        info.duration = info.frame_count / info.frame_rate if info.frame_rate > 0 else 0.0
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        codec = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
+        info.codec = codec or None
+    finally:
+        cap.release()
+
+def _inspect_archive(info):
+    info.format = os.path.splitext(info.path)[1][1:].upper()
+
+# -------------------------
+# Public API
+# -------------------------
+
+_READERS = {
+    'image': _inspect_image,
+    'audio': _inspect_audio,
+    'video': _inspect_video,
+    'archive': _inspect_archive,
+}
+
+def inspect_file(file_path):
+    """Return the MediaInfo for a file, parsing its headers at most once per (path, size, mtime).
+
+    Raises OSError if the file cannot be stat'ed; parse failures are
+    reported in the record's error field instead.
+    """
+    from stego_manager import get_file_type
+
+    path = os.path.abspath(file_path)
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    with span("inspect") as s:
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                s.set(cache="hit")
+                return _cache[key]
+        s.set(cache="miss")
+
+        info = MediaInfo(path=path, size=st.st_size, mtime_ns=st.st_mtime_ns,
+                         file_type=get_file_type(path), mime_type=mimetypes.guess_type(path)[0])
+        reader = _READERS.get(info.file_type)
+        if reader:
+            try:
+                reader(info)
+            except Exception as e:
+                info.error = str(e)
+
+        with _cache_lock:
+            _cache[key] = info
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        return info
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,120 @@
+# stego_instrument.py - Per-stage timing spans with pluggable sinks
+
+import time
+import threading
+from contextlib import contextmanager
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_local = threading.local()
+
+class _NullSpan:
+    """Returned while no sink is registered so instrumented code costs one list check"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_bytes(self, count):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """One timed stage; bytes processed and attributes are reported to every sink on exit"""
+
+    __slots__ = ("name", "attrs", "bytes", "parent", "depth", "start", "seconds")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.bytes = 0
+        self.parent = None
+        self.depth = 0
+        self.start = 0.0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if stack:
+            self.parent = stack[-1].name
+            self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.start
+        _local.stack.pop()
+        record = {
+            "name": self.name,
+            "seconds": self.seconds,
+            "bytes": self.bytes,
+            "parent": self.parent,
+            "depth": self.depth,
+            "thread": threading.current_thread().name,
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        for sink in list(_sinks):
+            try:
+                sink(record)
+            except Exception:
+                pass  # a broken sink must never fail the operation
+        return False
+
+    def add_bytes(self, count):
+        self.bytes += count
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+def span(name, **attrs):
+    """Time a stage: `with span("read_wav") as s: ...; s.add_bytes(n)`"""
+    if not _sinks:
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+def add_sink(sink):
+    """Register sink(record) to receive every finished span"""
+    with _sinks_lock:
+        _sinks.append(sink)
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+def enabled():
+    return bool(_sinks)
+
+@contextmanager
+def collect_spans():
+    """Collect the spans finished inside the block into a list"""
+    records = []
+    add_sink(records.append)
+    try:
+        yield records
+    finally:
+        remove_sink(records.append)
+
+def format_spans(records):
+    """Indented per-stage timing table, outermost spans last as they finish last"""
+    lines = []
+    for record in records:
+        rate = ""
+        if record["bytes"] and record["seconds"] > 0:
+            rate = f"  {record['bytes'] / record['seconds'] / 1e6:8.1f} MB/s"
+        size = f"{record['bytes']:>12,} B" if record["bytes"] else " " * 14
+        lines.append(f"{'  ' * record['depth']}{record['name']:<{28 - 2 * record['depth']}} "
+                     f"{record['seconds'] * 1000:9.2f} ms  {size}{rate}")
+    return "\n".join(lines)
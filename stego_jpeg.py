@@ -0,0 +1,471 @@
+# stego_jpeg.py - Baseline JPEG scans as a carrier: payload bits in quantized AC coefficients
+#
+# Only AC coefficients with |value| >= 2 carry a bit (JSteg-style, skipping
+# 0 and +-1). Flipping the parity of such a value never changes its Huffman
+# size category, so the coded symbols and the scan's bit length stay the
+# same: embedding patches the last amplitude bit of each chosen coefficient
+# in the entropy-coded data and leaves every header and table verbatim.
+
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+SOI, EOI, SOS, DHT, DRI = 0xD8, 0xD9, 0xDA, 0xC4, 0xDD
+SOF_SEQUENTIAL = (0xC0, 0xC1)  # baseline and extended Huffman
+SOF_OTHER = {0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+RST_MARKERS = range(0xD0, 0xD8)
+
+# The scan is decoded in chunks of LANE_BITS, one lane each, side by side
+LANE_BITS = 4096
+GUESS_PHASE = 1  # lanes that do not start a segment start as if at the first AC coefficient
+# Lanes decoded together: first for a reader that may only need the first bits, and at most
+FIRST_BATCH_LANES = 16
+MAX_BATCH_LANES = 4096
+RUN_STOPPED, RUN_MERGED, RUN_INVALID = 0, 1, 2
+
+class JpegError(ValueError):
+    """A JPEG whose markers or entropy-coded data cannot be parsed"""
+
+class JpegUnsupported(JpegError):
+    """A valid JPEG in a coding mode this backend does not handle (progressive, arithmetic, lossless)"""
+
+@dataclass
+class Segment:
+    file_start: int   # stuffed entropy-coded bytes in the file
+    file_end: int
+    start: int        # destuffed bytes in JpegCoefficients.buffer
+    end: int
+    mcus: int = 0
+
+@dataclass
+class Scan:
+    blocks: list      # (dc_lut, ac_lut) per block of one MCU
+    segments: list = field(default_factory=list)
+
+@dataclass
+class _Lanes:
+    """Stretches of entropy-coded data decoded side by side, one entry per lane"""
+    start: np.ndarray    # bit the lane starts decoding at
+    stop: np.ndarray     # start of the next lane's chunk, or the segment end
+    end: np.ndarray      # end bit of the segment
+    base: np.ndarray     # the scan's first phase (the first phase of an MCU)
+    limit: np.ndarray    # the phase after the scan's last one
+    segment: np.ndarray  # index into JpegCoefficients._segment_mcus (cycles, not MCUs)
+    next: np.ndarray = None  # following lane in the same batch and segment, or -1
+
+    def take(self, index):
+        return _Lanes(*(getattr(self, f.name)[index] for f in fields(self) if f.name != "next"))
+
+    def extend(self, index):
+        """Append copies of the lanes at index"""
+        for f in fields(self):
+            values = getattr(self, f.name)
+            setattr(self, f.name, np.append(values, values[index]))
+
+def _ceil_div(a, b):
+    return -(-a // b)
+
+def _build_lut(counts, symbols):
+    """16-bit-window lookup table: (code length << 8) | symbol, 0 for invalid codes"""
+    lut = np.zeros(1 << 16, dtype=np.int32)
+    code = k = 0
+    for length in range(1, 17):
+        for _ in range(counts[length - 1]):
+            lut[code << (16 - length):(code + 1) << (16 - length)] = (length << 8) | symbols[k]
+            code += 1
+            k += 1
+        code <<= 1
+    return lut
+
+def _step_table(lut, dc):
+    """Decoder steps per 16-bit window: bits used | coefficients used << 8 | usable << 16, 0 for invalid codes"""
+    length, symbol = lut >> 8, lut & 0xFF
+    if dc:
+        size, coefficients, usable = symbol, 1, False
+    else:
+        size = symbol & 15
+        # A zero size ends the block (EOB), except for the 16-zero run ZRL
+        coefficients = np.where((size > 0) | (symbol == 0xF0), (symbol >> 4) + 1, 64)
+        usable = size > 1
+    step = (length + size) | (coefficients << 8) | (usable << 16)
+    return np.where((lut != 0) & (size <= 16), step, 0).astype(np.int32)
+
+class JpegCoefficients:
+    """The usable AC coefficients of a sequential Huffman JPEG, located by bit position.
+
+    The entropy-coded segments of every scan are destuffed into one buffer;
+    positions() lists the buffer bit holding each usable coefficient's parity,
+    in scan order, decoding only as far as asked.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.scans = []
+        self._parse()
+        self._prepare_lanes()
+        self._positions = np.zeros(0, dtype=np.int64)
+        self._walked, self._carried = 0, None
+        self._done_mcus = np.zeros(len(self._segment_mcus), dtype=np.int64)
+
+    # -------------------------
+    # Markers
+    # -------------------------
+
+    def _parse(self):
+        data = self.data
+        if data[:2] != b"\xff\xd8":
+            raise JpegError("Not a JPEG file.")
+        raw = np.frombuffer(data, dtype=np.uint8)
+        markers = np.flatnonzero(raw[:-1] == 0xFF)
+        markers = markers[raw[markers + 1] != 0]  # stuffed 0xFF00 bytes are data
+        tables, components, frame, restart = {}, {}, None, 0
+        pieces, size = [], 0
+        i = 2
+        while i < len(data) - 1:
+            if data[i] != 0xFF:
+                raise JpegError(f"Corrupt JPEG: expected a marker at byte {i}.")
+            marker = data[i + 1]
+            if marker == 0xFF:
+                i += 1  # fill byte
+                continue
+            if marker == EOI:
+                break
+            if marker in RST_MARKERS or marker == 0x01:
+                i += 2
+                continue
+            length = int.from_bytes(data[i + 2:i + 4], "big")
+            body = data[i + 4:i + 2 + length]
+            if marker in SOF_OTHER:
+                raise JpegUnsupported("Only baseline/sequential Huffman JPEGs can carry coefficient payloads "
+                                      "(this one is progressive, lossless or arithmetic-coded).")
+            if marker in SOF_SEQUENTIAL:
+                frame = (int.from_bytes(body[3:5], "big"), int.from_bytes(body[1:3], "big"))  # width, height
+                for c in range(body[5]):
+                    cid, sampling = body[6 + 3 * c], body[7 + 3 * c]
+                    components[cid] = (sampling >> 4, sampling & 15)
+            elif marker == DHT:
+                j = 0
+                while j < len(body):
+                    counts = list(body[j + 1:j + 17])
+                    symbols = list(body[j + 17:j + 17 + sum(counts)])
+                    tables[(body[j] >> 4, body[j] & 15)] = _build_lut(counts, symbols)
+                    j += 17 + sum(counts)
+            elif marker == DRI:
+                restart = int.from_bytes(body[:2], "big")
+            i += 2 + length
+            if marker == SOS:
+                if frame is None:
+                    raise JpegError("Scan before the frame header.")
+                scan, i = self._parse_scan(body, i, raw, markers, tables, components, frame, restart)
+                for segment in scan.segments:
+                    segment.start = size
+                    size += self._destuffed_size(raw, segment)
+                    segment.end = size
+                    pieces.append(segment)
+                self.scans.append(scan)
+        if not self.scans:
+            raise JpegError("JPEG has no scan data.")
+        self.buffer = np.concatenate([self._destuff(s) for s in pieces] + [np.zeros(4, dtype=np.uint8)])
+        self.segments = pieces
+
+    def _parse_scan(self, body, start, raw, markers, tables, components, frame, restart):
+        count = body[0]
+        selected = [(body[1 + 2 * c], body[2 + 2 * c]) for c in range(count)]
+        width, height = frame
+        h_max = max(h for h, _ in components.values())
+        v_max = max(v for _, v in components.values())
+        blocks = []
+        for cid, table_ids in selected:
+            if cid not in components:
+                raise JpegError(f"Scan uses unknown component {cid}.")
+            try:
+                dc, ac = tables[(0, table_ids >> 4)], tables[(1, table_ids & 15)]
+            except KeyError:
+                raise JpegError("Scan uses an undefined Huffman table.")
+            h, v = components[cid] if count > 1 else (1, 1)
+            blocks.extend([(dc, ac)] * (h * v))
+        if count > 1:
+            total = _ceil_div(width, 8 * h_max) * _ceil_div(height, 8 * v_max)
+        else:
+            # A single-component scan covers that component's own block grid
+            h, v = components[selected[0][0]]
+            total = _ceil_div(_ceil_div(width * h, h_max), 8) * _ceil_div(_ceil_div(height * v, v_max), 8)
+
+        # Segments end at RST markers; the scan ends at the first other marker
+        scan = Scan(blocks)
+        segment_start = start
+        for position in markers[np.searchsorted(markers, start):]:
+            position = int(position)
+            marker = raw[position + 1]
+            if marker in RST_MARKERS:
+                scan.segments.append(Segment(segment_start, position, 0, 0))
+                segment_start = position + 2
+            else:
+                scan.segments.append(Segment(segment_start, position, 0, 0))
+                break
+        else:
+            scan.segments.append(Segment(segment_start, len(raw), 0, 0))
+        per_segment = restart or total
+        for n, segment in enumerate(scan.segments):
+            segment.mcus = max(0, min(per_segment, total - n * per_segment))
+        return scan, scan.segments[-1].file_end
+
+    @staticmethod
+    def _destuffed_size(raw, segment):
+        stuffed = np.count_nonzero(raw[segment.file_start:segment.file_end] == 0xFF)
+        return segment.file_end - segment.file_start - stuffed
+
+    def _destuff(self, segment):
+        raw = np.frombuffer(self.data, dtype=np.uint8)[segment.file_start:segment.file_end]
+        return np.delete(raw, np.flatnonzero(raw == 0xFF) + 1)
+
+    # -------------------------
+    # Entropy-coded data
+    # -------------------------
+
+    def _prepare_lanes(self):
+        """Step tables of the Huffman tables in use, and the LANE_BITS lanes of every segment"""
+        buffer = self.buffer.astype(np.uint32)
+        self._windows = (buffer[:-2] << 16) | (buffer[1:-1] << 8) | buffer[2:]
+        steps, step_ids, phase_tables, columns, mcus = [], {}, [], [], []
+        for scan in self.scans:
+            base = len(phase_tables)
+            # Lanes decode the shortest cycle of tables that repeats through an MCU (a single block
+            # for a subsampled grey scan), so a guessed block within it can be right
+            tables = [(id(dc), id(ac)) for dc, ac in scan.blocks]
+            cycle = next(n for n in range(1, len(tables) + 1)
+                         if len(tables) % n == 0 and tables == tables[:n] * (len(tables) // n))
+            for dc, ac in scan.blocks[:cycle]:
+                for lut, dc_table in ((dc, True), (ac, False)):
+                    if (id(lut), dc_table) not in step_ids:
+                        step_ids[(id(lut), dc_table)] = len(steps)
+                        steps.append(_step_table(lut, dc_table))
+                # Phase base + block * 64 + k decodes coefficient k of that block: DC for k == 0, AC after
+                phase_tables.append(step_ids[(id(dc), True)] << 16)
+                phase_tables.extend([step_ids[(id(ac), False)] << 16] * 63)
+            for segment in scan.segments:
+                if not segment.mcus:
+                    continue
+                first, end = segment.start * 8, segment.end * 8
+                starts = np.arange(first, max(end, first + 1), LANE_BITS, dtype=np.int64)
+                columns.append(np.stack([starts, np.append(starts[1:], end)] + [
+                    np.full(len(starts), value, dtype=np.int64)
+                    for value in (end, base, base + cycle * 64, len(mcus))]))
+                mcus.append(segment.mcus * (len(scan.blocks) // cycle))
+        self._steps = np.concatenate(steps)
+        self._phase_tables = np.array(phase_tables, dtype=np.int64)
+        self._segment_mcus = np.array(mcus, dtype=np.int64)
+        self._lanes = _Lanes(*np.concatenate(columns, axis=1)) if columns else None
+
+    def _run(self, lanes, ids, p, phase, seen, merge, usable, completed):
+        """Decode lanes side by side from the states (p, phase); returns their final p, phase and RUN_* status.
+
+        A lane stops at an invalid code, at the end of its segment and
+        otherwise at the end of its chunk, noting its state at each bit in
+        seen (unless seen is None). With merge it decodes on through the next
+        lane's chunk instead, and stops as soon as its state is one noted there.
+
+        Usable coefficients and completed MCUs are appended to usable and
+        completed as (lanes, bits where the symbols start, bits) arrays.
+        """
+        windows, steps, phase_tables = self._windows, self._steps, self._phase_tables
+        final_p, final_phase = p.copy(), phase.copy()
+        status = np.full(len(ids), RUN_STOPPED, dtype=np.int8)
+        slot = np.arange(len(ids))
+        rows = lanes.next[ids] if merge else ids
+        # seen is read and written flat: at cell + p, the phase within the scan + 1 (0 is unset)
+        cell = rows * LANE_BITS - lanes.start[rows]
+        shift = 1 - lanes.base[ids]
+        bound = np.minimum(lanes.stop[rows], lanes.end[ids])
+        base, limit = lanes.base[ids], lanes.limit[ids]
+        seen = None if seen is None else seen.reshape(-1)
+        entry = np.ones(len(ids), dtype=np.int32)
+        active = p < bound
+        while True:
+            if merge:
+                met = np.zeros(len(ids), dtype=bool)
+                met[active] = seen[cell[active] + p[active]] == phase[active] + shift[active]
+                status[slot[met]] = RUN_MERGED
+                active &= ~met
+            if not active.all():
+                stopped = ~active
+                status[slot[stopped & (entry == 0)]] = RUN_INVALID
+                final_p[slot[stopped]], final_phase[slot[stopped]] = p[stopped], phase[stopped]
+                ids, p, phase, slot, cell, shift, bound, base, limit = (
+                    a[active] for a in (ids, p, phase, slot, cell, shift, bound, base, limit))
+                if not len(ids):
+                    break
+            if seen is not None and not merge:
+                seen[cell + p] = phase + shift
+
+            entry = steps[phase_tables[phase] + ((windows[p >> 3] >> (8 - (p & 7))) & 0xFFFF)]
+            after = p + (entry & 63)
+            hit = entry >= 1 << 16
+            if hit.any():
+                usable.append((ids[hit], p[hit], after[hit] - 1))
+            # An end of block (64 coefficients) moves on to the next block
+            advanced = np.minimum(phase + ((entry >> 8) & 127), (phase | 63) + 1)
+            wrapped = advanced >= limit
+            if wrapped.any():
+                advanced[wrapped] = base[wrapped]
+                completed.append((ids[wrapped], p[wrapped], after[wrapped]))
+            p, phase = after, advanced
+            active = (entry != 0) & (p < bound)
+        return final_p, final_phase, status
+
+    def _decode(self, lanes, ids, p, phase, seen, fill, usable, completed):
+        """Decode lanes through their chunks, then on into their successors' (see _run).
+
+        Returns the final p, phase and RUN_* status, and whether each lane
+        went on into its successor.
+        """
+        p, phase, status = self._run(lanes, ids, p, phase, seen if fill else None, False, usable, completed)
+        followed = (lanes.next[ids] >= 0) & (status == RUN_STOPPED) & (p < lanes.end[ids])
+        if followed.any():
+            p[followed], phase[followed], status[followed] = self._run(
+                lanes, ids[followed], p[followed], phase[followed], seen, True, usable, completed)
+        return p, phase, status, followed
+
+    def _walk(self, index):
+        """Usable-coefficient bit positions in the lanes at index, which follow the lanes walked so far.
+
+        The lanes are decoded side by side. Only a segment's first lane
+        knows its starting state; the others start from a guess. Huffman
+        decoding falls back into step within a few hundred bits, so each lane
+        decodes on into the next one's chunk until their states agree, and
+        from there the next lane's output is exact. If they do not meet, the
+        next lane is decoded again from where the first one stopped.
+        """
+        mcus, done_mcus = self._segment_mcus, self._done_mcus.copy()
+        index = index[done_mcus[self._lanes.segment[index]] < mcus[self._lanes.segment[index]]]
+        if not len(index):
+            return np.zeros(0, dtype=np.int64)
+        lanes = self._lanes.take(index)
+        count = len(index)
+        same = lanes.segment[1:] == lanes.segment[:-1]
+        lanes.next = np.append(np.where(same, np.arange(1, count), -1), -1)
+        anchored = np.flatnonzero(np.append(True, ~same))
+        p, phase = lanes.start.copy(), lanes.base + GUESS_PHASE
+        phase[anchored] = lanes.base[anchored]
+        if self._carried is not None:
+            p[0], phase[0] = self._carried
+
+        seen = np.zeros((count, LANE_BITS), dtype=np.uint16)
+        usable, completed = [], []
+        end_p, end_phase, status, followed = self._decode(
+            lanes, np.arange(count), p, phase, seen, True, usable, completed)
+
+        # A lane that did not meet its successor hands its end state to a fresh copy of that
+        # successor. All of them are redone at once, before it is known which are on the true chain.
+        handoff = {}
+        redo = np.flatnonzero(followed & (status == RUN_STOPPED))
+        while len(redo):
+            new = np.arange(len(lanes.start), len(lanes.start) + len(redo))
+            handoff.update(zip(redo.tolist(), new.tolist()))
+            lanes.extend(lanes.next[redo])
+            lanes.start[new] = end_p[redo]
+            results = self._decode(lanes, new, end_p[redo], end_phase[redo], seen, False, usable, completed)
+            end_p, end_phase, status, followed = (
+                np.append(a, b) for a, b in zip((end_p, end_phase, status, followed), results))
+            redo = new[results[3] & (results[2] == RUN_STOPPED)]
+
+        # Chain each segment's lanes from its first; a lane's output is exact from low to high
+        low, high = np.full(len(lanes.start), -1, dtype=np.int64), np.full(len(lanes.start), -1, dtype=np.int64)
+        rank = np.zeros(len(lanes.start), dtype=np.int64)
+        order = 0
+        for lane in anchored:
+            since = p[lane]
+            while True:
+                low[lane], high[lane], rank[lane] = since, end_p[lane], order
+                order += 1
+                if status[lane] == RUN_MERGED:
+                    lane, since = lanes.next[lane], end_p[lane]
+                elif followed[lane] and status[lane] == RUN_STOPPED:
+                    lane, since = handoff[lane], end_p[lane]
+                else:
+                    break
+        last = lane
+
+        def exact(events):
+            """(lanes, starts, bits) of the events inside the exact stretches, in scan order"""
+            if not events:
+                return (np.zeros(0, dtype=np.int64),) * 3
+            lane, start, bit = (np.concatenate(column) for column in zip(*events))
+            keep = (start >= low[lane]) & (start < high[lane])
+            lane, start, bit = lane[keep], start[keep], bit[keep]
+            # Each lane's events were appended in decoding order
+            order = np.argsort(rank[lane].astype(np.uint16), kind="stable")
+            return lane[order], start[order], bit[order]
+
+        # A segment ends with its last MCU; whatever its lanes decoded beyond that is padding
+        lane, start, bit = exact(completed)
+        segment = lanes.segment[lane]
+        number = done_mcus[segment] + 1 + np.arange(len(segment)) - np.searchsorted(segment, segment)
+        closing = number == mcus[segment]
+        if np.any(bit[closing] > lanes.end[lane[closing]]):
+            raise JpegError("Corrupt JPEG scan data (segment overrun).")
+        finish = np.full(len(mcus), np.iinfo(np.int64).max, dtype=np.int64)
+        finish[segment[closing]] = start[closing] + 1
+        np.add.at(done_mcus, segment, 1)
+        np.minimum(done_mcus, mcus, out=done_mcus)
+
+        # Only the batch's last segment may go on in the next batch, from where its chain stopped
+        carried = None
+        following = index[-1] + 1
+        if (following < len(self._lanes.start) and self._lanes.segment[following] == lanes.segment[last]
+                and lanes.next[last] < 0 and status[last] == RUN_STOPPED and end_p[last] < lanes.end[last]):
+            carried = (end_p[last], end_phase[last])
+        segments = np.unique(lanes.segment)
+        unfinished = segments[done_mcus[segments] < mcus[segments]]
+        if any(carried is None or s != lanes.segment[last] for s in unfinished):
+            raise JpegError("Corrupt JPEG scan data.")
+        self._carried = carried if len(unfinished) else None
+        self._done_mcus = done_mcus
+
+        lane, start, bit = exact(usable)
+        return bit[start < finish[lanes.segment[lane]]]
+
+    def positions(self, limit=None):
+        """Bit positions of the first limit usable coefficients (all of them when None)"""
+        total = 0 if self._lanes is None else len(self._lanes.start)
+        while self._walked < total and (limit is None or len(self._positions) < limit):
+            if limit is None:
+                size = MAX_BATCH_LANES
+            elif self._walked:
+                # As many lanes as the rest should take, going by the lanes walked so far
+                per_lane = max(len(self._positions), 1) / self._walked
+                size = int((limit - len(self._positions)) / per_lane * 1.25) + 1
+            else:
+                size = FIRST_BATCH_LANES
+            last = min(total, self._walked + min(max(size, FIRST_BATCH_LANES), MAX_BATCH_LANES))
+            self._positions = np.concatenate((self._positions, self._walk(np.arange(self._walked, last))))
+            self._walked = last
+        return self._positions if limit is None else self._positions[:limit]
+
+    def capacity_bits(self):
+        return len(self.positions())
+
+    def read_bits(self, positions):
+        """Parity bits (0/1 uint8) stored at the given buffer bit positions"""
+        positions = np.asarray(positions, dtype=np.int64)
+        return (self.buffer[positions >> 3] >> (7 - (positions & 7)).astype(np.uint8)) & 1
+
+    def write(self, path, positions, bits):
+        """Save a copy with bits at positions; only the entropy-coded bytes are rewritten"""
+        positions = np.asarray(positions, dtype=np.int64)
+        buffer = self.buffer.copy()
+        index = positions >> 3
+        mask = (np.uint8(1) << (7 - (positions & 7)).astype(np.uint8)).astype(np.uint8)
+        # ufunc.at, because two patched bits can share a byte
+        np.bitwise_and.at(buffer, index, ~mask)
+        np.bitwise_or.at(buffer, index, mask * np.asarray(bits, dtype=np.uint8))
+
+        view = memoryview(self.data)
+        with open(path, "wb") as out:
+            done = 0
+            for segment in self.segments:
+                out.write(view[done:segment.file_start])
+                data = buffer[segment.start:segment.end]
+                out.write(np.insert(data, np.flatnonzero(data == 0xFF) + 1, 0).tobytes())
+                done = segment.file_end
+            out.write(view[done:])
@@ -1,9 +1,16 @@
 # stego_manager.py
 
 import os
-from stego_image import is_supported_image, embed_text_in_image, extract_text_from_image
-from stego_audio import is_supported_audio, embed_text_in_audio, extract_text_from_audio
-from stego_archive import is_supported_archive, embed_text_in_archive, extract_text_from_archive
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from stego_progress import OperationCancelled, CANCELLED_MESSAGE
+from stego_inspect import inspect_file
+from stego_frame import HEADER_SIZE, FrameError, encode_payload, decode_frame
+from stego_shard import ShardError, split_payload, parse_shard, join_shards
+from stego_instrument import span, enabled
+from stego_profile import requested_mode, profile_call
+from stego_image import is_supported_image, embed_text_in_image, extract_text_from_image, read_image_index
+from stego_audio import is_supported_audio, embed_text_in_audio, extract_text_from_audio, read_wav_index
+from stego_archive import is_supported_archive, embed_text_in_archive, extract_text_from_archive, read_archive_index
 from stego_video import is_supported_video, embed_text_in_video, extract_text_from_video
 
 def get_file_type(file_path):
@@ -18,30 +25,227 @@ def get_file_type(file_path):
     else:
         return None
 
-def embed_message(input_path, output_path, message):
+def embed_message(input_path, output_path, message, progress=None, cancel=None, profile=None,
+                  compression="auto", key=None):
+    """Embed message (str, or bytes for binary payloads) with the matching backend.
+
+    A {name: payload} dict stores several named slots that extract_message
+    can read back one at a time. The message is framed once here (see
+    stego_frame; compression is "auto", "none", "zlib", "lzma" or "zstd")
+    and checked against the carrier's capacity before any backend work.
+    A key (image and WAV LSB carriers) scatters the bits over the whole
+    carrier in a keyed order; the same key is needed to extract them.
+
+    progress(fraction, stage) is called as the work advances and setting the
+    cancel event (a threading.Event) stops the backend at its next check.
+    profile ("sample" or "cprofile", default $STEGLYZER_PROFILE) saves a
+    profiler capture of this call under profiles/ (see stego_profile).
+    """
+    args = (input_path, output_path, message, progress, cancel, compression, key)
+    profile = profile or requested_mode()
+    if profile:
+        return profile_call(_embed, args, "embed", input_path, profile)[0]
+    return _embed(*args)
+
+def _embed(input_path, output_path, message, progress, cancel, compression, key):
     file_type = get_file_type(input_path)
     
-    if file_type == 'image':
-        return embed_text_in_image(input_path, output_path, message)
-    elif file_type == 'audio':
-        return embed_text_in_audio(input_path, output_path, message)
-    elif file_type == 'video':
-        return embed_text_in_video(input_path, output_path, message)
-    elif file_type == 'archive':
-        return embed_text_in_archive(input_path, output_path, message)
-    else:
-        return False, "❌ Unsupported file type for embedding."
+    with span("embed", type=file_type) as s:
+        with span("encode_frame") as f:
+            frame = encode_payload(message, compression)
+            f.add_bytes(len(frame))
+        stored = len(frame) - HEADER_SIZE
+
+        # Reject oversized messages from the cached header info before any decoding
+        try:
+            info = inspect_file(input_path)
+            capacity = info.capacity
+            s.add_bytes(info.size)
+        except OSError:
+            capacity = None
+        if capacity is not None and stored > capacity:
+            result = False, f"❌ Message too large: {stored:,} bytes after compression. Max capacity: {capacity:,} bytes"
+        else:
+            result = _run_backend(file_type, "embedding", (input_path, output_path, frame, progress, cancel), key)
+        s.set(success=result[0], cancelled=result[1] == CANCELLED_MESSAGE)
+    return result
+
+def extract_message(input_path, progress=None, cancel=None, profile=None, slot=None, key=None):
+    """Extract a hidden message with the matching backend (see embed_message for the hooks).
+
+    slot names the payload to read from a multi-slot carrier; by default
+    the first slot is returned. key is the one the message was embedded with.
+    """
+    args = (input_path, progress, cancel, slot, key)
+    profile = profile or requested_mode()
+    if profile:
+        return profile_call(_extract, args, "extract", input_path, profile)[0]
+    return _extract(*args)
 
-def extract_message(input_path):
+def _extract(input_path, progress, cancel, slot, key):
     file_type = get_file_type(input_path)
     
-    if file_type == 'image':
-        return extract_text_from_image(input_path)
-    elif file_type == 'audio':
-        return extract_text_from_audio(input_path)
-    elif file_type == 'video':
-        return extract_text_from_video(input_path)
-    elif file_type == 'archive':
-        return extract_text_from_archive(input_path)
-    else:
-        return False, "❌ Unsupported file type for extraction."
+    with span("extract", type=file_type) as s:
+        if enabled() and os.path.exists(input_path):
+            s.add_bytes(os.path.getsize(input_path))
+        result = _run_backend(file_type, "extraction", (input_path, progress, cancel, slot), key)
+        s.set(success=result[0], cancelled=result[1] == CANCELLED_MESSAGE)
+    return result
+
+_EMBEDDERS = {
+    'image': embed_text_in_image,
+    'audio': embed_text_in_audio,
+    'video': embed_text_in_video,
+    'archive': embed_text_in_archive,
+}
+
+_EXTRACTORS = {
+    'image': extract_text_from_image,
+    'audio': extract_text_from_audio,
+    'video': extract_text_from_video,
+    'archive': extract_text_from_archive,
+}
+
+_SLOT_INDEXES = {
+    'image': read_image_index,
+    'audio': read_wav_index,
+    'archive': read_archive_index,
+}
+
+# Backends that take a key for spread LSB embedding
+_KEYED = ('image', 'audio')
+
+def list_slots(input_path, key=None):
+    """Named payload slots of a carrier, read from the index alone.
+
+    Returns (True, [SlotEntry, ...]); the list is empty when the carrier
+    holds a single unnamed payload.
+    """
+    file_type = get_file_type(input_path)
+    reader = _SLOT_INDEXES.get(file_type)
+    if reader is None or (file_type == 'audio' and os.path.splitext(input_path)[1].lower() != ".wav"):
+        return False, "❌ Slot listing is available for images, WAV audio and archives."
+    if key and file_type not in _KEYED:
+        return False, "❌ Keyed spreading applies to image and WAV carriers only."
+    with span("list_slots", type=file_type):
+        try:
+            entries = reader(input_path, key) if key else reader(input_path)
+        except FrameError as e:
+            return False, f"❌ {str(e)}"
+        except Exception as e:
+            return False, f"❌ Error reading slot index: {str(e)}"
+    if entries is None:
+        return False, "⚠️ No hidden message found."
+    return True, entries
+
+def _run_backend(file_type, action, args, key=None):
+    backends = _EMBEDDERS if action == "embedding" else _EXTRACTORS
+    backend = backends.get(file_type)
+    if backend is None:
+        return False, f"❌ Unsupported file type for {action}."
+    if key and file_type not in _KEYED:
+        return False, "❌ Keyed spreading applies to image and WAV carriers only."
+    try:
+        return backend(*args, key=key) if key else backend(*args)
+    except OperationCancelled:
+        return False, CANCELLED_MESSAGE
+
+# -------------------------
+# Sharding across carriers
+# -------------------------
+
+def _run_pool(func, jobs, workers, progress, cancel, stage):
+    """Run func(*job) for each job on a process pool; returns the results in job order"""
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+        futures = {pool.submit(func, *job): i for i, job in enumerate(jobs)}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                if cancel is not None and cancel.is_set():
+                    raise OperationCancelled()
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = (False, f"❌ {str(e)}")
+                if progress:
+                    progress(done / len(jobs), stage)
+        except OperationCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+    return results
+
+def embed_sharded(carriers, message, parity=True, workers=None, compression="auto", progress=None, cancel=None,
+                  key=None):
+    """Split one payload over several carriers and embed the pieces in parallel.
+
+    carriers is a list of (input_path, output_path) pairs. The message
+    (str, bytes or a {name: payload} dict) is framed once, cut into chunks
+    sized by each carrier's capacity and, with parity, an XOR parity chunk
+    lets extract_sharded rebuild the payload with any one carrier missing.
+    key is passed to every embed (see embed_message).
+    """
+    with span("embed_sharded", carriers=len(carriers)) as s:
+        try:
+            capacities = []
+            for input_path, _ in carriers:
+                if get_file_type(input_path) is None:
+                    return False, f"❌ Unsupported file type: {os.path.basename(input_path)}"
+                info = inspect_file(input_path)
+                capacities.append(info.capacity)
+                s.add_bytes(info.size)
+            frame = encode_payload(message, compression)
+            shards = split_payload(frame, capacities, parity)
+        except (ValueError, OSError) as e:
+            return False, f"❌ {str(e)}"
+
+        # Shards are already compressed as a whole; store them as-is
+        jobs = [(input_path, output_path, shard, None, None, None, "none", key)
+                for (input_path, output_path), shard in zip(carriers, shards)]
+        try:
+            results = _run_pool(embed_message, jobs, workers, progress, cancel, "Embedding shards")
+        except OperationCancelled:
+            return False, CANCELLED_MESSAGE
+        failed = [f"{os.path.basename(path)}: {result}" for (path, _), (ok, result) in zip(carriers, results) if not ok]
+        s.set(success=not failed)
+        if failed:
+            return False, "❌ Some shards could not be embedded:\n" + "\n".join(failed)
+    extra = " plus a parity shard" if parity else ""
+    return True, f"✅ Payload ({len(frame):,} bytes) split into {len(carriers) - int(parity)} shards{extra}."
+
+def extract_sharded(input_paths, workers=None, slot=None, progress=None, cancel=None, key=None):
+    """Read the shards from every carrier in parallel and reassemble the payload.
+
+    Carriers may be given in any order; with a parity shard one of them may
+    be missing or unreadable. slot picks a named payload as in extract_message.
+    """
+    with span("extract_sharded", carriers=len(input_paths)) as s:
+        jobs = [(path, None, None, None, None, key) for path in input_paths if os.path.exists(path)]
+        try:
+            results = _run_pool(extract_message, jobs, workers, progress, cancel, "Reading shards") if jobs else []
+        except OperationCancelled:
+            return False, CANCELLED_MESSAGE
+        try:
+            shards = [shard for shard in (parse_shard(result) for ok, result in results if ok) if shard]
+            frame, rebuilt = join_shards(shards)
+            message = decode_frame(frame, slot)
+        except (ShardError, FrameError) as e:
+            return False, f"❌ {str(e)}"
+        s.set(success=True, rebuilt=len(rebuilt))
+    return True, message
+
+def analyze_file(input_path):
+    """Run statistical steganalysis on a carrier that may not use our own format"""
+    file_type = get_file_type(input_path)
+
+    try:
+        if file_type == 'image':
+            from stego_image_analysis import analyze_image
+            return True, analyze_image(input_path)
+        elif file_type == 'audio' and os.path.splitext(input_path)[1].lower() == ".wav":
+            from stego_audio_analysis import analyze_wav
+            return True, analyze_wav(input_path)
+        else:
+            return False, "❌ Statistical analysis is not available for this file type."
+    except Exception as e:
+        return False, f"❌ Analysis failed: {str(e)}"
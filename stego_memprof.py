@@ -0,0 +1,196 @@
+# stego_memprof.py - Peak-memory measurement per backend with declared budgets
+
+import os
+import gc
+import sys
+import json
+import time
+import struct
+import threading
+import tracemalloc
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+# Allowed peak = constant + carrier * carrier bytes + payload * payload bytes + pixels * pixel count
+Budget = namedtuple("Budget", "constant carrier payload pixels", defaults=(0.0, 0.0, 0.0))
+
+# case -> (carrier format, carrier size in the stego_bench unit, operation, payload chars, budget)
+MEMORY_CASES = {
+    "archive_embed": ("zip", 0.05, "embed", 4096, Budget(8 * MB)),
+    "archive_extract": ("zip", 0.05, "extract", 4096, Budget(8 * MB)),
+    "archive_extract_large_payload": ("zip", 0.01, "extract", 2 * MB, Budget(8 * MB, payload=3.0)),
+    "wav_embed": ("wav", 2, "embed", 4096, Budget(8 * MB, payload=40.0)),
+    "wav_extract": ("wav", 2, "extract", 4096, Budget(8 * MB, payload=40.0)),
+    "flac_metadata_embed": ("flac", 20, "embed", 4096, Budget(8 * MB)),
+    "png_embed": ("png", 2, "embed", 4096, Budget(16 * MB, pixels=10.0)),
+    "png_extract": ("png", 2, "extract", 4096, Budget(16 * MB, pixels=10.0)),
+}
+
+RSS_SAMPLE_INTERVAL = 0.005
+
+def make_flac_shell(path, megabytes):
+    """A FLAC stream header with opaque frame bytes: enough for the tag-only metadata backend,
+    which never decodes audio (no FLAC encoder is needed to build it)"""
+    size = int(megabytes * MB)
+    streaminfo = struct.pack(">HH", 4096, 4096) + b"\0" * 6 + bytes.fromhex("0ac442f000000000") + b"\0" * 16
+    with open(path, "wb") as out:
+        out.write(b"fLaC")
+        out.write(bytes([0]) + len(streaminfo).to_bytes(3, "big") + streaminfo)
+        out.write(bytes([0x80 | 1]) + (1024).to_bytes(3, "big") + b"\0" * 1024)  # last block: padding
+        block = bytes(range(256)) * 4096
+        for start in range(0, size, len(block)):
+            out.write(block[:min(len(block), size - start)])
+
+def _current_rss():
+    """Resident set size in bytes (Linux /proc), or None where unavailable"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _max_rss():
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+class RSSSampler:
+    """Track the peak RSS of this process on a background thread while a block runs"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.baseline = _current_rss() or _max_rss()
+        self.peak = self.baseline
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = _current_rss()
+            if rss is None:
+                return
+            self.peak = max(self.peak, rss)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        rss = _current_rss()
+        self.peak = max(self.peak, rss if rss is not None else _max_rss())
+        return False
+
+    @property
+    def delta(self):
+        return self.peak - self.baseline
+
+def measure(func, *args):
+    """Run func(*args) under tracemalloc and RSS sampling.
+
+    Returns (result, stats) with the traced Python heap peak and the RSS
+    growth in bytes; the RSS figure also covers C buffers such as Pillow's.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        with RSSSampler() as rss:
+            result = func(*args)
+        seconds = time.perf_counter() - start
+        traced_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, {"traced_peak": traced_peak, "rss_baseline": rss.baseline,
+                    "rss_peak_delta": rss.delta, "seconds": seconds}
+
+def budget_bytes(budget, carrier_bytes, payload_bytes, pixels):
+    return int(budget.constant + budget.carrier * carrier_bytes + budget.payload * payload_bytes
+               + budget.pixels * pixels)
+
+def run_case(name, work_dir):
+    """Measure one case; meant to run in a fresh worker process so RSS starts clean"""
+    from stego_bench import make_carrier, benchmark_message
+    from stego_manager import embed_message, extract_message
+    from stego_inspect import inspect_file
+
+    fmt, size, operation, payload_chars, budget = MEMORY_CASES[name]
+    if fmt == "flac":
+        carrier = os.path.join(work_dir, f"carrier_flac_{size:g}.flac")
+        if not os.path.exists(carrier):
+            make_flac_shell(carrier, size)
+    else:
+        carrier = make_carrier(fmt, size, work_dir)
+    message = benchmark_message(payload_chars)
+    output = os.path.join(work_dir, f"mem_{name}.{fmt}")
+    info = inspect_file(carrier)
+    pixels = (info.width or 0) * (info.height or 0)
+
+    record = {"case": name, "format": fmt, "operation": operation, "carrier_bytes": info.size,
+              "payload_bytes": len(message.encode("utf-8")), "pixels": pixels}
+    try:
+        if operation == "embed":
+            (success, result), stats = measure(embed_message, carrier, output, message)
+        else:
+            success, result = embed_message(carrier, output, message)
+            if success:
+                (success, result), stats = measure(extract_message, output)
+                success = success and result == message
+        if not success:
+            record.update(status="failed", error=str(result)[:200])
+            return record
+    finally:
+        if os.path.exists(output):
+            os.remove(output)
+
+    record.update(stats)
+    record["budget"] = budget_bytes(budget, info.size, record["payload_bytes"], pixels)
+    record["peak"] = max(stats["traced_peak"], stats["rss_peak_delta"])
+    record["peak_per_carrier_byte"] = record["peak"] / info.size if info.size else None
+    record["status"] = "ok" if record["peak"] <= record["budget"] else "over_budget"
+    return record
+
+def run_memory_checks(cases=None, work_dir=None, progress=None):
+    """Run each case in its own spawned process; returns (all_within_budget, records)"""
+    cases = cases or list(MEMORY_CASES)
+    work_dir = work_dir or os.path.join(os.getcwd(), "bench_carriers")
+    os.makedirs(work_dir, exist_ok=True)
+    records = []
+    context = multiprocessing.get_context("spawn")
+    for name in cases:
+        if name not in MEMORY_CASES:
+            raise ValueError(f"Unknown memory case: {name}")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                record = pool.submit(run_case, name, work_dir).result()
+            except Exception as e:
+                record = {"case": name, "status": "failed", "error": str(e)}
+        records.append(record)
+        if progress:
+            progress(record)
+    return all(r["status"] == "ok" for r in records), records
+
+def format_memory_record(record):
+    if "peak" not in record:
+        return f"{record['case']:<30} {record['status']}: {record.get('error', '')}"
+    mark = "✅" if record["status"] == "ok" else "❌"
+    return (f"{mark} {record['case']:<30} peak {record['peak'] / MB:8.1f} MB "
+            f"(heap {record['traced_peak'] / MB:7.1f}, rss +{record['rss_peak_delta'] / MB:7.1f})  "
+            f"budget {record['budget'] / MB:8.1f} MB  carrier {record['carrier_bytes'] / MB:8.1f} MB")
+
+def save_memory_report(records, output_path):
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": records}, f, indent=2)
@@ -0,0 +1,207 @@
+# stego_metrics.py - Operation counters and latency histograms in Prometheus text format
+
+import os
+import time
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from stego_instrument import collect_spans
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Top-level spans opened by stego_manager that count as operations
+OPERATIONS = ("embed", "extract")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def operation_result(record):
+    """Outcome label of an embed/extract span: success, failure, cancelled or error (exception)"""
+    attrs = record.get("attrs", {})
+    if "error" in record:
+        return "error"
+    if attrs.get("cancelled"):
+        return "cancelled"
+    return "success" if attrs.get("success") else "failure"
+
+class MetricsRegistry:
+    """Aggregate finished spans into counters and histograms.
+
+    Use record_span as a stego_instrument sink, or feed it the span records
+    collected in a worker process with ingest().
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.operations = defaultdict(int)          # (operation, type, result) -> calls
+        self.latency = defaultdict(lambda: [0] * (len(self.buckets) + 1))  # (operation, type) -> bucket counts
+        self.latency_sum = defaultdict(float)       # (operation, type) -> seconds
+        self.operation_bytes = defaultdict(int)     # (operation, type) -> bytes
+        self.stage_calls = defaultdict(int)         # stage -> calls
+        self.stage_seconds = defaultdict(float)     # stage -> seconds
+        self.stage_bytes = defaultdict(int)         # stage -> bytes
+        self.cache = defaultdict(int)               # (cache, hit|miss) -> lookups
+
+    def record_span(self, record):
+        name = record["name"]
+        attrs = record.get("attrs", {})
+        with self._lock:
+            if name in OPERATIONS and record["depth"] == 0:
+                key = (name, attrs.get("type") or "unsupported")
+                self.operations[key + (operation_result(record),)] += 1
+                self.latency[key][bisect_left(self.buckets, record["seconds"])] += 1
+                self.latency_sum[key] += record["seconds"]
+                self.operation_bytes[key] += record["bytes"]
+            else:
+                self.stage_calls[name] += 1
+                self.stage_seconds[name] += record["seconds"]
+                self.stage_bytes[name] += record["bytes"]
+            if "cache" in attrs:
+                self.cache[(name, attrs["cache"])] += 1
+
+    def ingest(self, records):
+        for record in records:
+            self.record_span(record)
+
+    def render(self):
+        """The current values in the Prometheus text exposition format"""
+        out = []
+
+        def family(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("steglyzer_operations_total", "counter",
+                   "Embed/extract calls by backend and outcome (success, failure, cancelled, error).")
+            for key, value in sorted(self.operations.items()):
+                out.append(f"steglyzer_operations_total{_labels(('operation', 'type', 'result'), key)} {value}")
+
+            family("steglyzer_operation_duration_seconds", "histogram", "Embed/extract latency by backend.")
+            for key, counts in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    out.append(f"steglyzer_operation_duration_seconds_bucket"
+                               f"{_labels(('operation', 'type'), key, le)} {cumulative}")
+                labels = _labels(("operation", "type"), key)
+                out.append(f"steglyzer_operation_duration_seconds_sum{labels} {_number(self.latency_sum[key])}")
+                out.append(f"steglyzer_operation_duration_seconds_count{labels} {cumulative}")
+
+            family("steglyzer_operation_bytes_total", "counter", "Carrier bytes read by embed/extract calls.")
+            for key, value in sorted(self.operation_bytes.items()):
+                out.append(f"steglyzer_operation_bytes_total{_labels(('operation', 'type'), key)} {value}")
+
+            family("steglyzer_operation_throughput_bytes_per_second", "gauge",
+                   "Carrier bytes per second of operation time since start (use rate() on the counters for windows).")
+            for key, value in sorted(self.operation_bytes.items()):
+                seconds = self.latency_sum[key]
+                rate = value / seconds if seconds > 0 else 0.0
+                out.append(f"steglyzer_operation_throughput_bytes_per_second"
+                           f"{_labels(('operation', 'type'), key)} {_number(rate)}")
+
+            family("steglyzer_stage_calls_total", "counter", "Calls per instrumented stage.")
+            for stage, value in sorted(self.stage_calls.items()):
+                out.append(f"steglyzer_stage_calls_total{_labels(('stage',), (stage,))} {value}")
+            family("steglyzer_stage_seconds_total", "counter", "Time spent per instrumented stage.")
+            for stage, value in sorted(self.stage_seconds.items()):
+                out.append(f"steglyzer_stage_seconds_total{_labels(('stage',), (stage,))} {_number(value)}")
+            family("steglyzer_stage_bytes_total", "counter", "Bytes processed per instrumented stage.")
+            for stage, value in sorted(self.stage_bytes.items()):
+                out.append(f"steglyzer_stage_bytes_total{_labels(('stage',), (stage,))} {value}")
+
+            family("steglyzer_cache_lookups_total", "counter", "Header cache lookups by result.")
+            for key, value in sorted(self.cache.items()):
+                out.append(f"steglyzer_cache_lookups_total{_labels(('cache', 'result'), key)} {value}")
+            family("steglyzer_cache_hit_ratio", "gauge", "Fraction of cache lookups that were hits.")
+            for cache in sorted({cache for cache, _ in self.cache}):
+                hits, misses = self.cache.get((cache, "hit"), 0), self.cache.get((cache, "miss"), 0)
+                ratio = hits / (hits + misses) if hits + misses else 0.0
+                out.append(f"steglyzer_cache_hit_ratio{_labels(('cache',), (cache,))} {_number(ratio)}")
+
+            family("steglyzer_start_time_seconds", "gauge", "Unix time the metrics registry was created.")
+            out.append(f"steglyzer_start_time_seconds {_number(self.started)}")
+        return "\n".join(out) + "\n"
+
+# Process-wide registry the service and the watch daemon feed with their workers' spans
+METRICS = MetricsRegistry()
+
+def run_measured(func, *args):
+    """Call func(*args) and return (result, span records) for the parent's registry.
+
+    Pool workers run in other processes, where the parent's sinks are not
+    registered, so the spans travel back with the result instead. Only spans
+    from the calling thread are kept, which keeps thread-pool jobs separate.
+    """
+    thread = threading.current_thread().name
+    with collect_spans() as records:
+        result = func(*args)
+    return result, [record for record in records if record["thread"] == thread]
+
+# -------------------------
+# Exporters
+# -------------------------
+
+def write_textfile(path, registry=METRICS):
+    """Atomically write the metrics for node_exporter's textfile collector"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(temp_path, path)
+
+def start_textfile_writer(path, interval=15.0, registry=METRICS, stop_event=None):
+    """Rewrite the textfile every interval seconds on a daemon thread; returns the stop event"""
+    stop_event = stop_event or threading.Event()
+
+    def loop():
+        while True:
+            try:
+                write_textfile(path, registry)
+            except OSError:
+                pass  # retried on the next tick
+            if stop_event.wait(interval):
+                break
+
+    threading.Thread(target=loop, name="metrics-textfile", daemon=True).start()
+    return stop_event
+
+def serve_metrics(host="127.0.0.1", port=9465, registry=METRICS):
+    """Serve GET /metrics on a daemon thread and return the HTTP server (call shutdown() to stop)"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0].rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,252 @@
+# stego_multiframe.py - Multi-frame image carriers: TIFF pages, GIF and APNG frames, lossless WebP
+#
+# Payload bits run through the frames in order, or over keyed positions of
+# all of them. Frames are decoded one at a time with PIL's seek(), and only
+# the frames that hold payload bits are turned into arrays and modified;
+# the others are handed to the encoder as decoded.
+
+import itertools
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image, GifImagePlugin, TiffImagePlugin
+
+MULTIFRAME_TYPES = [".gif", ".tif", ".tiff", ".webp", ".apng"]
+
+# TIFF compressions that keep sample values; anything else (JPEG, bilevel codecs) is rewritten as LZW
+LOSSLESS_TIFF = ("raw", "tiff_lzw", "tiff_adobe_deflate", "packbits")
+
+# Frame modes whose bands are used as they are; other modes are converted to RGB(A)
+NATIVE_MODES = {"RGB": 3, "RGBA": 3, "L": 1, "LA": 1, "P": 1}
+
+def _palette_chain(palette):
+    """Palette indices ordered so that neighbours are close colours: darkest first, then nearest unvisited"""
+    palette = palette.astype(np.int32)
+    distance = ((palette[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2)
+    luminance = palette @ np.array([299, 587, 114])
+    order = [int(np.argmin(luminance))]
+    distance[:, order[0]] = np.iinfo(np.int32).max
+    for _ in range(len(palette) - 1):
+        order.append(int(np.argmin(distance[order[-1]])))
+        distance[:, order[-1]] = np.iinfo(np.int32).max
+    return np.array(order, dtype=np.uint8)
+
+# Serialises the process-wide GIF loading strategy between open_frames users
+_gif_strategy_lock = threading.RLock()
+
+@contextmanager
+def open_frames(path):
+    """Image.open for a FrameCarrier.
+
+    GIF frames that share the global palette stay palette images while the
+    image is open, so their indices can carry bits. PIL reads its loading
+    strategy on every seek, so it is switched for as long as the image is
+    open and then restored for the rest of the process.
+    """
+    with _gif_strategy_lock:
+        previous = GifImagePlugin.LOADING_STRATEGY
+        GifImagePlugin.LOADING_STRATEGY = GifImagePlugin.LoadingStrategy.RGB_AFTER_DIFFERENT_PALETTE_ONLY
+        try:
+            with Image.open(path) as img:
+                yield img
+        finally:
+            GifImagePlugin.LOADING_STRATEGY = previous
+
+def _carrier_mode(frame):
+    if frame.mode in NATIVE_MODES:
+        return frame.mode
+    return "RGBA" if "A" in frame.getbands() else "RGB"
+
+class FrameSamples:
+    """The LSB-carrying samples of one decoded frame.
+
+    Colour and grey frames carry bits in their R, G, B (or L) values, never
+    in alpha. Palette frames carry them in the rank of each index along a
+    nearest-colour chain through the palette (EzStego): flipping a bit moves
+    a pixel to a neighbouring colour, and the palette itself stays unchanged.
+    The transparent index and an odd last palette entry carry nothing, and
+    with opaque_only neither do fully transparent pixels.
+    """
+
+    def __init__(self, frame, opaque_only=False):
+        self.frame = frame
+        self.mode = _carrier_mode(frame)
+        image = frame if frame.mode == self.mode else frame.convert(self.mode)
+        self.pixels = np.array(image)
+        self.flat = self.pixels.reshape(-1)
+        self.rank = self.order = self.usable = None
+        if self.mode == "P":
+            palette = np.array(image.getpalette() or [0, 0, 0], dtype=np.uint8).reshape(-1, 3)
+            self.order = _palette_chain(palette)[:len(palette) // 2 * 2]
+            self.rank = np.zeros(256, dtype=np.uint8)
+            self.rank[self.order] = np.arange(len(self.order), dtype=np.uint8)
+            usable = np.zeros(256, dtype=bool)
+            usable[self.order] = True
+            transparency = image.info.get("transparency")
+            if isinstance(transparency, int) and usable[transparency]:
+                # Its pair partner must not move onto it either
+                usable[self.order[self.rank[transparency] ^ 1]] = usable[transparency] = False
+            self.usable = np.flatnonzero(usable[self.flat])
+            self.count = len(self.usable)
+        else:
+            self.channels = NATIVE_MODES[self.mode]
+            self.stride = self.pixels.shape[2] if self.pixels.ndim == 3 else 1
+            self.count = self.flat.size // self.stride * self.channels
+            if opaque_only and self.stride > self.channels:
+                visible = np.flatnonzero(self.pixels[..., -1].reshape(-1))
+                self.usable = (visible[:, None] * self.stride + np.arange(self.channels)).reshape(-1)
+                self.count = len(self.usable)
+
+    @staticmethod
+    def count_of(frame, opaque_only=False):
+        """Sample count without decoding, or None when it depends on the pixels"""
+        mode = _carrier_mode(frame)
+        if mode == "P" or (opaque_only and mode in ("RGBA", "LA")):
+            return None
+        return frame.width * frame.height * NATIVE_MODES[mode]
+
+    def _locate(self, samples):
+        """Indices into the flat pixels of samples (a slice or an index array)"""
+        if self.usable is not None:
+            return self.usable[samples]
+        if self.stride == self.channels:
+            return samples
+        if isinstance(samples, slice):
+            samples = np.arange(samples.start, samples.stop, dtype=np.int64)
+        return samples // self.channels * self.stride + samples % self.channels  # skip alpha
+
+    def bits(self, samples):
+        values = self.flat[self._locate(samples)]
+        return (values if self.rank is None else self.rank[values]) & 1
+
+    def put(self, samples, bits):
+        where = self._locate(samples)
+        if self.rank is None:
+            self.flat[where] = (self.flat[where] & 0xFE) | bits
+        else:
+            self.flat[where] = self.order[(self.rank[self.flat[where]] & 0xFE) | bits]
+
+    def image(self):
+        """The modified frame, with the source frame's palette and info (durations, transparency)"""
+        image = Image.fromarray(self.pixels, self.mode)
+        if self.mode == "P":
+            image.putpalette(self.frame.getpalette())
+        image.info = dict(self.frame.info)
+        return image
+
+class FrameCarrier:
+    """Payload sample positions over the frames of an open multi-frame image.
+
+    Sample counts are learned frame by frame as positions are asked for;
+    only palette frames have to be decoded for that. GIF frames that PIL
+    composites into RGB (local palettes) would be re-quantized on save and
+    carry no bits.
+    """
+
+    def __init__(self, img):
+        self.img = img
+        self.format = img.format
+        self.n_frames = getattr(img, "n_frames", 1)
+        self.starts = [0]  # first sample of each frame counted so far, then the end
+        # libwebp's animation encoder does not keep the colour of fully transparent pixels
+        self.opaque_only = self.format == "WEBP"
+        self._cached = None
+
+    def _seek(self, index):
+        if self.img.tell() != index:
+            self.img.seek(index)
+        return self.img
+
+    def samples(self, index):
+        """FrameSamples of one frame (the last one is kept for the next read)"""
+        if self._cached is None or self._cached[0] != index:
+            frame = self._seek(index)
+            frame.load()
+            self._cached = (index, FrameSamples(frame, self.opaque_only))
+        return self._cached[1]
+
+    def _count(self, index):
+        frame = self._seek(index)
+        if self.format == "GIF" and frame.mode != "P":
+            return 0
+        count = FrameSamples.count_of(frame, self.opaque_only)
+        return self.samples(index).count if count is None else count
+
+    def available(self, limit=None):
+        """Samples in the frames counted until limit is reached (all frames when None)"""
+        while len(self.starts) <= self.n_frames and (limit is None or self.starts[-1] < limit):
+            self.starts.append(self.starts[-1] + self._count(len(self.starts) - 1))
+        return self.starts[-1]
+
+    def locate(self, positions):
+        """{frame: (selection of positions, samples in that frame)} for carrier sample positions.
+
+        positions is a range (the sequential layout, located with slices
+        alone) or an array of keyed positions.
+        """
+        if isinstance(positions, range):
+            self.available(positions.stop)
+            located = {}
+            for index, (first, end) in enumerate(zip(self.starts, self.starts[1:])):
+                low, high = max(positions.start, first), min(positions.stop, end)
+                if low < high:
+                    located[index] = (slice(low - positions.start, high - positions.start),
+                                      slice(low - first, high - first))
+            return located
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return {}
+        self.available(int(positions.max()) + 1)
+        starts = np.array(self.starts, dtype=np.int64)
+        owners = np.searchsorted(starts, positions, side="right") - 1
+        order = np.argsort(owners, kind="stable")
+        bounds = np.searchsorted(owners[order], np.arange(len(starts)))
+        located = {}
+        for index in range(len(starts) - 1):
+            chosen = order[bounds[index]:bounds[index + 1]]
+            if len(chosen):
+                located[index] = (chosen, positions[chosen] - starts[index])
+        return located
+
+    def read_bits(self, positions):
+        bits = np.zeros(len(positions), dtype=np.uint8)
+        for index, (chosen, samples) in self.locate(positions).items():
+            bits[chosen] = self.samples(index).bits(samples)
+        return bits
+
+    def frames(self, positions, bits):
+        """Output frames, in order, with bits written at the carrier positions"""
+        located = self.locate(positions)
+        self._cached = None
+        for index in range(self.n_frames):
+            if index not in located:
+                yield self._seek(index).copy()
+                continue
+            chosen, samples = located[index]
+            frame = self.samples(index)
+            frame.put(samples, bits[chosen])
+            self._cached = None
+            yield frame.image()
+
+def save_frames(img, frames, output_path):
+    """Encode frames in img's format; TIFF pages are written one at a time"""
+    first = next(frames)
+    if img.format == "TIFF":
+        with TiffImagePlugin.AppendingTiffWriter(output_path, new=True) as tiff:
+            for frame in itertools.chain([first], frames):
+                compression = frame.info.get("compression", "raw")
+                frame.save(tiff, format="TIFF", dpi=frame.info.get("dpi", (72, 72)),
+                           compression=compression if compression in LOSSLESS_TIFF else "tiff_lzw")
+                tiff.newFrame()
+        return
+    options = {"save_all": True, "append_images": frames, "loop": img.info.get("loop", 0)}
+    if img.format == "GIF":
+        options["optimize"] = False  # keeps the palette order the indices were written against
+    elif img.format == "PNG":
+        # Replace whole regions on every frame, so each decodes to exactly the embedded pixels.
+        # The APNG writer walks append_images twice, so it needs a list.
+        options.update(disposal=0, blend=0, append_images=list(frames))
+    elif img.format == "WEBP":
+        options.update(lossless=True, exact=True)
+    first.save(output_path, format=img.format, **options)
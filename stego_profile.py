@@ -0,0 +1,131 @@
+# stego_profile.py - On-demand profiler capture for single embed/extract calls
+
+import os
+import re
+import sys
+import json
+import time
+import cProfile
+import threading
+from collections import Counter
+
+PROFILE_MODES = ("sample", "cprofile")
+
+# Set to a mode to profile every stego_manager call in a process (GUI, server workers, watch)
+PROFILE_ENV = "STEGLYZER_PROFILE"
+PROFILE_DIR_ENV = "STEGLYZER_PROFILE_DIR"
+
+SAMPLE_INTERVAL = 0.005
+
+def profile_dir():
+    return os.environ.get(PROFILE_DIR_ENV) or os.path.join(os.getcwd(), "profiles")
+
+def requested_mode():
+    """Profiler mode requested through the environment, or None"""
+    mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+    return mode if mode in PROFILE_MODES else None
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+class StackSampler:
+    """Sample one thread's Python stack on a background thread into collapsed-stack counts.
+
+    Frames at and above root_code (the profiler's own caller) are left out.
+    Samples are taken when the sampler gets the GIL, so time inside C code
+    that holds it is attributed to the calling Python frame afterwards.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL, root_code=None):
+        self.thread_id = thread_id
+        self.root_code = root_code
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format, one `frame;frame;frame count` line per stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def _capture_name(operation, file_type, size, input_path):
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", os.path.basename(input_path))[:60]
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S')}.{int(time.time() * 1000) % 1000:03d}-{os.getpid()}"
+    return f"{stamp}_{operation}_{file_type or 'unknown'}_{size}B_{stem}"
+
+def profile_call(func, args, operation, input_path, mode="sample", output_dir=None):
+    """Run func(*args) under the chosen profiler and save the capture.
+
+    Writes <name>.collapsed (flame-graph input), <name>.json (file type,
+    size, duration and result) and, for cprofile, <name>.prof for pstats or
+    snakeviz. Returns (result, capture) where capture lists the saved paths.
+    """
+    from stego_manager import get_file_type
+
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profiler mode: {mode} (use one of {', '.join(PROFILE_MODES)})")
+    output_dir = output_dir or profile_dir()
+    os.makedirs(output_dir, exist_ok=True)
+    file_type = get_file_type(input_path)
+    size = os.path.getsize(input_path) if os.path.exists(input_path) else 0
+    base = os.path.join(output_dir, _capture_name(operation, file_type, size, input_path))
+
+    profiler = cProfile.Profile() if mode == "cprofile" else None
+    start = time.perf_counter()
+    with StackSampler(threading.get_ident(), root_code=profile_call.__code__) as sampler:
+        if profiler:
+            profiler.enable()
+        try:
+            result = func(*args)
+        finally:
+            if profiler:
+                profiler.disable()
+    seconds = time.perf_counter() - start
+
+    capture = {
+        "operation": operation,
+        "input": os.path.abspath(input_path),
+        "type": file_type,
+        "size": size,
+        "mode": mode,
+        "seconds": round(seconds, 6),
+        "samples": sampler.samples,
+        "sample_interval": sampler.interval,
+        "success": bool(result[0]),
+        "result": str(result[1])[:200],
+        "python": sys.version.split()[0],
+        "collapsed": base + ".collapsed",
+    }
+    with open(capture["collapsed"], "w", encoding="utf-8") as f:
+        f.write(sampler.collapsed())
+    if profiler:
+        capture["profile"] = base + ".prof"
+        profiler.dump_stats(capture["profile"])
+    capture["metadata"] = base + ".json"
+    with open(capture["metadata"], "w", encoding="utf-8") as f:
+        json.dump(capture, f, ensure_ascii=False, indent=2)
+    return result, capture
@@ -0,0 +1,21 @@
+# stego_progress.py - Progress and cancellation hooks shared by all backends
+
+class OperationCancelled(BaseException):
+    """Raised inside a backend when the caller sets its cancel event.
+
+    Derives from BaseException (like KeyboardInterrupt) so the backends'
+    generic error handlers do not turn a cancellation into a failure message;
+    stego_manager converts it into a regular (False, message) result.
+    """
+
+CANCELLED_MESSAGE = "⏹️ Operation cancelled."
+
+def report_progress(progress, fraction, stage=""):
+    """Call progress(fraction, stage) if a callback was given"""
+    if progress is not None:
+        progress(min(1.0, max(0.0, fraction)), stage)
+
+def check_cancelled(cancel):
+    """Raise OperationCancelled if the cancel event (a threading.Event) is set"""
+    if cancel is not None and cancel.is_set():
+        raise OperationCancelled(CANCELLED_MESSAGE)
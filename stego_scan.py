@@ -0,0 +1,267 @@
+# stego_scan.py - Resumable parallel corpus scanner
+
+import os
+import json
+import time
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from stego_manager import get_file_type, extract_message
+from stego_frame import payload_fields
+from stego_metrics import run_measured
+
+# Force an fsync of the results file every N records
+FSYNC_EVERY = 256
+
+# Seconds between checks for files over their time limit
+POLL_SECONDS = 0.5
+
+def iter_supported_files(root):
+    """Yield supported carrier files under root without listing the whole tree up front"""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and get_file_type(entry.path):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+def scan_file(file_path):
+    """Run the matching extractor on one file and return a JSON-serialisable record"""
+    record = {"path": file_path, "type": get_file_type(file_path), "found": False}
+    start = time.perf_counter()
+    try:
+        record["size"] = os.path.getsize(file_path)
+        success, message = extract_message(file_path)
+        record["found"] = bool(success)
+        if success:
+            record.update(payload_fields(message))
+        else:
+            record["detail"] = message
+    except Exception as e:
+        record["error"] = str(e)
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+# Set in each pool worker: where it reports the files it starts on
+_started_queue = None
+
+def _init_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+def _scan_timed(file_path):
+    """scan_file in a pool worker, reporting first when the worker picked the file up"""
+    _started_queue.put((file_path, time.time()))
+    return scan_file(file_path)
+
+def load_checkpoint(results_path):
+    """Return the set of paths already recorded in a JSON Lines results file.
+
+    A line cut short by a crash is dropped from the file so appends stay valid.
+    """
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+
+    with open(results_path, "rb+") as f:
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                pass
+            valid_end += len(line)
+        f.truncate(valid_end)
+    return done
+
+def error_record(file_path, error):
+    return {"path": file_path, "type": get_file_type(file_path), "found": False, "error": error}
+
+def stop_pool(pool):
+    """Shut a pool down without waiting, killing its workers (there is no public way to stop a running task)"""
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def scan_isolated(file_path, file_timeout=None, on_spans=None):
+    """Scan one file in a pool of its own, so a crash or hang is attributed to that file alone"""
+    pool = ProcessPoolExecutor(max_workers=1)
+    try:
+        if not on_spans:
+            return pool.submit(scan_file, file_path).result(timeout=file_timeout)
+        record, spans = pool.submit(run_measured, scan_file, file_path).result(timeout=file_timeout)
+        on_spans(spans)
+        return record
+    except TimeoutError:
+        return error_record(file_path, f"Timed out after {file_timeout:g} s")
+    except BrokenProcessPool:
+        return error_record(file_path, "Worker process crashed")
+    except Exception as e:
+        return error_record(file_path, f"Worker failed: {e}")
+    finally:
+        stop_pool(pool)
+
+def scan_directory(root, results_path, workers=None, max_in_flight=None,
+                   max_file_size=None, resume=True, progress=None, file_timeout=None, on_spans=None):
+    """Scan a directory tree for hidden payloads on a process pool.
+
+    Results are appended to results_path as JSON Lines as soon as each file
+    finishes, so the results file doubles as the checkpoint: with resume=True
+    files already present in it are skipped. At most max_in_flight files are
+    queued at once (default: 4 per worker) and files larger than max_file_size
+    bytes are recorded as skipped instead of being decoded.
+
+    A file still running file_timeout seconds after a worker started on it
+    (as the worker reports; time spent queued does not count) is recorded
+    as an error and its worker killed. When a worker
+    crashes the pool is rebuilt, and the files that were in flight are
+    re-run one at a time to find the culprit; one bad file never ends the scan.
+
+    on_spans, if given, receives the instrumentation spans of each file
+    (e.g. METRICS.ingest), since the workers' own sinks are in other processes.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    done = load_checkpoint(results_path) if resume else set()
+    stats = {"scanned": 0, "found": 0, "errors": 0, "skipped": 0, "resumed": len(done)}
+    pending = {}  # future -> file path
+    started = {}  # file path -> when a worker started on it
+
+    def new_pool():
+        if not file_timeout:
+            return ProcessPoolExecutor(max_workers=workers), None
+        started_queue = multiprocessing.Queue()
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(started_queue,)), started_queue
+
+    def submit(file_path):
+        func = _scan_timed if file_timeout else scan_file
+        if on_spans:
+            pending[pool.submit(run_measured, func, file_path)] = file_path
+        else:
+            pending[pool.submit(func, file_path)] = file_path
+
+    def result(future):
+        if not on_spans:
+            return future.result()
+        record, spans = future.result()
+        on_spans(spans)
+        return record
+
+    pool, started_queue = new_pool()
+
+    with open(results_path, "a" if resume else "w", encoding="utf-8") as out:
+
+        def write_record(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if record.get("skipped"):
+                stats["skipped"] += 1
+            else:
+                stats["scanned"] += 1
+            if record.get("found"):
+                stats["found"] += 1
+            if "error" in record:
+                stats["errors"] += 1
+            if (stats["scanned"] + stats["skipped"]) % FSYNC_EVERY == 0:
+                os.fsync(out.fileno())
+            if progress:
+                progress(record, stats)
+
+        def restart(rerun):
+            """Replace the pool; finished futures are recorded, the rest re-run (alone when suspect)"""
+            nonlocal pool, started_queue
+            stop_pool(pool)
+            pool, started_queue = new_pool()
+            requeue = []
+            for future, file_path in list(pending.items()):
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    write_record(result(future))
+                elif future.done() and isinstance(future.exception(), BrokenProcessPool):
+                    rerun.append(file_path)
+                else:
+                    requeue.append(file_path)
+            pending.clear()
+            started.clear()
+            for file_path in rerun:
+                write_record(scan_isolated(file_path, file_timeout, on_spans))
+            for file_path in requeue:
+                submit(file_path)
+
+        def collect(finished):
+            crashed = []
+            for future in finished:
+                file_path = pending.pop(future)
+                started.pop(file_path, None)
+                try:
+                    write_record(result(future))
+                except BrokenProcessPool:
+                    crashed.append(file_path)
+                except Exception as e:
+                    write_record(error_record(file_path, f"Worker failed: {e}"))
+            if crashed:
+                restart(crashed)
+
+        def check_timeouts():
+            while True:
+                try:
+                    file_path, since = started_queue.get_nowait()
+                except queue.Empty:
+                    break
+                started[file_path] = since
+            now = time.time()
+            expired = [future for future, file_path in pending.items()
+                       if now - started.get(file_path, now) > file_timeout]
+            if expired:
+                for future in expired:
+                    write_record(error_record(pending.pop(future), f"Timed out after {file_timeout:g} s"))
+                restart([])
+
+        def drain(limit):
+            while len(pending) > limit:
+                finished, _ = wait(pending, timeout=POLL_SECONDS if file_timeout else None,
+                                   return_when=FIRST_COMPLETED)
+                collect(finished)
+                if file_timeout:
+                    check_timeouts()
+
+        try:
+            for file_path in iter_supported_files(root):
+                if file_path in done:
+                    continue
+
+                if max_file_size is not None:
+                    try:
+                        size = os.path.getsize(file_path)
+                    except OSError:
+                        continue
+                    if size > max_file_size:
+                        write_record({"path": file_path, "type": get_file_type(file_path),
+                                      "size": size, "found": False, "skipped": "size limit"})
+                        continue
+
+                submit(file_path)
+                drain(max_in_flight - 1)
+            drain(0)
+        finally:
+            if pending:
+                stop_pool(pool)
+            else:
+                pool.shutdown()
+            out.flush()
+            os.fsync(out.fileno())
+
+    return stats
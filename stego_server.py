@@ -0,0 +1,442 @@
+# stego_server.py - Local HTTP job service (asyncio, stdlib only)
+
+import os
+import json
+import math
+import time
+import uuid
+import shutil
+import asyncio
+import tempfile
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from stego_manager import get_file_type, embed_message, extract_message
+from stego_frame import payload_fields
+from stego_metrics import METRICS, CONTENT_TYPE as METRICS_CONTENT_TYPE, run_measured
+
+CHUNK_SIZE = 64 * 1024
+MAX_HEADER_SIZE = 64 * 1024
+MAX_JSON_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = 2 * 1024 ** 3  # default cap on carrier uploads when no max_upload is given
+MAX_WAIT = 300.0  # longest ?wait= a status request may block, in seconds
+
+STATUS_TEXT = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# -------------------------
+# Jobs
+# -------------------------
+
+class Job:
+    def __init__(self, kind, work_dir):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.work_dir = work_dir
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.result = None
+        self.output_path = None
+        self.events = []
+        self.changed = asyncio.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "error")
+
+    def to_dict(self):
+        info = {"id": self.id, "kind": self.kind, "status": self.status, "created": self.created}
+        if self.done:
+            info["finished"] = self.finished
+            info.update(payload_fields(self.result, "result"))
+            info["has_output"] = self.output_path is not None
+        return info
+
+    async def publish(self, event):
+        async with self.changed:
+            self.events.append(event)
+            self.changed.notify_all()
+
+class JobService:
+    """Queue embed/extract/scan jobs and run them on a bounded worker pool.
+
+    The queue holds at most queue_size jobs; submissions beyond that are
+    rejected with 503 so clients back off instead of piling up uploads.
+    A job ends "done", "failed" (the operation reported failure) or
+    "error" (it raised); the latter two carry the message as their result.
+    """
+
+    def __init__(self, workers=None, queue_size=64, job_ttl=3600, max_upload=None, use_processes=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.job_ttl = job_ttl
+        self.max_upload = max_upload or MAX_UPLOAD_SIZE
+        self.jobs = {}
+        self.root_dir = tempfile.mkdtemp(prefix="steglyzer_jobs_")
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.pool = executor_cls(max_workers=self.workers)
+        self.scan_pool = ThreadPoolExecutor(max_workers=1)
+        self.tasks = []
+
+    def start(self):
+        for _ in range(self.workers):
+            self.tasks.append(asyncio.create_task(self._worker()))
+        self.tasks.append(asyncio.create_task(self._janitor()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.scan_pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def new_job(self, kind):
+        if self.queue.full():
+            raise HTTPError(503, "Job queue is full, retry later.")
+        job = Job(kind, tempfile.mkdtemp(dir=self.root_dir))
+        self.jobs[job.id] = job
+        return job
+
+    def enqueue(self, job, func, *args):
+        try:
+            self.queue.put_nowait((job, func, args))
+        except asyncio.QueueFull:
+            self.discard(job)
+            raise HTTPError(503, "Job queue is full, retry later.")
+
+    def discard(self, job):
+        self.jobs.pop(job.id, None)
+        shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, func, args = await self.queue.get()
+            job.status = "running"
+            await job.publish({"status": "running"})
+            try:
+                if job.kind == "scan":
+                    stats = await loop.run_in_executor(self.scan_pool, self._run_scan, job, loop, *args)
+                    success, result = True, stats
+                else:
+                    (success, result), spans = await loop.run_in_executor(self.pool, run_measured, func, *args)
+                    METRICS.ingest(spans)
+                job.status = "done" if success else "failed"
+                job.result = result
+            except Exception as e:
+                job.status = "error"
+                job.result = f"❌ Unexpected error: {str(e)}"
+            job.finished = time.time()
+            if job.status != "done" or job.kind == "extract":
+                job.output_path = None
+            await job.publish({"status": job.status, **payload_fields(job.result, "result")})
+            self.queue.task_done()
+
+    def _run_scan(self, job, loop, root):
+        from stego_scan import scan_directory
+
+        def progress(record, stats):
+            asyncio.run_coroutine_threadsafe(job.publish({"record": record}), loop)
+
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Scan root is no longer a directory: {root}")
+        return scan_directory(root, job.output_path, workers=self.workers, resume=False, progress=progress,
+                              on_spans=METRICS.ingest)
+
+    async def _janitor(self):
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.time() - self.job_ttl
+            for job in list(self.jobs.values()):
+                if job.done and job.finished < cutoff:
+                    self.discard(job)
+
+# -------------------------
+# HTTP Plumbing
+# -------------------------
+
+class Request:
+    def __init__(self, method, target, headers, reader):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path.rstrip("/") or "/"
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.reader = reader
+
+    async def iter_body(self, limit=None):
+        """Yield the request body in chunks (Content-Length or chunked encoding).
+
+        Bodies longer than limit bytes are refused with 413, declared or not.
+        """
+        received = 0
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await self.reader.readline()
+                try:
+                    size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                except ValueError:
+                    raise HTTPError(400, "Malformed chunk size.")
+                if size < 0:
+                    raise HTTPError(400, "Malformed chunk size.")
+                received += size
+                if limit is not None and received > limit:
+                    raise HTTPError(413, "Request body exceeds the size limit.")
+                if size == 0:
+                    await self.reader.readline()
+                    return
+                remaining = size
+                while remaining:
+                    chunk = await self.reader.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise HTTPError(400, "Truncated request body.")
+                    remaining -= len(chunk)
+                    yield chunk
+                await self.reader.readline()
+        else:
+            try:
+                remaining = int(self.headers.get("content-length", 0))
+            except ValueError:
+                raise HTTPError(400, "Invalid Content-Length header.")
+            if remaining < 0:
+                raise HTTPError(400, "Invalid Content-Length header.")
+            if limit is not None and remaining > limit:
+                raise HTTPError(413, "Request body exceeds the size limit.")
+            while remaining:
+                chunk = await self.reader.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise HTTPError(400, "Truncated request body.")
+                remaining -= len(chunk)
+                yield chunk
+
+    async def read_json(self):
+        body = b"".join([chunk async for chunk in self.iter_body(MAX_JSON_SIZE)])
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON.")
+
+async def read_request(reader):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line.")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return Request(method.upper(), target, headers, reader)
+
+async def send_response(writer, status, body=b"", content_type="application/json", extra_headers=None):
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+    headers = {"Content-Type": content_type, "Content-Length": str(len(body)), "Connection": "close"}
+    headers.update(extra_headers or {})
+    head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+    head += "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+async def start_chunked(writer, content_type):
+    writer.write(
+        f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+        "Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n".encode("latin-1")
+    )
+    await writer.drain()
+
+async def send_chunk(writer, data):
+    if data:
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+async def end_chunked(writer):
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+# -------------------------
+# Server
+# -------------------------
+
+class StegoServer:
+    """Embed/extract/scan endpoints on top of stego_manager.
+
+    POST /embed?filename=cover.png&message=...   body: carrier bytes
+    POST /extract?filename=stego.png[&slot=name] body: carrier bytes
+    POST /scan                                   body: {"root": "/server/side/dir"}
+    GET  /jobs/<id>[?wait=seconds]               job status and result (wait at most MAX_WAIT)
+    GET  /jobs/<id>/events                       streamed JSON Lines progress
+    GET  /jobs/<id>/output                       stego file or scan results
+    GET  /metrics                                Prometheus text format (see stego_metrics)
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, **service_options):
+        self.host = host
+        self.port = port
+        self.service_options = service_options
+        self.service = None
+
+    async def serve_forever(self):
+        self.service = JobService(**self.service_options)
+        self.service.start()
+        server = await asyncio.start_server(self.handle, self.host, self.port, limit=MAX_HEADER_SIZE)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.service.stop()
+
+    async def handle(self, reader, writer):
+        try:
+            request = await read_request(reader)
+            if request is not None:
+                await self.dispatch(request, writer)
+        except HTTPError as e:
+            await send_response(writer, e.status, {"error": str(e)},
+                                extra_headers={"Retry-After": "1"} if e.status == 503 else None)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            await send_response(writer, 500, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def dispatch(self, request, writer):
+        parts = request.path.strip("/").split("/")
+        if request.path == "/health":
+            await send_response(writer, 200, {"status": "ok", "queued": self.service.queue.qsize(),
+                                              "jobs": len(self.service.jobs)})
+        elif request.path == "/metrics":
+            self._require(request, "GET")
+            await send_response(writer, 200, METRICS.render(), content_type=METRICS_CONTENT_TYPE)
+        elif request.path in ("/embed", "/extract"):
+            self._require(request, "POST")
+            await self.submit_file_job(request, writer, request.path[1:])
+        elif request.path == "/scan":
+            self._require(request, "POST")
+            await self.submit_scan_job(request, writer)
+        elif parts[0] == "jobs" and len(parts) in (2, 3):
+            self._require(request, "GET")
+            job = self.service.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(404, "Unknown job id.")
+            if len(parts) == 2:
+                await self.job_status(request, writer, job)
+            elif parts[2] == "events":
+                await self.job_events(writer, job)
+            elif parts[2] == "output":
+                await self.job_output(writer, job)
+            else:
+                raise HTTPError(404, "Not found.")
+        else:
+            raise HTTPError(404, "Not found.")
+
+    def _require(self, request, method):
+        if request.method != method:
+            raise HTTPError(405, f"Use {method} for this endpoint.")
+
+    async def submit_file_job(self, request, writer, kind):
+        filename = os.path.basename(request.query.get("filename", ""))
+        if not filename or get_file_type(filename) is None:
+            raise HTTPError(400, "❌ Missing or unsupported 'filename' parameter.")
+        message = request.query.get("message")
+        if kind == "embed" and not message:
+            raise HTTPError(400, "❌ Missing 'message' parameter.")
+
+        job = self.service.new_job(kind)
+        input_path = os.path.join(job.work_dir, "input_" + filename)
+        try:
+            await self._receive_upload(request, input_path)
+        except BaseException:
+            self.service.discard(job)
+            raise
+
+        if kind == "embed":
+            job.output_path = os.path.join(job.work_dir, "stego_" + filename)
+            self.service.enqueue(job, embed_message, input_path, job.output_path, message)
+        else:
+            self.service.enqueue(job, extract_message, input_path, None, None, None, request.query.get("slot"))
+        await send_response(writer, 202, job.to_dict())
+
+    async def _receive_upload(self, request, path):
+        with open(path, "wb") as f:
+            async for chunk in request.iter_body(self.service.max_upload):
+                f.write(chunk)
+
+    async def submit_scan_job(self, request, writer):
+        root = (await request.read_json()).get("root")
+        if not root or not os.path.isdir(root):
+            raise HTTPError(400, "❌ 'root' must be an existing directory on the server.")
+        job = self.service.new_job("scan")
+        job.output_path = os.path.join(job.work_dir, "results.jsonl")
+        self.service.enqueue(job, None, root)
+        await send_response(writer, 202, job.to_dict())
+
+    async def job_status(self, request, writer, job):
+        try:
+            wait = float(request.query.get("wait") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid wait parameter.")
+        if not math.isfinite(wait) or wait < 0:
+            raise HTTPError(400, "Invalid wait parameter.")
+        wait = min(wait, MAX_WAIT)
+        if wait > 0 and not job.done:
+            try:
+                async with job.changed:
+                    await asyncio.wait_for(job.changed.wait_for(lambda: job.done), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+        await send_response(writer, 200, job.to_dict())
+
+    async def job_events(self, writer, job):
+        await start_chunked(writer, "application/x-ndjson")
+        seen = 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.events) > seen or job.done)
+                new_events = job.events[seen:]
+                seen = len(job.events)
+                finished = job.done
+            for event in new_events:
+                await send_chunk(writer, (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+            if finished and seen == len(job.events):
+                break
+        await end_chunked(writer)
+
+    async def job_output(self, writer, job):
+        if not job.done:
+            raise HTTPError(409, "Job has not finished yet.")
+        if not job.output_path or not os.path.exists(job.output_path):
+            raise HTTPError(404, "This job has no output file.")
+        await start_chunked(writer, "application/octet-stream")
+        with open(job.output_path, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                await send_chunk(writer, chunk)
+        await end_chunked(writer)
+
+def serve(host="127.0.0.1", port=8765, **service_options):
+    """Run the job service until interrupted"""
+    try:
+        asyncio.run(StegoServer(host, port, **service_options).serve_forever())
+    except KeyboardInterrupt:
+        pass
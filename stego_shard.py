@@ -0,0 +1,166 @@
+# stego_shard.py - Sequenced, checksummed payload shards with XOR parity
+#
+# A payload too large for one carrier is framed once (see stego_frame), cut
+# into one chunk per carrier and, optionally, an XOR parity chunk so that any
+# one carrier can go missing. Every shard carries the whole chunk table, so
+# any surviving shard describes the full layout.
+
+import os
+import zlib
+import struct
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+SHARD_MAGIC = b"SGSH"
+SHARD_VERSION = 1
+
+# magic, version, set id, shard index, data shard count, parity flag, payload length, payload CRC32;
+# followed by one ">I" chunk length per data shard, then the chunk
+SHARD_HEADER = struct.Struct(">4sB8sHHBQI")
+CHUNK_LENGTH = struct.Struct(">I")
+MAX_SHARDS = 0xFFFF
+
+class ShardError(ValueError):
+    """Shards that are corrupt, from different sets, or too few to rebuild the payload"""
+
+@dataclass
+class Shard:
+    set_id: bytes
+    index: int
+    data_count: int
+    parity: bool
+    total_length: int
+    crc: int
+    lengths: list
+    chunk: bytes
+
+    @property
+    def is_parity(self):
+        return self.index == self.data_count
+
+def shard_overhead(data_count):
+    """Bytes a shard adds around its chunk"""
+    return SHARD_HEADER.size + CHUNK_LENGTH.size * data_count
+
+def plan_chunks(total, capacities):
+    """Chunk length per carrier: an even split, capped by each carrier's capacity (None = unbounded).
+
+    Even chunks keep the parallel embeds balanced and the parity chunk
+    small; carriers that cannot take their share are filled and the rest
+    is spread over the others. Raises ShardError if the total does not fit.
+    """
+    lengths = [0] * len(capacities)
+    open_slots = list(range(len(capacities)))
+    remaining = total
+    while remaining and open_slots:
+        share = -(-remaining // len(open_slots))
+        full = [i for i in open_slots if capacities[i] is not None and capacities[i] - lengths[i] <= share]
+        for i in (full or open_slots):
+            take = min(remaining, share if capacities[i] is None else min(share, capacities[i] - lengths[i]))
+            lengths[i] += take
+            remaining -= take
+        open_slots = [i for i in open_slots if i not in full] if full else []
+    if remaining:
+        raise ShardError(f"Payload exceeds the combined capacity by {remaining:,} bytes.")
+    return lengths
+
+def xor_parity(chunks):
+    """XOR of the chunks, each zero-padded to the longest"""
+    size = max((len(chunk) for chunk in chunks), default=0)
+    parity = np.zeros(size, dtype=np.uint8)
+    for chunk in chunks:
+        parity[:len(chunk)] ^= np.frombuffer(chunk, dtype=np.uint8)
+    return parity.tobytes()
+
+def split_payload(frame, capacities, parity=True):
+    """Shard bytes for each carrier, in carrier order.
+
+    capacities are the carriers' payload capacities in bytes (None when
+    unbounded). With parity the carrier with the most room takes the
+    parity shard and may be left out on extraction.
+    """
+    count = len(capacities)
+    data_count = count - 1 if parity else count
+    if data_count < 1:
+        raise ShardError("Parity needs at least two carriers.")
+    if count > MAX_SHARDS:
+        raise ShardError("Too many carriers.")
+
+    overhead = shard_overhead(data_count)
+    room = [None if c is None else max(0, c - overhead) for c in capacities]
+    order = list(range(count))
+    parity_carrier = None
+    if parity:
+        parity_carrier = max(order, key=lambda i: float("inf") if room[i] is None else room[i])
+        order.remove(parity_carrier)
+        # Every data chunk must fit in the parity carrier as well
+        limit = room[parity_carrier]
+        if limit is not None:
+            room = [c if c is not None and c <= limit else limit for c in room]
+
+    lengths = plan_chunks(len(frame), [room[i] for i in order])
+    set_id = os.urandom(8)
+    crc = zlib.crc32(frame)
+    table = b"".join(CHUNK_LENGTH.pack(length) for length in lengths)
+
+    shards = [None] * count
+    chunks = []
+    offset = 0
+    for index, (carrier, length) in enumerate(zip(order, lengths)):
+        chunk = bytes(frame[offset:offset + length])
+        offset += length
+        chunks.append(chunk)
+        shards[carrier] = SHARD_HEADER.pack(SHARD_MAGIC, SHARD_VERSION, set_id, index, data_count,
+                                            int(parity), len(frame), crc) + table + chunk
+    if parity:
+        shards[parity_carrier] = SHARD_HEADER.pack(SHARD_MAGIC, SHARD_VERSION, set_id, data_count, data_count,
+                                                   1, len(frame), crc) + table + xor_parity(chunks)
+    return shards
+
+def parse_shard(data):
+    """Shard from extracted payload bytes, or None when they are not a shard"""
+    if not isinstance(data, (bytes, bytearray)) or len(data) < SHARD_HEADER.size:
+        return None
+    magic, version, set_id, index, data_count, parity, total, crc = SHARD_HEADER.unpack_from(data)
+    if magic != SHARD_MAGIC:
+        return None
+    if version != SHARD_VERSION:
+        raise ShardError(f"Unsupported shard version {version}.")
+    table_end = SHARD_HEADER.size + CHUNK_LENGTH.size * data_count
+    if len(data) < table_end or index > data_count:
+        raise ShardError("Corrupt shard header.")
+    lengths = [length for (length,) in CHUNK_LENGTH.iter_unpack(data[SHARD_HEADER.size:table_end])]
+    return Shard(set_id, index, data_count, bool(parity), total, crc, lengths, bytes(data[table_end:]))
+
+def join_shards(shards):
+    """Reassemble the framed payload from the shards of one set; one missing data shard is rebuilt from parity"""
+    if not shards:
+        raise ShardError("No shards found.")
+    # Stray shards of an older set are ignored in favour of the best-represented one
+    set_id = Counter(shard.set_id for shard in shards).most_common(1)[0][0]
+    by_index = {shard.index: shard for shard in shards if shard.set_id == set_id}
+    first = next(iter(by_index.values()))
+    lengths = first.lengths
+
+    missing = [i for i in range(first.data_count) if i not in by_index]
+    if missing:
+        numbers = ("shard " if len(missing) == 1 else "shards ") + ", ".join(str(i + 1) for i in missing)
+        if not first.parity:
+            raise ShardError(f"Missing data {numbers} of {first.data_count}; "
+                             f"the set has no parity shard to rebuild from.")
+        if first.data_count not in by_index:
+            raise ShardError(f"Missing data {numbers} of {first.data_count} "
+                             f"and the parity shard; no rebuild is possible.")
+        if len(missing) > 1:
+            raise ShardError(f"Missing data {numbers} of {first.data_count}; parity can rebuild only one.")
+        others = [by_index[i].chunk for i in range(first.data_count) if i != missing[0]]
+        rebuilt = xor_parity(others + [by_index[first.data_count].chunk])
+        by_index[missing[0]] = Shard(set_id, missing[0], first.data_count, first.parity, first.total_length,
+                                     first.crc, lengths, rebuilt[:lengths[missing[0]]])
+
+    frame = b"".join(by_index[i].chunk[:lengths[i]] for i in range(first.data_count))
+    if len(frame) != first.total_length or zlib.crc32(frame) != first.crc:
+        raise ShardError("Reassembled payload checksum mismatch.")
+    return frame, missing
@@ -0,0 +1,65 @@
+# stego_spread.py - Keyed pseudo-random placement of LSB payload bits
+
+import hashlib
+
+import numpy as np
+
+ROUNDS = 6
+
+# Indices permuted per batch, bounding the temporary arrays
+BATCH = 1 << 20
+
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+class KeyedPermutation:
+    """A key-dependent permutation of range(size), evaluated per index.
+
+    A balanced Feistel network permutes the smallest even-width power of
+    two covering size, and cycle-walking maps the few indices that land
+    outside range(size) back into it. Any index can be mapped on its own,
+    so an extractor computes only the positions of the bits it reads.
+    """
+
+    def __init__(self, key, size):
+        if size < 1:
+            raise ValueError("Nothing to permute.")
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self.half = np.uint64((bits + 1) // 2)
+        self.mask = np.uint64((1 << int(self.half)) - 1)
+        # The carrier size is part of the derivation, so each carrier gets its own layout
+        digest = hashlib.blake2b(key + size.to_bytes(8, "big"), digest_size=8 * ROUNDS,
+                                 person=b"steglyzer-lsb").digest()
+        self.round_keys = np.frombuffer(digest, dtype=">u8").astype(np.uint64)
+
+    def _round(self, right, round_key):
+        x = right ^ round_key
+        x = (x ^ (x >> np.uint64(30))) * _MIX1
+        x = (x ^ (x >> np.uint64(27))) * _MIX2
+        return (x ^ (x >> np.uint64(31))) & self.mask
+
+    def _encrypt(self, values):
+        left, right = values >> self.half, values & self.mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << self.half) | right
+
+    def positions(self, indices):
+        """Permuted positions (uint64 array) of an array of indices in range(size)"""
+        indices = np.asarray(indices, dtype=np.uint64)
+        out = np.empty_like(indices)
+        for start in range(0, len(indices), BATCH):
+            values = self._encrypt(indices[start:start + BATCH])
+            outside = np.flatnonzero(values >= self.size)
+            while len(outside):
+                values[outside] = self._encrypt(values[outside])
+                outside = outside[values[outside] >= self.size]
+            out[start:start + BATCH] = values
+        return out
+
+    def range(self, start, stop):
+        """Positions of the indices start..stop-1"""
+        return self.positions(np.arange(start, stop, dtype=np.uint64))
@@ -0,0 +1,142 @@
+# stego_thumbnail.py - Fast preview thumbnails with a content-keyed disk cache
+
+import os
+import hashlib
+import numpy as np
+from PIL import Image
+
+from stego_instrument import span
+
+THUMBNAIL_SIZE = (256, 256)
+
+# Files up to this size are hashed whole for their cache key
+KEY_FULL_HASH_LIMIT = 16 * 1024 * 1024
+
+# Bytes hashed from the start, middle and end of a larger file, which is also keyed by its mtime
+KEY_SAMPLE_BYTES = 64 * 1024
+
+# Bump when the rendering changes so stale cache entries are ignored
+CACHE_VERSION = 2
+
+# Uncompressed raw layouts that can be sampled straight from disk: bytes per pixel, channel order
+_RAW_LAYOUTS = {
+    "L": (1, [0]),
+    "RGB": (3, [0, 1, 2]),
+    "BGR": (3, [2, 1, 0]),
+    "RGBX": (4, [0, 1, 2]),
+    "BGRX": (4, [2, 1, 0]),
+    "RGBA": (4, [0, 1, 2, 3]),
+    "BGRA": (4, [2, 1, 0, 3]),
+}
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "steglyzer", "thumbnails")
+
+def content_key(file_path, size=THUMBNAIL_SIZE):
+    """Cache key from the whole content of a file, independent of its path.
+
+    Files over KEY_FULL_HASH_LIMIT are keyed by size, mtime and sampled
+    head/middle/tail bytes instead, since an in-place embed can change
+    pixels between the samples without changing the size.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    st = os.stat(file_path)
+    digest.update(f"{CACHE_VERSION}:{size[0]}x{size[1]}:{st.st_size}".encode())
+    with open(file_path, "rb") as f:
+        if st.st_size <= KEY_FULL_HASH_LIMIT:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        else:
+            digest.update(f":{st.st_mtime_ns}".encode())
+            middle = st.st_size // 2 - KEY_SAMPLE_BYTES // 2
+            for offset in (0, middle, st.st_size - KEY_SAMPLE_BYTES):
+                f.seek(offset)
+                digest.update(f.read(KEY_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+# -------------------------
+# Decoding
+# -------------------------
+
+def _sample_raw(img, file_path, size):
+    """Nearest-neighbour thumbnail read through a memory map of an uncompressed single-strip image.
+
+    Only the sampled rows are paged in; returns None for layouts it cannot handle.
+    """
+    if len(img.tile) != 1 or img.mode not in ("L", "RGB", "RGBA"):
+        return None
+    codec, extents, offset, args = img.tile[0]
+    if codec != "raw" or tuple(extents) != (0, 0) + img.size or not isinstance(args, tuple):
+        return None
+    rawmode = args[0]
+    stride = args[1] if len(args) > 1 and args[1] else None
+    orientation = args[2] if len(args) > 2 else 1
+    if rawmode not in _RAW_LAYOUTS:
+        return None
+    bpp, order = _RAW_LAYOUTS[rawmode]
+    if len(order) != len(img.getbands()):
+        return None
+
+    width, height = img.size
+    stride = stride or width * bpp
+    scale = max(width / size[0], height / size[1], 1)
+    out_w, out_h = max(1, int(width / scale)), max(1, int(height / scale))
+    rows = (np.arange(out_h) * height // out_h).astype(np.int64)
+    cols = (np.arange(out_w) * width // out_w).astype(np.int64)
+    if orientation < 0:
+        rows = height - 1 - rows
+
+    data = np.memmap(file_path, dtype=np.uint8, mode="r", offset=offset, shape=(height, stride))
+    byte_cols = cols[:, np.newaxis] * bpp + np.array(order)[np.newaxis, :]
+    pixels = np.ascontiguousarray(data[rows][:, byte_cols])
+    if pixels.shape[2] == 1:
+        return Image.fromarray(pixels[:, :, 0], "L")
+    return Image.fromarray(pixels, img.mode)
+
+def make_thumbnail(file_path, size=THUMBNAIL_SIZE):
+    """Decode a thumbnail without a full-resolution decode where the format allows it.
+
+    JPEGs are decoded with DCT scaling (draft) and uncompressed BMPs are
+    sampled from a memory map; other formats are shrunk with reduce(),
+    which bounds the resampling cost but still needs the full decode.
+    """
+    with Image.open(file_path) as img:
+        sampled = _sample_raw(img, file_path, size)
+        if sampled is not None:
+            return sampled
+        if img.format == "JPEG":
+            img.draft("RGB", size)
+        if img.mode not in ("L", "RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        factor = min(img.width // size[0], img.height // size[1])
+        if factor > 1:
+            img = img.reduce(factor)
+        img = img.copy()
+    img.thumbnail(size, Image.BICUBIC)
+    return img
+
+def get_thumbnail(file_path, size=THUMBNAIL_SIZE, cache_dir=None):
+    """Return a thumbnail image, from the disk cache when this content was seen before"""
+    cache_dir = cache_dir or default_cache_dir()
+    cache_path = os.path.join(cache_dir, content_key(file_path, size) + ".png")
+    with span("thumbnail") as s:
+        if os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached:
+                    cached.load()
+                    s.set(cache="hit")
+                    return cached.copy()
+            except OSError:
+                pass  # corrupt entry; rebuild it
+        s.set(cache="miss")
+
+        thumbnail = make_thumbnail(file_path, size)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            thumbnail.save(temp_path, "PNG")
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass  # the cache is best effort
+        return thumbnail
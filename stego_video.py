@@ -1,18 +1,45 @@
 import os
 import subprocess
 import json
+from stego_progress import report_progress, check_cancelled, OperationCancelled
+from stego_instrument import span
+from stego_frame import FrameError, as_frame, frame_to_text, text_to_payload
 
 SUPPORTED_VIDEO = [".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv"]
 
 FFMPEG_PATH = os.path.normpath(r"C:\Users\LENOVO\OneDrive\Desktop\ImageStegoAnalyzer\Stego Analyser\Multi-Stego-Toolkit\Tools\ffmpeg.exe")
 FFPROBE_PATH = os.path.normpath(r"C:\Users\LENOVO\OneDrive\Desktop\ImageStegoAnalyzer\Stego Analyser\Multi-Stego-Toolkit\Tools\ffprobe.exe")
 
+def _run_cancellable(cmd, cancel=None, capture=False):
+    """Run an FFmpeg/FFprobe command, terminating it if the cancel event is set"""
+    with span("spawn_" + os.path.splitext(os.path.basename(cmd[0]))[0].lower()):
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            text=capture
+        )
+    try:
+        while True:
+            try:
+                stdout, _ = proc.communicate(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                check_cancelled(cancel)
+    except OperationCancelled:
+        proc.kill()
+        proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return stdout
+
 def is_supported_video(path):
     """Check if the video has a supported extension."""
     ext = os.path.splitext(path)[1].lower()
     return ext in SUPPORTED_VIDEO
 
-def embed_text_in_video(input_path, output_path, secret_text):
+def embed_text_in_video(input_path, output_path, secret_text, progress=None, cancel=None):
     """
     Embed a secret text message into video metadata using FFmpeg.
     """
@@ -23,11 +50,15 @@ def embed_text_in_video(input_path, output_path, secret_text):
         cmd = [
             FFMPEG_PATH, "-y",                
             "-i", input_path,
-            "-metadata", f"comment={secret_text}",
+            "-metadata", f"comment={frame_to_text(as_frame(secret_text))}",
             "-codec", "copy",                    
             output_path
         ]
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        report_progress(progress, 0.1, "Running FFmpeg")
+        with span("ffmpeg_remux") as s:
+            s.add_bytes(os.path.getsize(input_path))
+            _run_cancellable(cmd, cancel)
+        report_progress(progress, 1.0, "Done")
         return True, f"✅ Message embedded in video: {output_path}"
 
     except subprocess.CalledProcessError:
@@ -35,9 +66,9 @@ def embed_text_in_video(input_path, output_path, secret_text):
     except Exception as e:
         return False, f"❌ Unexpected error: {str(e)}"
 
-def extract_text_from_video(video_path):
+def extract_text_from_video(video_path, progress=None, cancel=None, slot=None):
     """
-    Extract the secret text from video metadata using FFprobe.
+    Extract the secret text (or one named payload slot) from video metadata using FFprobe.
     """
     if not is_supported_video(video_path):
         return False, "❌ Unsupported video format."
@@ -50,16 +81,21 @@ def extract_text_from_video(video_path):
             "-show_format",                     # Show format tags
             video_path
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        metadata = json.loads(result.stdout)
+        report_progress(progress, 0.1, "Running FFprobe")
+        with span("ffprobe_metadata") as s:
+            s.add_bytes(os.path.getsize(video_path))
+            metadata = json.loads(_run_cancellable(cmd, cancel, capture=True))
+        report_progress(progress, 1.0, "Done")
 
         comment = metadata.get("format", {}).get("tags", {}).get("comment")
         if comment:
-            return True, comment
+            return True, text_to_payload(comment, slot)
         else:
             return False, "⚠️ No hidden message found in metadata."
 
     except subprocess.CalledProcessError:
         return False, "❌ FFprobe failed to analyze the video."
+    except FrameError as e:
+        return False, f"❌ {str(e)}"
     except Exception as e:
         return False, f"❌ Unexpected error: {str(e)}"
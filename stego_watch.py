@@ -0,0 +1,344 @@
+# stego_watch.py - Incremental watch/daemon mode backed by a persistent file index
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import sqlite3
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from stego_manager import get_file_type
+from stego_scan import iter_supported_files, scan_file, error_record, scan_isolated, stop_pool
+from stego_metrics import METRICS, run_measured
+
+# -------------------------
+# Persistent Index
+# -------------------------
+
+class FileIndex:
+    """SQLite index of (path, size, mtime, inode) -> last scan result"""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,"
+            " result TEXT, scanned_at REAL)"
+        )
+        self.pending_writes = 0
+
+    def is_current(self, path, st):
+        """True if path was already processed with this exact size, mtime and inode"""
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, inode FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        return row is not None and tuple(row) == (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def update(self, path, st, record):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, st.st_ino, json.dumps(record, ensure_ascii=False), time.time())
+        )
+        self.pending_writes += 1
+        if self.pending_writes >= 500:
+            self.commit()
+
+    def result(self, path):
+        row = self.conn.execute("SELECT result FROM files WHERE path = ?", (path,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def commit(self):
+        self.conn.commit()
+        self.pending_writes = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+# -------------------------
+# inotify (Linux) Watcher
+# -------------------------
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class InotifyWatcher:
+    """Recursive inotify watcher; raises OSError if inotify is unavailable or out of watches"""
+
+    def __init__(self, roots):
+        import ctypes
+        self._ctypes = ctypes
+        self.libc = _load_libc()
+        if self.libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        try:
+            for root in roots:
+                self.add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed for {directory}: {os.strerror(err)}")
+        self.watches[wd] = directory
+
+    def add_tree(self, root):
+        self.add_watch(root)
+        for dirpath, dirnames, _ in os.walk(root):
+            for name in dirnames:
+                self.add_watch(os.path.join(dirpath, name))
+
+    def read_events(self, timeout):
+        """Wait up to timeout seconds; return (changed file paths, new directories, overflowed)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], [], False
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], [], False
+
+        files, dirs, overflow = [], [], False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    dirs.append(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                files.append(path)
+        return files, dirs, overflow
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+# -------------------------
+# Daemon
+# -------------------------
+
+class WatchDaemon:
+    """Process new or changed carriers under one or more drop directories.
+
+    Files whose (size, mtime, inode) match the index are never decoded again,
+    so a restart only costs a stat() per file. inotify is used when available;
+    otherwise the tree is re-walked every poll_interval seconds. A file whose
+    scan fails is recorded with an error; when a worker crashes the pool is
+    rebuilt and the files in flight are re-run one at a time, as scan_directory
+    does, so one bad file never stops the daemon.
+    """
+
+    def __init__(self, roots, index_path, results_path=None, workers=None,
+                 poll_interval=30.0, settle_time=2.0, use_inotify=True, progress=None):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.index = FileIndex(index_path)
+        self.results_path = results_path
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = self.workers * 4
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.use_inotify = use_inotify
+        self.progress = progress
+        self.pool = None
+        self.pending = {}
+        self.pending_paths = set()
+        self.deferred = set()
+        self.results_out = None
+        self.stats = {"processed": 0, "found": 0, "unchanged": 0, "errors": 0}
+
+    def _submit(self, path):
+        if path in self.pending_paths or not get_file_type(path):
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        if self.index.is_current(path, st):
+            self.stats["unchanged"] += 1
+            return
+        # Polling may see files that are still being written
+        if self.settle_time and time.time() - st.st_mtime < self.settle_time:
+            self.deferred.add(path)
+            return
+
+        while len(self.pending) >= self.max_in_flight:
+            self._drain(block=True)
+        self.pending[self.pool.submit(run_measured, scan_file, path)] = (path, st)
+        self.pending_paths.add(path)
+
+    def _record(self, path, st, record):
+        self.index.update(path, st, record)
+        self.stats["processed"] += 1
+        if record.get("found"):
+            self.stats["found"] += 1
+        if "error" in record:
+            self.stats["errors"] += 1
+        if self.results_out:
+            self.results_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.results_out.flush()
+        if self.progress:
+            self.progress(record, self.stats)
+
+    def _collect(self, future, path, st):
+        """Record a finished job; False if its worker crashed"""
+        try:
+            record, spans = future.result()
+        except BrokenProcessPool:
+            return False
+        except Exception as e:
+            record, spans = error_record(path, f"Worker failed: {e}"), []
+        METRICS.ingest(spans)
+        self._record(path, st, record)
+        return True
+
+    def _restart(self, crashed):
+        """Replace a broken pool; files in flight when it broke are re-run alone to find the culprit"""
+        stop_pool(self.pool)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        pending, self.pending = self.pending, {}
+        requeue = []
+        for future, (path, st) in pending.items():
+            self.pending_paths.discard(path)
+            if not future.done() or future.cancelled():
+                requeue.append(path)
+            elif not self._collect(future, path, st):
+                crashed.append((path, st))
+        for path, st in crashed:
+            self._record(path, st, scan_isolated(path, on_spans=METRICS.ingest))
+        for path in requeue:
+            self._submit(path)
+
+    def _drain(self, block=False):
+        if not self.pending:
+            return
+        finished, _ = wait(self.pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        crashed = []
+        for future in finished:
+            path, st = self.pending.pop(future)
+            self.pending_paths.discard(path)
+            if not self._collect(future, path, st):
+                crashed.append((path, st))
+        if crashed:
+            self._restart(crashed)
+
+    def reconcile(self):
+        """Walk every root and submit files that are new or changed since the last run"""
+        for root in self.roots:
+            for path in iter_supported_files(root):
+                self._submit(path)
+                self._drain(block=False)
+        self.index.commit()
+
+    def _retry_deferred(self):
+        deferred, self.deferred = self.deferred, set()
+        for path in deferred:
+            self._submit(path)
+
+    def run(self, stop_event=None, once=False):
+        """Run until stop_event is set (or a single reconcile pass when once=True)"""
+        stop_event = stop_event or threading.Event()
+        self.results_out = open(self.results_path, "a", encoding="utf-8") if self.results_path else None
+        watcher = None
+        try:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            if self.use_inotify and not once:
+                try:
+                    watcher = InotifyWatcher(self.roots)
+                except OSError:
+                    watcher = None  # fall back to polling
+
+            if once:
+                self.settle_time = 0
+            self.reconcile()
+            last_poll = time.monotonic()
+
+            while not once and not stop_event.is_set():
+                if watcher:
+                    files, dirs, overflow = watcher.read_events(timeout=1.0)
+                    for directory in dirs:
+                        try:
+                            watcher.add_tree(directory)
+                        except OSError:
+                            pass
+                        for path in iter_supported_files(directory):
+                            self._submit(path)
+                    for path in files:
+                        self._submit(path)
+                    if overflow:
+                        self.reconcile()
+                else:
+                    stop_event.wait(1.0)
+                    if time.monotonic() - last_poll >= self.poll_interval:
+                        self.reconcile()
+                        last_poll = time.monotonic()
+
+                if self.deferred and not stop_event.is_set():
+                    self._retry_deferred()
+                self._drain(block=False)
+                self.index.commit()
+
+            while self.pending:
+                self._drain(block=True)
+        finally:
+            if self.pending:
+                stop_pool(self.pool)
+            elif self.pool:
+                self.pool.shutdown()
+            if watcher:
+                watcher.close()
+            self.index.close()
+            if self.results_out:
+                self.results_out.close()
+        return self.stats
@@ -0,0 +1,49 @@
+# test_archive.py - Archive trailer payloads and the legacy marker search
+
+import os
+
+from stego_archive import LEGACY_TAIL_SIZE, MARKER, embed_text_in_archive, extract_text_from_archive
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+def test_round_trip(tmp_path):
+    carrier = write(tmp_path / "cover.zip", os.urandom(200_000))
+    output = str(tmp_path / "stego.zip")
+    assert embed_text_in_archive(carrier, output, "archive secret")[0]
+    assert extract_text_from_archive(output) == (True, "archive secret")
+
+def test_embed_over_the_input(tmp_path):
+    data = os.urandom(50_000)
+    carrier = write(tmp_path / "same.zip", data)
+    assert embed_text_in_archive(carrier, carrier, "in place")[0]
+    assert extract_text_from_archive(carrier) == (True, "in place")
+    with open(carrier, "rb") as f:
+        assert f.read(len(data)) == data
+    assert os.listdir(tmp_path) == ["same.zip"]
+
+def test_corrupt_payload_is_reported(tmp_path):
+    output = str(tmp_path / "stego.zip")
+    embed_text_in_archive(write(tmp_path / "cover.zip", bytes(1000)), output, "archive secret")
+    with open(output, "r+b") as f:
+        f.seek(1000 + 20)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    success, message = extract_text_from_archive(output)
+    assert not success and "checksum" in message
+
+def test_legacy_marker_in_the_tail(tmp_path):
+    path = write(tmp_path / "legacy.zip", bytes(3 * LEGACY_TAIL_SIZE) + MARKER + b"old style")
+    assert extract_text_from_archive(path) == (True, "old style")
+
+def test_legacy_search_is_limited_to_the_tail(tmp_path):
+    path = write(tmp_path / "early.zip", MARKER + b"x" + bytes(2 * LEGACY_TAIL_SIZE))
+    assert not extract_text_from_archive(path)[0]
+    success, message = extract_text_from_archive(path, full_scan=True)
+    assert success and message.startswith("x")
+
+def test_clean_archive(tmp_path):
+    assert not extract_text_from_archive(write(tmp_path / "clean.zip", os.urandom(10_000)))[0]
@@ -0,0 +1,64 @@
+# test_frame.py - Payload frame round trips and corruption handling
+
+import zlib
+
+import pytest
+
+from stego_frame import (HEADER, HEADER_SIZE, MAGIC, FrameError, decode_frame, encode_frame,
+                         frame_to_text, parse_header, text_to_payload)
+
+TEXT = "Meet at the old mill at dawn. 🌅 " * 20
+
+@pytest.mark.parametrize("compression", ["none", "zlib", "lzma", "auto"])
+@pytest.mark.parametrize("payload", [TEXT, TEXT.encode("utf-8"), "", b"\x00\xff" * 500])
+def test_round_trip(payload, compression):
+    assert decode_frame(encode_frame(payload, compression)) == payload
+
+def test_text_and_bytes_stay_distinct():
+    assert isinstance(decode_frame(encode_frame("abc")), str)
+    assert isinstance(decode_frame(encode_frame(b"abc")), bytes)
+
+def test_auto_keeps_incompressible_payloads_raw():
+    payload = bytes(range(40))  # below the compression threshold
+    frame = encode_frame(payload)
+    assert parse_header(frame).compression == "none"
+    assert len(frame) == HEADER_SIZE + len(payload)
+
+def test_parse_header_rejects_non_frames():
+    assert parse_header(b"") is None
+    assert parse_header(b"\x89PNG\r\n\x1a\n" + bytes(HEADER_SIZE)) is None
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_flipped_body_bit_fails_checksum(compression):
+    frame = bytearray(encode_frame(TEXT, compression))
+    frame[HEADER_SIZE + 5] ^= 0x01
+    with pytest.raises(FrameError, match="checksum"):
+        decode_frame(bytes(frame))
+
+def test_truncated_frame():
+    frame = encode_frame(TEXT, "none")
+    with pytest.raises(FrameError, match="Truncated"):
+        decode_frame(frame[:-1])
+
+def test_unknown_version():
+    frame = bytearray(encode_frame(TEXT))
+    frame[len(MAGIC)] = 99
+    with pytest.raises(FrameError, match="version"):
+        decode_frame(bytes(frame))
+
+def test_oversized_length_claim_is_rejected_before_reading():
+    header = HEADER.pack(MAGIC, 1, 0, 2 ** 31, 2 ** 31, 0)
+    with pytest.raises(FrameError, match="allowed"):
+        parse_header(header)
+
+def test_wrong_raw_length():
+    body = zlib.compress(TEXT.encode("utf-8"))
+    header = HEADER.pack(MAGIC, 1, 1, len(body), len(TEXT.encode("utf-8")) + 1, zlib.crc32(body))
+    with pytest.raises(FrameError):
+        decode_frame(header + body)
+
+def test_text_encoding_round_trip():
+    assert text_to_payload(frame_to_text(encode_frame(TEXT))) == TEXT
+    assert text_to_payload("plain legacy comment") == "plain legacy comment"
+    with pytest.raises(FrameError, match="encoding"):
+        text_to_payload("SGLZ:not base64!")
@@ -0,0 +1,116 @@
+# test_jpeg.py - Payloads in JPEG DCT coefficients
+
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from stego_image import embed_text_in_image, extract_text_from_image
+from stego_jpeg import JpegCoefficients, JpegError
+
+MESSAGE = "coefficients, not pixels " * 8
+
+def photo(width=160, height=120, mode="RGB"):
+    """Smooth gradients plus noise, so the AC coefficients are not all zero"""
+    y, x = np.mgrid[:height, :width]
+    rng = np.random.default_rng(3)
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) % 256], axis=-1)
+    pixels = np.clip(base + rng.integers(-40, 40, base.shape), 0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels)
+    return image.convert("L") if mode == "L" else image
+
+def save(tmp_path, name, image=None, **options):
+    path = str(tmp_path / name)
+    options.setdefault("quality", 90)
+    (image or photo()).save(path, "JPEG", **options)
+    return path
+
+def until_scan(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return data[:data.index(b"\xff\xda")]
+
+@pytest.mark.parametrize("options", [
+    {"subsampling": 0},
+    {"subsampling": 2},
+    {"subsampling": 1, "quality": 50},
+])
+def test_round_trip(tmp_path, options):
+    cover = save(tmp_path, "cover.jpg", **options)
+    stego = str(tmp_path / "stego.jpg")
+    success, message = embed_text_in_image(cover, stego, MESSAGE)
+    assert success and "JPEG coefficients" in message
+    assert extract_text_from_image(stego) == (True, MESSAGE)
+
+def test_grayscale(tmp_path):
+    cover = save(tmp_path, "grey.jpg", photo(mode="L"))
+    stego = str(tmp_path / "stego.jpg")
+    assert embed_text_in_image(cover, stego, MESSAGE)[0]
+    assert extract_text_from_image(stego) == (True, MESSAGE)
+
+def test_restart_intervals(tmp_path):
+    cover = save(tmp_path, "restart.jpg", restart_marker_blocks=3)
+    if b"\xff\xdd" not in open(cover, "rb").read():
+        pytest.skip("this Pillow cannot write restart markers")
+    stego = str(tmp_path / "stego.jpg")
+    assert embed_text_in_image(cover, stego, MESSAGE)[0]
+    assert extract_text_from_image(stego) == (True, MESSAGE)
+
+def test_keyed_round_trip(tmp_path):
+    cover = save(tmp_path, "cover.jpg")
+    stego = str(tmp_path / "stego.jpg")
+    assert embed_text_in_image(cover, stego, MESSAGE, key="k")[0]
+    assert extract_text_from_image(stego, key="k") == (True, MESSAGE)
+    assert not extract_text_from_image(stego)[0]
+
+def test_output_stays_a_close_jpeg(tmp_path):
+    cover = save(tmp_path, "cover.jpg")
+    stego = str(tmp_path / "stego.jpg")
+    embed_text_in_image(cover, stego, MESSAGE)
+    assert until_scan(stego) == until_scan(cover)  # headers and tables untouched
+    with Image.open(cover) as a, Image.open(stego) as b:
+        assert b.format == "JPEG"
+        difference = np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16))
+    assert 0 < difference.mean() < 1.0
+
+def test_bits_land_on_the_coefficients_read_back(tmp_path):
+    cover = save(tmp_path, "cover.jpg")
+    jpeg = JpegCoefficients(open(cover, "rb").read())
+    positions = jpeg.positions(500)
+    bits = np.random.default_rng(5).integers(0, 2, len(positions), dtype=np.uint8)
+    stego = str(tmp_path / "stego.jpg")
+    jpeg.write(stego, positions, bits)
+    again = JpegCoefficients(open(stego, "rb").read())
+    assert np.array_equal(again.positions(500), positions)
+    assert np.array_equal(again.read_bits(positions), bits)
+    assert again.capacity_bits() == jpeg.capacity_bits()
+
+def test_progressive_falls_back_to_png_data(tmp_path):
+    cover = save(tmp_path, "progressive.jpg", progressive=True)
+    stego = str(tmp_path / "stego.jpg")
+    success, message = embed_text_in_image(cover, stego, MESSAGE)
+    assert success and "progressive" in message
+    assert extract_text_from_image(stego) == (True, MESSAGE)
+
+def test_message_too_large(tmp_path):
+    cover = save(tmp_path, "small.jpg", photo(32, 32))
+    success, message = embed_text_in_image(cover, str(tmp_path / "stego.jpg"), os.urandom(20_000))
+    assert not success and "too large" in message
+
+def test_flipped_coefficient_fails_the_checksum(tmp_path):
+    cover = save(tmp_path, "cover.jpg")
+    stego = str(tmp_path / "stego.jpg")
+    embed_text_in_image(cover, stego, MESSAGE)
+    jpeg = JpegCoefficients(open(stego, "rb").read())
+    positions = jpeg.positions(300)
+    bits = jpeg.read_bits(positions)
+    bits[250] ^= 1  # past the 144-bit header, inside the payload
+    corrupt = str(tmp_path / "corrupt.jpg")
+    jpeg.write(corrupt, positions, bits)
+    success, message = extract_text_from_image(corrupt)
+    assert not success and "checksum" in message
+
+def test_not_a_jpeg():
+    with pytest.raises(JpegError):
+        JpegCoefficients(b"\x89PNG\r\n\x1a\n" + bytes(100))
@@ -0,0 +1,83 @@
+# test_scan.py - Directory scans and checkpoint resume
+
+import json
+import os
+
+import pytest
+from PIL import Image
+
+from stego_image import embed_text_in_image
+from stego_scan import iter_supported_files, load_checkpoint, scan_directory
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "corpus"
+    (root / "nested" / "deeper").mkdir(parents=True)
+    paths = []
+    for i, folder in enumerate(["", "nested", "nested/deeper", "", "nested"]):
+        path = str(root / folder / f"image{i}.png")
+        Image.new("RGB", (48, 48), (40 * i, 90, 200)).save(path)
+        paths.append(path)
+    embed_text_in_image(paths[1], paths[1], "found me")
+    embed_text_in_image(paths[4], paths[4], "me too")
+    (root / "notes.txt").write_text("not a carrier")
+    return root, sorted(paths)
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_scan_records_every_carrier(corpus, tmp_path):
+    root, paths = corpus
+    results = str(tmp_path / "results.jsonl")
+    stats = scan_directory(str(root), results, workers=2)
+    records = read_results(results)
+    assert sorted(record["path"] for record in records) == paths
+    assert {record["message"] for record in records if record["found"]} == {"found me", "me too"}
+    assert stats["scanned"] == 5 and stats["found"] == 2 and stats["errors"] == 0
+
+def test_resume_skips_recorded_files_and_drops_a_torn_line(corpus, tmp_path):
+    root, paths = corpus
+    results = str(tmp_path / "results.jsonl")
+    scan_directory(str(root), results, workers=2)
+    lines = open(results, encoding="utf-8").read().splitlines(keepends=True)
+
+    # As if the previous run died while writing its third record
+    with open(results, "w", encoding="utf-8") as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:len(lines[2]) // 2])
+    assert load_checkpoint(results) == {json.loads(line)["path"] for line in lines[:2]}
+
+    stats = scan_directory(str(root), results, workers=2)
+    assert stats["resumed"] == 2 and stats["scanned"] == 3
+    records = read_results(results)
+    assert sorted(record["path"] for record in records) == paths
+
+    # A finished scan resumes to nothing
+    assert scan_directory(str(root), results, workers=2)["scanned"] == 0
+    assert len(read_results(results)) == 5
+
+def test_no_resume_starts_over(corpus, tmp_path):
+    root, _ = corpus
+    results = str(tmp_path / "results.jsonl")
+    scan_directory(str(root), results, workers=2)
+    stats = scan_directory(str(root), results, workers=2, resume=False)
+    assert stats["resumed"] == 0 and len(read_results(results)) == 5
+
+def test_size_limit_skips_without_decoding(corpus, tmp_path):
+    root, _ = corpus
+    results = str(tmp_path / "results.jsonl")
+    stats = scan_directory(str(root), results, workers=2, max_file_size=10)
+    assert stats["skipped"] == 5 and stats["scanned"] == 0
+    assert all(record["skipped"] == "size limit" for record in read_results(results))
+
+def test_timeouts_leave_quick_files_alone(corpus, tmp_path):
+    root, _ = corpus
+    results = str(tmp_path / "results.jsonl")
+    stats = scan_directory(str(root), results, workers=2, file_timeout=60)
+    assert stats["scanned"] == 5 and stats["errors"] == 0
+
+def test_walk_skips_unsupported_files(corpus):
+    root, paths = corpus
+    assert sorted(iter_supported_files(str(root))) == paths
+    assert list(iter_supported_files(os.path.join(str(root), "missing"))) == []
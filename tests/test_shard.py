@@ -0,0 +1,85 @@
+# test_shard.py - Payload shards across carriers with XOR parity
+
+import os
+
+import pytest
+from PIL import Image
+
+from stego_frame import decode_frame, encode_payload
+from stego_manager import embed_sharded, extract_sharded
+from stego_shard import ShardError, join_shards, parse_shard, plan_chunks, split_payload
+
+FRAME = bytes(encode_payload("sharded secret " * 200, "none"))
+
+def shards_of(frame, capacities, parity=True):
+    return [parse_shard(data) for data in split_payload(frame, capacities, parity)]
+
+def without(shards, *indices):
+    return [shard for shard in shards if shard.index not in indices]
+
+def test_round_trip_in_any_order():
+    shards = shards_of(FRAME, [None] * 4)
+    assert join_shards(shards[::-1]) == (FRAME, [])
+
+@pytest.mark.parametrize("lost", [0, 1, 2])
+def test_any_one_data_shard_is_rebuilt(lost):
+    assert join_shards(without(shards_of(FRAME, [None] * 4), lost)) == (FRAME, [lost])
+
+def test_parity_shard_may_be_missing():
+    assert join_shards(without(shards_of(FRAME, [None] * 4), 3)) == (FRAME, [])
+
+def test_two_missing_data_shards():
+    with pytest.raises(ShardError, match="shards 1, 2 of 3; parity can rebuild only one"):
+        join_shards(without(shards_of(FRAME, [None] * 4), 0, 1))
+
+def test_missing_data_and_parity_shard():
+    with pytest.raises(ShardError, match="shard 3 of 3 and the parity shard; no rebuild is possible"):
+        join_shards(without(shards_of(FRAME, [None] * 4), 2, 3))
+
+def test_missing_shard_without_parity():
+    with pytest.raises(ShardError, match="no parity shard"):
+        join_shards(without(shards_of(FRAME, [None] * 3, parity=False), 1))
+
+def test_uneven_capacities():
+    shards = split_payload(FRAME, [500, None, 2000, 5000])
+    assert join_shards([parse_shard(data) for data in shards]) == (FRAME, [])
+    assert len(shards[0]) <= 500
+
+def test_payload_too_large():
+    with pytest.raises(ShardError, match="combined capacity"):
+        split_payload(FRAME, [100, 100, 100])
+    with pytest.raises(ShardError, match="combined capacity"):
+        plan_chunks(1000, [10, 10])
+
+def test_stray_shard_of_another_set_is_ignored():
+    shards = shards_of(FRAME, [None] * 3)
+    stray = shards_of(FRAME[:100] + bytes(50), [None] * 3)[0]
+    assert join_shards(shards + [stray]) == (FRAME, [])
+
+def test_corrupt_chunk_fails_the_checksum():
+    shards = shards_of(FRAME, [None] * 3)
+    data = next(shard for shard in shards if not shard.is_parity)
+    data.chunk = bytes([data.chunk[0] ^ 1]) + data.chunk[1:]
+    with pytest.raises(ShardError, match="checksum"):
+        join_shards(shards)
+
+def test_non_shards_are_ignored():
+    assert parse_shard("text payload") is None
+    assert parse_shard(b"not a shard at all, but long enough") is None
+    with pytest.raises(ShardError, match="Corrupt shard header"):
+        parse_shard(split_payload(FRAME, [None] * 3)[0][:30])
+
+def test_embed_and_extract_across_images(tmp_path):
+    carriers = []
+    for i in range(3):
+        cover = tmp_path / f"cover{i}.png"
+        Image.new("RGB", (64 + 16 * i, 64), (10 * i, 80, 160)).save(cover)
+        carriers.append((str(cover), str(tmp_path / f"stego{i}.png")))
+    message = "split over three pictures " * 30
+    success, result = embed_sharded(carriers, message, workers=2)
+    assert success, result
+
+    outputs = [output for _, output in carriers]
+    assert extract_sharded(outputs, workers=2) == (True, message)
+    os.remove(outputs[1])
+    assert extract_sharded(outputs, workers=2) == (True, message)
@@ -0,0 +1,81 @@
+# test_slots.py - Named payload slots behind a random-access index
+
+import zlib
+
+import pytest
+from PIL import Image
+
+from stego_frame import (FLAG_CONTAINER, HEADER, HEADER_SIZE, MAGIC, SLOT_COUNT, VERSION, FrameError,
+                         decode_frame, encode_container, encode_payload, parse_header, read_index, read_payload)
+from stego_image import embed_text_in_image, extract_text_from_image, read_image_index
+
+SLOTS = {"notes": "first slot " * 50, "key.bin": bytes(range(256)), "last": "z"}
+
+class CountingReader:
+    """read(offset, count) over bytes that remembers how much was read"""
+
+    def __init__(self, data):
+        self.data = data
+        self.bytes_read = 0
+
+    def __call__(self, offset, count):
+        self.bytes_read += count
+        return self.data[offset:offset + count]
+
+def test_round_trip_every_slot():
+    container = encode_container(SLOTS)
+    for name, payload in SLOTS.items():
+        assert decode_frame(container, name) == payload
+    assert decode_frame(container) == SLOTS["notes"]  # no name: the first slot
+    assert [entry.name for entry in read_index(CountingReader(container))] == list(SLOTS)
+
+def test_only_the_requested_slot_is_read():
+    big = {"big": bytes(100_000), "small": "tiny"}
+    reader = CountingReader(encode_container(big, "none"))
+    assert read_payload(reader, "small") == "tiny"
+    assert reader.bytes_read < 200
+
+def test_unknown_slot_names_the_slots():
+    with pytest.raises(FrameError, match="notes, key.bin, last"):
+        decode_frame(encode_container(SLOTS), "missing")
+
+def test_single_payload_has_no_slots():
+    with pytest.raises(FrameError, match="single payload"):
+        decode_frame(encode_payload("one"), "notes")
+    assert read_index(CountingReader(encode_payload("one"))) == []
+
+def test_corrupt_slot_leaves_the_others_readable():
+    container = bytearray(encode_container(SLOTS, "none"))
+    header = parse_header(container)
+    container[header.index_size + HEADER_SIZE + 3] ^= 0x01  # inside the first slot's body
+    with pytest.raises(FrameError, match="'notes' checksum"):
+        decode_frame(bytes(container), "notes")
+    assert decode_frame(bytes(container), "last") == "z"
+
+def test_corrupt_index():
+    container = bytearray(encode_container(SLOTS))
+    container[HEADER_SIZE + 4] ^= 0x01
+    with pytest.raises(FrameError, match="index checksum"):
+        decode_frame(bytes(container))
+
+def test_truncated_slot():
+    container = encode_container(SLOTS, "none")
+    with pytest.raises(FrameError, match="'last' is truncated"):
+        decode_frame(container[:-1], "last")
+
+def test_empty_container_is_rejected():
+    with pytest.raises(ValueError):
+        encode_container({})
+    index = SLOT_COUNT.pack(0)
+    data = HEADER.pack(MAGIC, VERSION, FLAG_CONTAINER, len(index), HEADER_SIZE + len(index),
+                       zlib.crc32(index)) + index
+    with pytest.raises(FrameError, match="Empty slot container"):
+        decode_frame(data)
+
+def test_slots_in_an_image(tmp_path):
+    cover, stego = tmp_path / "cover.png", tmp_path / "stego.png"
+    Image.new("RGB", (128, 128), (120, 60, 200)).save(cover)
+    success, message = embed_text_in_image(str(cover), str(stego), encode_payload(SLOTS))
+    assert success, message
+    assert [entry.name for entry in read_image_index(str(stego))] == list(SLOTS)
+    assert extract_text_from_image(str(stego), slot="key.bin") == (True, SLOTS["key.bin"])
@@ -0,0 +1,58 @@
+# test_spread.py - Keyed permutation of LSB positions
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from stego_image import embed_text_in_image, extract_text_from_image
+from stego_spread import KeyedPermutation
+
+@pytest.mark.parametrize("size", [1, 2, 3, 17, 1000, 4096, 65_537])
+def test_is_a_permutation(size):
+    positions = KeyedPermutation("key", size).range(0, size)
+    assert np.array_equal(np.sort(positions), np.arange(size, dtype=np.uint64))
+
+def test_deterministic_and_key_dependent():
+    a = KeyedPermutation("key", 10_000).range(0, 100)
+    assert np.array_equal(a, KeyedPermutation(b"key", 10_000).range(0, 100))
+    assert not np.array_equal(a, KeyedPermutation("other", 10_000).range(0, 100))
+    assert not np.array_equal(a, KeyedPermutation("key", 10_001).range(0, 100))
+
+def test_single_indices_match_the_range():
+    permutation = KeyedPermutation("key", 50_000)
+    full = permutation.range(0, 50_000)
+    picks = np.array([0, 1, 999, 31_337, 49_999], dtype=np.uint64)
+    assert np.array_equal(permutation.positions(picks), full[picks.astype(np.int64)])
+    assert np.array_equal(permutation.range(1000, 1100), full[1000:1100])
+
+def test_empty_size():
+    with pytest.raises(ValueError):
+        KeyedPermutation("key", 0)
+
+def test_spreads_over_the_whole_carrier():
+    positions = KeyedPermutation("key", 1_000_000).range(0, 1000)
+    assert positions.max() > 900_000 and positions.min() < 100_000
+
+@pytest.fixture
+def cover(tmp_path):
+    path = tmp_path / "cover.png"
+    rng = np.random.default_rng(7)
+    Image.fromarray(rng.integers(0, 256, (96, 96, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+def test_keyed_image_round_trip(cover, tmp_path):
+    stego = str(tmp_path / "stego.png")
+    assert embed_text_in_image(cover, stego, "spread secret", key="hunter2")[0]
+    assert extract_text_from_image(stego, key="hunter2") == (True, "spread secret")
+
+def test_wrong_or_missing_key_finds_nothing(cover, tmp_path):
+    stego = str(tmp_path / "stego.png")
+    embed_text_in_image(cover, stego, "spread secret", key="hunter2")
+    assert not extract_text_from_image(stego, key="wrong")[0]
+    assert not extract_text_from_image(stego)[0]
+
+def test_keyed_embed_touches_scattered_pixels(cover, tmp_path):
+    stego = str(tmp_path / "stego.png")
+    embed_text_in_image(cover, stego, "spread secret", key="hunter2")
+    changed = np.argwhere(np.asarray(Image.open(stego)) != np.asarray(Image.open(cover)))[:, 0]
+    assert changed.max() - changed.min() > 48  # rows far apart, not a block at the top
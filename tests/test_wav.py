@@ -0,0 +1,130 @@
+# test_wav.py - Sample-aware WAV LSB payloads
+
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from stego_audio import embed_text_in_wav, extract_text_from_wav, read_wav_layout
+from stego_frame import encode_frame, to_bits
+
+RATE = 8000
+WAVE = np.stack([0.5 * np.sin(np.arange(RATE) * 0.05), 0.3 * np.sin(np.arange(RATE) * 0.08)], axis=1)
+
+def write_wav(path, tag, width, data, channels=2, extensible=False, valid_bits=None):
+    """A RIFF/WAVE file with an INFO chunk ahead of the data, as some editors write"""
+    bits = width * 8
+    fmt = struct.pack("<HHIIHH", 0xFFFE if extensible else tag, channels, RATE,
+                      RATE * channels * width, channels * width, bits)
+    if extensible:
+        fmt += struct.pack("<HHI", 22, valid_bits or bits, 3) + struct.pack("<H", tag) + bytes(14)
+    body = (b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"LIST" + struct.pack("<I", 4) + b"INFO"
+            + b"data" + struct.pack("<I", len(data)) + data)
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", len(body)) + body)
+    return str(path)
+
+def pcm24(signal):
+    samples = (signal * (2 ** 23 - 1)).astype("<i4")
+    return samples.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+FORMATS = {
+    "u8": lambda p: write_wav(p, 1, 1, (WAVE * 127 + 128).astype(np.uint8).tobytes()),
+    "s16": lambda p: write_wav(p, 1, 2, (WAVE * 32767).astype("<i2").tobytes()),
+    "s24": lambda p: write_wav(p, 1, 3, pcm24(WAVE)),
+    "s24-extensible": lambda p: write_wav(p, 1, 3, pcm24(WAVE), extensible=True),
+    "s24-in-32": lambda p: write_wav(p, 1, 4, ((WAVE * (2 ** 23 - 1)).astype("<i4") << 8).tobytes(),
+                                     extensible=True, valid_bits=24),
+    "f32": lambda p: write_wav(p, 3, 4, WAVE.astype("<f4").tobytes()),
+    "f64": lambda p: write_wav(p, 3, 8, WAVE.astype("<f8").tobytes()),
+    "s16-6ch": lambda p: write_wav(p, 1, 2, (np.tile(WAVE[:, :1], (1, 6)) * 32767).astype("<i2").tobytes(),
+                                   channels=6),
+}
+
+def samples(path):
+    """Sample values as integers in units of the least significant valid bit"""
+    layout = read_wav_layout(path)
+    raw = np.fromfile(path, np.uint8)[layout.data_offset:layout.data_offset + layout.data_size]
+    if layout.sample_width == 3:
+        b = raw.reshape(-1, 3).astype(np.int64)
+        return (b[:, 0] | b[:, 1] << 8 | b[:, 2] << 16) << 40 >> 40
+    dtype = {(1, 1): "u1", (1, 2): "<i2", (1, 4): "<i4", (3, 4): "<i4", (3, 8): "<i8"}
+    values = raw.view(dtype[(layout.format_tag, layout.sample_width)]).astype(np.int64)
+    return values >> layout.lsb_bit
+
+@pytest.fixture(params=sorted(FORMATS))
+def cover(request, tmp_path):
+    return FORMATS[request.param](tmp_path / f"{request.param}.wav")
+
+def test_round_trip(cover, tmp_path):
+    stego = str(tmp_path / "stego.wav")
+    payload = os.urandom(1500)
+    success, message = embed_text_in_wav(cover, stego, payload)
+    assert success, message
+    assert extract_text_from_wav(stego) == (True, payload)
+
+def test_only_the_lowest_valid_bit_changes(cover, tmp_path):
+    stego = str(tmp_path / "stego.wav")
+    embed_text_in_wav(cover, stego, os.urandom(1500))
+    assert os.path.getsize(stego) == os.path.getsize(cover)
+    with open(cover, "rb") as a, open(stego, "rb") as b:
+        offset = read_wav_layout(cover).data_offset
+        assert a.read(offset) == b.read(offset)  # headers and the INFO chunk are kept
+    difference = np.abs(samples(stego) - samples(cover))
+    assert difference.max() == 1 and difference.sum() > 1000
+
+def test_keyed_round_trip(cover, tmp_path):
+    stego = str(tmp_path / "stego.wav")
+    assert embed_text_in_wav(cover, stego, "keyed audio", key="k")[0]
+    assert extract_text_from_wav(stego, key="k") == (True, "keyed audio")
+    assert not extract_text_from_wav(stego, key="other")[0]
+
+def test_message_too_large(tmp_path):
+    cover = FORMATS["s16"](tmp_path / "cover.wav")
+    success, message = embed_text_in_wav(cover, str(tmp_path / "stego.wav"), os.urandom(5000))
+    assert not success and "too large" in message
+
+def test_embed_over_the_input(tmp_path):
+    cover = FORMATS["s24"](tmp_path / "same.wav")
+    assert embed_text_in_wav(cover, cover, "in place")[0]
+    assert extract_text_from_wav(cover) == (True, "in place")
+    assert os.listdir(tmp_path) == ["same.wav"]
+
+def test_flipped_payload_bit_fails_the_checksum(tmp_path):
+    cover = FORMATS["s16"](tmp_path / "cover.wav")
+    stego = str(tmp_path / "stego.wav")
+    embed_text_in_wav(cover, stego, os.urandom(500))
+    offset = read_wav_layout(stego).data_offset
+    with open(stego, "r+b") as f:
+        f.seek(offset + 2 * 400)  # sample 400, past the 144-bit header
+        value = f.read(1)[0]
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([value ^ 1]))
+    success, message = extract_text_from_wav(stego)
+    assert not success and "checksum" in message
+
+# The unchecksummed pre-frame fallback can read the low mantissa bits of float data as a plausible length
+@pytest.mark.parametrize("name", ["u8", "s16", "s24", "s24-in-32"])
+def test_clean_file_has_no_payload(name, tmp_path):
+    assert not extract_text_from_wav(FORMATS[name](tmp_path / "clean.wav"))[0]
+
+def test_byte_lsb_layout_still_extracts(tmp_path):
+    bits = to_bits(encode_frame("older layout"))
+    data = bytearray((WAVE * 32767).astype("<i2").tobytes())
+    data[:len(bits)] = bytes((byte & 0xFE) | bit for byte, bit in zip(data, bits.tolist()))
+    path = write_wav(tmp_path / "old.wav", 1, 2, bytes(data))
+    assert extract_text_from_wav(path) == (True, "older layout")
+
+def test_pre_frame_format_still_extracts(tmp_path):
+    text = "legacy"
+    bits = [int(b) for b in f"{len(text):032b}" + "".join(f"{ord(c):08b}" for c in text)]
+    data = bytearray((WAVE * 32767).astype("<i2").tobytes())
+    data[:len(bits)] = bytes((byte & 0xFE) | bit for byte, bit in zip(data, bits))
+    path = write_wav(tmp_path / "legacy.wav", 1, 2, bytes(data))
+    assert extract_text_from_wav(path) == (True, text)
+
+def test_not_a_wav(tmp_path):
+    path = tmp_path / "fake.wav"
+    path.write_bytes(b"OggS" + bytes(100))
+    assert not extract_text_from_wav(str(path))[0]